@@ -16,6 +16,8 @@ AZURE_OPENAI_ENDPOINT = env("AZURE_OPENAI_ENDPOINT", "")
 AZURE_OPENAI_KEY = env("AZURE_OPENAI_KEY", "")
 AZURE_OPENAI_DEPLOYMENT = env("AZURE_OPENAI_DEPLOYMENT", "")
 AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-01")
+# OpenAI-compatible base URL that replaces Azure (e.g. the offline mock LLM server)
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "")
 
 DB_PATH = os.getenv("AI_CONFIDENCE_DB_PATH", "ai_confidence.db")
 # Async RAGAS sampling (0.0 to 1.0)
@@ -6,6 +6,7 @@ from fastapi import BackgroundTasks, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from ai_confidence.pipeline import run_prompt as run_prompt_pipeline
 from ai_confidence.judge_azure import AzureOpenAIJudge
+from ai_confidence.resilience import breaker_states
 from .api_models import (
     ConfidenceResponse,
     ReplayRequest,
@@ -19,6 +20,7 @@ from .config import (
     AZURE_OPENAI_ENDPOINT,
     AZURE_OPENAI_KEY,
     DB_PATH,
+    LLM_BASE_URL,
     RAGAS_SAMPLE_RATE,
 )
 from .store import Store
@@ -43,14 +45,15 @@ app.add_middleware(
 store = Store(DB_PATH)
 
 # Ensure config is present for judge
-if not AZURE_OPENAI_ENDPOINT:
+if not AZURE_OPENAI_ENDPOINT and not LLM_BASE_URL:
     print("WARNING: AZURE_OPENAI_ENDPOINT not set. Judges will fail.")
 
 AZURE_CFG = {
     "endpoint": AZURE_OPENAI_ENDPOINT,
     "api_key": AZURE_OPENAI_KEY,
-    "deployment": AZURE_OPENAI_DEPLOYMENT,
+    "deployment": AZURE_OPENAI_DEPLOYMENT or ("mock-llm" if LLM_BASE_URL else ""),
     "api_version": AZURE_OPENAI_API_VERSION,
+    "base_url": LLM_BASE_URL or None,
 }
 
 # Lazy init judge to avoid crash at startup if env missing
@@ -62,6 +65,12 @@ except:
 def should_sample() -> bool:
     return random.random() < RAGAS_SAMPLE_RATE
 
+@app.get("/health")
+def health():
+    breakers = breaker_states()
+    degraded = any(b["state"] != "closed" for b in breakers.values())
+    return {"status": "degraded" if degraded else "ok", "circuit_breakers": breakers}
+
 @app.post("/runs", response_model=RunCreateResponse)
 def create_run(req: RunCreateRequest, background: BackgroundTasks):
     run_id = req.run_id or str(uuid.uuid4())
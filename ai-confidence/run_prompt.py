@@ -20,10 +20,13 @@ AZURE_CFG = {
     "api_key": os.getenv("AZURE_OPENAI_KEY", ""),
     "deployment": os.getenv("AZURE_OPENAI_DEPLOYMENT", ""),
     "api_version": os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-01"),
+    "base_url": os.getenv("LLM_BASE_URL") or None,
 }
 
 if __name__ == "__main__":
-    if not AZURE_CFG["endpoint"] or not AZURE_CFG["api_key"] or not AZURE_CFG["deployment"]:
+    if AZURE_CFG["base_url"]:
+        AZURE_CFG["deployment"] = AZURE_CFG["deployment"] or "mock-llm"
+    elif not AZURE_CFG["endpoint"] or not AZURE_CFG["api_key"] or not AZURE_CFG["deployment"]:
         print("ERROR: Missing Azure OpenAI environment variables.")
         print("Please export AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_KEY, AZURE_OPENAI_DEPLOYMENT")
         exit(1)
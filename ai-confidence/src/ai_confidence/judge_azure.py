@@ -1,21 +1,26 @@
-import os
-import time
-from openai import AzureOpenAI
+from typing import Optional
+from openai import AzureOpenAI, OpenAI
+from .resilience import RetryPolicy, call_with_resilience
 
 class AzureOpenAIJudge:
-    def __init__(self, endpoint: str, api_key: str, deployment: str, api_version: str):
-        self.client = AzureOpenAI(
-            azure_endpoint=endpoint,
-            api_key=api_key,
-            api_version=api_version,
-        )
+    def __init__(self, endpoint: str, api_key: str, deployment: str, api_version: str, timeout: float = 60.0, base_url: Optional[str] = None):
+        if base_url:
+            # OpenAI-compatible stand-in (e.g. mock_llm_server.py) instead of Azure
+            self.client = OpenAI(base_url=base_url, api_key=api_key or "mock-key", timeout=timeout, max_retries=0)
+        else:
+            self.client = AzureOpenAI(
+                azure_endpoint=endpoint,
+                api_key=api_key,
+                api_version=api_version,
+                timeout=timeout,
+                max_retries=0,  # retries handled by the resilience layer
+            )
         self.deployment = deployment
 
     def complete(self, prompt: str, temperature: float = 0.0, max_tokens: int = 600, retries: int = 3) -> str:
-        last_err = None
-        for _ in range(retries):
-            try:
-                resp = self.client.chat.completions.create(
+        try:
+            resp = call_with_resilience(
+                lambda: self.client.chat.completions.create(
                     model=self.deployment,
                     messages=[
                         {"role": "system", "content": "Return ONLY valid JSON."},
@@ -23,10 +28,10 @@ class AzureOpenAIJudge:
                     ],
                     temperature=temperature,
                     max_tokens=max_tokens,
-                )
-                return resp.choices[0].message.content or ""
-            except Exception as e:
-                last_err = e
-                time.sleep(0.5)
-        
-        raise RuntimeError(f"AzureOpenAIJudge failed after retries: {last_err}")
+                ),
+                provider="azure_openai",
+                policy=RetryPolicy(max_attempts=retries),
+            )
+            return resp.choices[0].message.content or ""
+        except Exception as e:
+            raise RuntimeError(f"AzureOpenAIJudge failed after retries: {e}") from e
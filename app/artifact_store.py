@@ -0,0 +1,288 @@
+"""
+Content-addressed artifact store.
+
+Large text artifacts (prompt packets, retrieved sources) repeat the same
+instruction block, KPI summary and retrieved documents across thousands of
+runs, but never byte for byte: every prompt packet also carries the date and
+the user's question. So the store deduplicates sections, not whole files.
+
+Text is split into paragraphs (at blank lines). A paragraph of at least
+`chunk_min_bytes` is a chunk, stored once under its SHA-256 (zstd-compressed
+when `zstandard` is installed, gzip otherwise); everything else stays inline.
+The run artifact holds a reference document listing the parts in order:
+
+    fulcrum-cas-ref/v2
+    {"size": 48211, "parts": ["You are ...\\nCurrent Date: ...\\n\\n",
+                              {"sha256": "...", "codec": "zstd", "size": 1830}, ...]}
+
+A chunk is only written once it has been seen twice (in this process) or is
+already on disk, so text that never repeats, like an LLM response, is logged
+as plain text with no reference and no blob.
+
+Readers call `resolve()` on artifact content; non-reference content is
+returned unchanged, so runs logged before the store existed keep working.
+Whole-blob references (v1) written by earlier versions still resolve.
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, List, Optional, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+REF_MAGIC = "fulcrum-cas-ref/v2\n"
+REF_MAGIC_V1 = "fulcrum-cas-ref/v1\n"
+
+_EXTENSIONS = {"zstd": ".zst", "gzip": ".gz"}
+# Paragraph boundaries; the blank lines stay with the paragraph before them
+_PARAGRAPH_RE = re.compile(r".*?(?:\n[ \t]*\n+|\Z)", re.S)
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+_MAX_SEEN = 65536
+_SKIP_BYTES = 64 * 1024
+
+
+def is_ref(content: Optional[str]) -> bool:
+    return bool(content) and content.startswith((REF_MAGIC, REF_MAGIC_V1))
+
+
+def default_cas_dir(tracking_uri: str) -> Optional[str]:
+    """Blob directory next to a file: tracking store (mlruns -> mlruns-cas)."""
+    if not tracking_uri.startswith("file:"):
+        return None
+    path = tracking_uri.replace("file:", "").rstrip("/\\")
+    return path + "-cas"
+
+
+def parse_ref(content: Union[str, bytes]) -> Optional[Dict[str, Any]]:
+    """
+    The reference document in artifact content, normalized to the v2 shape
+    ({"size", "parts"}), or None for plain content.
+
+    Reference documents can be written by API clients, so every chunk's hash
+    and codec are validated here; a malformed reference raises ValueError.
+    """
+    if isinstance(content, bytes):
+        if not content.startswith((REF_MAGIC.encode(), REF_MAGIC_V1.encode())):
+            return None
+        content = content.decode("utf-8")
+    if not is_ref(content):
+        return None
+    doc = json.loads(content[len(REF_MAGIC):])
+    if content.startswith(REF_MAGIC_V1) and isinstance(doc, dict):
+        doc = {"size": doc.get("size"), "parts": [{**doc, "codec": doc.get("codec", "gzip")}]}
+    if not isinstance(doc, dict) or not isinstance(doc.get("size"), int) or not isinstance(doc.get("parts"), list):
+        raise ValueError("Invalid CAS reference document")
+    for part in doc["parts"]:
+        if isinstance(part, str):
+            continue
+        if (
+            not isinstance(part, dict)
+            or not isinstance(part.get("sha256"), str) or not _SHA256_RE.match(part["sha256"])
+            or part.setdefault("codec", "gzip") not in _EXTENSIONS
+            or not isinstance(part.get("size"), int)
+        ):
+            raise ValueError(f"Invalid CAS reference part: {part!r}")
+    return doc
+
+
+class ArtifactStore:
+    """Stores each distinct chunk once, keyed by SHA-256, compressed on disk."""
+
+    def __init__(self, root: Optional[str], min_bytes: int = 1024, level: int = 3, chunk_min_bytes: int = 256):
+        self.root = root
+        self.min_bytes = min_bytes
+        self.level = level
+        self.chunk_min_bytes = chunk_min_bytes
+        self.codec = "zstd" if zstandard is not None else "gzip"
+        self._seen: "OrderedDict[str, None]" = OrderedDict()  # chunk hashes seen once, not yet stored
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.root)
+
+    def _blob_path(self, sha256: str, codec: str) -> str:
+        if not _SHA256_RE.match(sha256) or codec not in _EXTENSIONS:
+            raise ValueError(f"Invalid CAS blob reference: {sha256!r} ({codec!r})")
+        path = os.path.join(self.root, sha256[:2], sha256[2:4], sha256 + _EXTENSIONS[codec])
+        if not os.path.realpath(path).startswith(os.path.realpath(self.root) + os.sep):
+            raise ValueError(f"CAS blob path escapes the store: {sha256!r}")
+        return path
+
+    # ------------------------------------------------------------------
+    # Write
+    # ------------------------------------------------------------------
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    def put(self, data: bytes) -> Dict[str, Any]:
+        """Store `data` (no-op if already present) and return its reference."""
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(sha256, self.codec)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename so readers never see a partial blob
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(self._compress(data))
+                os.replace(tmp, path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+        return {"sha256": sha256, "codec": self.codec, "size": len(data)}
+
+    def _chunk_ref(self, data: bytes) -> Optional[Dict[str, Any]]:
+        """Reference for a repeated chunk, or None to keep it inline (first sighting)."""
+        sha256 = hashlib.sha256(data).hexdigest()
+        if os.path.exists(self._blob_path(sha256, self.codec)):
+            return {"sha256": sha256, "codec": self.codec, "size": len(data)}
+        with self._lock:
+            if sha256 not in self._seen:
+                self._seen[sha256] = None
+                while len(self._seen) > _MAX_SEEN:
+                    self._seen.popitem(last=False)
+                return None
+            del self._seen[sha256]
+        return self.put(data)
+
+    def encode(self, text: str) -> str:
+        """
+        Content to write into the run artifact: a reference when some of its
+        paragraphs are stored chunks, the text itself otherwise (store
+        disabled, small text, or nothing repeated yet).
+        """
+        data = text.encode("utf-8")
+        if not self.enabled or len(data) < self.min_bytes:
+            return text
+
+        parts: List[Union[str, Dict[str, Any]]] = []
+        for paragraph in _PARAGRAPH_RE.findall(text):
+            if not paragraph:
+                continue
+            chunk = paragraph.encode("utf-8")
+            ref = self._chunk_ref(chunk) if len(chunk) >= self.chunk_min_bytes else None
+            if ref is not None:
+                parts.append(ref)
+            elif parts and isinstance(parts[-1], str):
+                parts[-1] += paragraph
+            else:
+                parts.append(paragraph)
+        if all(isinstance(p, str) for p in parts):
+            return text
+        return REF_MAGIC + json.dumps({"size": len(data), "parts": parts})
+
+    # ------------------------------------------------------------------
+    # Read
+    # ------------------------------------------------------------------
+    def get(self, sha256: str, codec: str) -> bytes:
+        with open(self._blob_path(sha256, codec), "rb") as f:
+            raw = f.read()
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("Artifact blob is zstd-compressed but 'zstandard' is not installed")
+            return zstandard.ZstdDecompressor().decompress(raw)
+        return gzip.decompress(raw)
+
+    def open(self, sha256: str, codec: str) -> BinaryIO:
+        """Blob as a decompressing binary stream, for reads that should not hold it in memory."""
+        if not self.root:
+            raise RuntimeError("Artifact is a content-addressed reference but no ARTIFACT_CAS_DIR is configured")
+        path = self._blob_path(sha256, codec)
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("Artifact blob is zstd-compressed but 'zstandard' is not installed")
+            return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return gzip.open(path, "rb")
+
+    def open_ref(self, ref: Dict[str, Any]) -> "_PartsReader":
+        """A parsed reference (see `parse_ref`) as one binary stream over its parts."""
+        if not self.root:
+            raise RuntimeError("Artifact is a content-addressed reference but no ARTIFACT_CAS_DIR is configured")
+        return _PartsReader(self, ref["parts"])
+
+    def resolve(self, content: Optional[str]) -> Optional[str]:
+        """Dereference artifact content if it is a CAS reference."""
+        ref = parse_ref(content) if content else None
+        if ref is None:
+            return content
+        if not self.root:
+            raise RuntimeError("Artifact is a content-addressed reference but no ARTIFACT_CAS_DIR is configured")
+        return "".join(
+            p if isinstance(p, str) else self.get(p["sha256"], p.get("codec", "gzip")).decode("utf-8")
+            for p in ref["parts"]
+        )
+
+
+class _PartsReader(io.RawIOBase):
+    """Sequential reads over inline text and stored chunks; seeking forward skips whole parts."""
+
+    def __init__(self, store: ArtifactStore, parts: List[Union[str, Dict[str, Any]]]):
+        self._store = store
+        self._parts = list(parts)
+        self._current: Optional[BinaryIO] = None
+
+    def readable(self) -> bool:
+        return True
+
+    def _next(self) -> bool:
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+        if not self._parts:
+            return False
+        part = self._parts.pop(0)
+        if isinstance(part, str):
+            self._current = io.BytesIO(part.encode("utf-8"))
+        else:
+            self._current = self._store.open(part["sha256"], part.get("codec", "gzip"))
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence != io.SEEK_SET or self._current is not None:
+            raise io.UnsupportedOperation("only a single forward seek from the start")
+        remaining = offset
+        while self._parts:
+            part = self._parts[0]
+            size = len(part.encode("utf-8")) if isinstance(part, str) else part["size"]
+            if size > remaining:
+                break
+            remaining -= size
+            self._parts.pop(0)
+        if remaining and self._next():
+            while remaining:  # skip into the part a bounded read at a time
+                skipped = self._current.read(min(remaining, _SKIP_BYTES))
+                if not skipped:
+                    break
+                remaining -= len(skipped)
+        return offset
+
+    def read(self, size: int = -1) -> bytes:
+        while True:
+            if self._current is None and not self._next():
+                return b""
+            data = self._current.read(size)
+            if data:
+                return data
+            self._current.close()
+            self._current = None
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+        super().close()
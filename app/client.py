@@ -1,4 +1,5 @@
 import requests
+import threading
 import time
 import uuid
 import json
@@ -7,36 +8,180 @@ from datetime import datetime
 
 import os
 
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from telemetry_shipper import get_shipper
+except ImportError:
+    from app.telemetry_shipper import get_shipper
+
+# Connection pool / timeout tuning for calls to the Fulcrum backend
+_POOL_CONNECTIONS = int(os.getenv("FULCRUM_HTTP_POOL_CONNECTIONS", "4"))
+_POOL_MAXSIZE = int(os.getenv("FULCRUM_HTTP_POOL_MAXSIZE", "16"))
+_CONNECT_TIMEOUT_S = float(os.getenv("FULCRUM_HTTP_CONNECT_TIMEOUT", "3.05"))
+_READ_TIMEOUT_S = float(os.getenv("FULCRUM_HTTP_READ_TIMEOUT", "10"))
+_RETRIES = int(os.getenv("FULCRUM_HTTP_RETRIES", "2"))
+# Seconds a fetched prompt is used without asking the server; after that it is
+# revalidated with If-None-Match (a 304 costs no body). Pinned versions never expire.
+_PROMPT_CACHE_TTL_S = float(os.getenv("FULCRUM_PROMPT_CACHE_TTL", "60"))
+# Ship finished runs from a background thread (POST /runs/ingest) instead of inline
+_BACKGROUND = os.getenv("FULCRUM_TELEMETRY_BACKGROUND", "true").lower() == "true"
+
+_session_lock = threading.Lock()
+_shared_session: Optional[requests.Session] = None
+
+
+def _build_session() -> requests.Session:
+    """
+    Keep-alive session with a bounded connection pool.
+    Connection failures are retried for every method (nothing reached the
+    server); 502/503/504 only for idempotent ones, so POST /runs never
+    creates a duplicate run.
+    """
+    retry = Retry(
+        total=_RETRIES,
+        connect=_RETRIES,
+        read=0,
+        status=_RETRIES,
+        backoff_factor=0.2,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD", "PUT", "PATCH", "DELETE", "OPTIONS"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=_POOL_CONNECTIONS, pool_maxsize=_POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Process-wide session shared by every FulcrumClient (and so every RunContext)."""
+    global _shared_session
+    with _session_lock:
+        if _shared_session is None:
+            _shared_session = _build_session()
+        return _shared_session
+
+
+class _PromptCache:
+    """
+    Process-wide prompt cache shared by every FulcrumClient.
+    - prompts: (api_url, slug) -> (etag, prompt_data, fetched_at), refreshed after the TTL
+    - pinned: (api_url, slug, version) -> template; versions are immutable, so kept forever
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prompts: Dict[tuple, tuple] = {}
+        self._pinned: Dict[tuple, str] = {}
+
+    def get(self, key: tuple):
+        with self._lock:
+            return self._prompts.get(key)
+
+    def put(self, key: tuple, etag: Optional[str], data: Dict[str, Any]):
+        with self._lock:
+            self._prompts[key] = (etag, data, time.monotonic())
+
+    def touch(self, key: tuple):
+        with self._lock:
+            etag, data, _ = self._prompts[key]
+            self._prompts[key] = (etag, data, time.monotonic())
+
+    def get_pinned(self, key: tuple) -> Optional[str]:
+        with self._lock:
+            return self._pinned.get(key)
+
+    def pin(self, key: tuple, template: str):
+        with self._lock:
+            self._pinned[key] = template
+
+
+_prompt_cache = _PromptCache()
+
+
 class FulcrumClient:
-    def __init__(self, api_url: str = "http://localhost:8000", api_key: str = None):
+    def __init__(self, api_url: str = "http://localhost:8000", api_key: str = None, session: requests.Session = None, background: bool = None):
         self.api_url = api_url.rstrip("/")
         self.api_key = api_key or os.getenv("FULCRUM_API_KEY")
         self.headers = {}
         if self.api_key:
             self.headers["Authorization"] = f"Bearer {self.api_key}"
-            
+        # Clients are cheap to create per query; the pooled connections live in the session
+        self.session = session or get_session()
+        self.timeout = (_CONNECT_TIMEOUT_S, _READ_TIMEOUT_S)
+        self.background = _BACKGROUND if background is None else background
+        self._shipper = None
+
+    @property
+    def shipper(self):
+        if self._shipper is None:
+            self._shipper = get_shipper(self.api_url, self._ingest)
+        return self._shipper
+
+    def _ingest(self, records: list):
+        """Bulk upload of finished runs; runs on the shipper thread."""
+        resp = self.request("POST", "/runs/ingest", json={"runs": records})
+        resp.raise_for_status()
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Call the backend over the pooled session with the client's auth header and timeouts."""
+        kwargs.setdefault("headers", self.headers)
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, f"{self.api_url}{path}", **kwargs)
+
+    def _fetch_prompt(self, slug: str) -> Dict[str, Any]:
+        """
+        Prompt data from the cache; past the TTL it is revalidated with the
+        server's ETag. If revalidation fails the stale copy is served.
+        """
+        key = (self.api_url, slug)
+        cached = _prompt_cache.get(key)
+        if cached and time.monotonic() - cached[2] < _PROMPT_CACHE_TTL_S:
+            return cached[1]
+
+        headers = dict(self.headers)
+        if cached and cached[0]:
+            headers["If-None-Match"] = cached[0]
+        try:
+            resp = self.request("GET", f"/prompts/{slug}", headers=headers)
+            if resp.status_code == 304 and cached:
+                _prompt_cache.touch(key)
+                return cached[1]
+            resp.raise_for_status()
+        except Exception as e:
+            if cached:
+                print(f"Prompt '{slug}' revalidation failed, using cached copy: {e}")
+                return cached[1]
+            raise
+
+        prompt_data = resp.json()
+        _prompt_cache.put(key, resp.headers.get("ETag"), prompt_data)
+        return prompt_data
+
     def get_prompt(self, slug: str, version: str = None, variables: Dict[str, Any] = None) -> str:
         """
         Fetches a prompt template by slug and optionally version.
         If variables are provided, renders the prompt server-side.
+        Fetches are cached (see _fetch_prompt); pinned versions are served locally forever.
         """
         try:
-            # 1. Fetch Prompt Data
-            url = f"{self.api_url}/prompts/{slug}"
-            resp = requests.get(url, headers=self.headers)
-            resp.raise_for_status()
-            prompt_data = resp.json()
-            
-            # 2. Determine Version to use
-            template = ""
+            # 1-2. Resolve the template: pinned versions are immutable and
+            # served from memory; "latest" goes through the revalidating cache
             if version:
-                # Find specific version
-                found = next((v for v in prompt_data["versions"] if v["version"] == version), None)
-                if not found:
-                    raise ValueError(f"Version {version} not found for prompt {slug}")
-                template = found["template"]
+                pinned_key = (self.api_url, slug, version)
+                template = _prompt_cache.get_pinned(pinned_key)
+                if template is None:
+                    prompt_data = self._fetch_prompt(slug)
+                    found = next((v for v in prompt_data["versions"] if v["version"] == version), None)
+                    if not found:
+                        raise ValueError(f"Version {version} not found for prompt {slug}")
+                    template = found["template"]
+                    _prompt_cache.pin(pinned_key, template)
             else:
-                # Use latest
+                prompt_data = self._fetch_prompt(slug)
                 if not prompt_data.get("latest_version"):
                      raise ValueError(f"No versions found for prompt {slug}")
                 template = prompt_data["latest_version"]["template"]
@@ -70,6 +215,19 @@ class FulcrumClient:
         return RunContext(self, user_id, session_id, model, run_name, params, tags)
 
 class RunContext:
+    """
+    A client-side run. Inputs, outputs, metrics and artifacts are buffered
+    locally.
+
+    In background mode (the default, FULCRUM_TELEMETRY_BACKGROUND) nothing is
+    sent inline: on exit the whole run is handed to the client's shipper,
+    which posts it to /runs/ingest from its own thread (spooling to disk while
+    the backend is unreachable). `run_id` stays None; `client_run_id`
+    identifies the run and is stored as a tag on it.
+
+    Otherwise the run is created on enter and everything is sent in one
+    POST /runs/{id}/batch on exit.
+    """
     def __init__(self, client: FulcrumClient, user_id: str, session_id: str, model: str, run_name: str = None, params: Dict[str, Any] = None, tags: Dict[str, str] = None):
         self.client = client
         self.user_id = user_id
@@ -81,10 +239,20 @@ class RunContext:
             self.tags["run_name"] = run_name
             
         self.run_id = None
+        self.client_run_id = uuid.uuid4().hex
         self.start_time = None
+        self._active = False
+
+        # Buffered until __exit__
+        self._metrics: Dict[str, float] = {}
+        self._artifacts: Dict[str, Dict[str, str]] = {}
+        self._output: Optional[str] = None
         
     def __enter__(self):
         self.start_time = time.time()
+        if self.client.background:
+            self._active = True
+            return self
         try:
             payload = {
                 "user_id": self.user_id,
@@ -93,9 +261,10 @@ class RunContext:
                 "params": self.params,
                 "tags": self.tags
             }
-            resp = requests.post(f"{self.client.api_url}/runs", json=payload, headers=self.client.headers)
+            resp = self.client.request("POST", "/runs", json=payload)
             resp.raise_for_status()
             self.run_id = resp.json()
+            self._active = True
             return self
         except Exception as e:
             print(f"Failed to start run: {e}")
@@ -104,10 +273,9 @@ class RunContext:
             return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if not self.run_id:
+        if not self._active:
             return
             
-        end_time = True
         status = "success"
         error_msg = None
         
@@ -115,70 +283,54 @@ class RunContext:
             status = "failed"
             error_msg = str(exc_val)
             
-        latency_ms = (time.time() - self.start_time) * 1000
-        
+        end = time.time()
+        self._metrics["latency_ms"] = (end - self.start_time) * 1000
+        payload = {
+            "status": status,
+            "end_time": True,
+            "metrics": self._metrics,
+            "output": self._output,
+            "error": error_msg,
+            "artifacts": list(self._artifacts.values()),
+        }
+
+        if self.client.background:
+            payload.update({
+                "client_run_id": self.client_run_id,
+                "user_id": self.user_id,
+                "session_id": self.session_id,
+                "model": self.model,
+                "params": self.params,
+                "tags": self.tags,
+                "start_time_ms": int(self.start_time * 1000),
+                "end_time_ms": int(end * 1000),
+            })
+            self.client.shipper.submit(payload)
+            return
+
         try:
-            payload = {
-                "status": status,
-                "end_time": end_time,
-                "metrics": {"latency_ms": latency_ms},
-                "error": error_msg
-            }
-            requests.patch(f"{self.client.api_url}/runs/{self.run_id}", json=payload, headers=self.client.headers)
+            resp = self.client.request("POST", f"/runs/{self.run_id}/batch", json=payload)
+            resp.raise_for_status()
         except Exception as e:
             print(f"Failed to end run: {e}")
 
     def log_input(self, prompt: str, user_question: str = None):
-        if not self.run_id: return
-        try:
-            # Log as artifacts
-            requests.post(f"{self.client.api_url}/runs/{self.run_id}/artifact", json={
-                "name": "prompt_packet.txt",
-                "content": prompt,
-                "type": "text"
-            }, headers=self.client.headers)
-            if user_question:
-                 requests.post(f"{self.client.api_url}/runs/{self.run_id}/artifact", json={
-                    "name": "user_question.txt",
-                    "content": user_question,
-                    "type": "text"
-                }, headers=self.client.headers)
-        except Exception as e:
-            print(f"Failed to log input: {e}")
+        if not self._active: return
+        self.log_artifact("prompt_packet.txt", prompt)
+        if user_question:
+            self.log_artifact("user_question.txt", user_question)
 
     def log_output(self, response: str, parsed_json: Dict = None):
-        if not self.run_id: return
-        try:
-            # Log response text
-            requests.patch(f"{self.client.api_url}/runs/{self.run_id}", json={
-                "output": response
-            }, headers=self.client.headers)
-            
-            if parsed_json:
-                 requests.post(f"{self.client.api_url}/runs/{self.run_id}/artifact", json={
-                    "name": "parsed_forecast.json",
-                    "content": json.dumps(parsed_json, indent=2),
-                    "type": "json"
-                }, headers=self.client.headers)
-        except Exception as e:
-            print(f"Failed to log output: {e}")
+        if not self._active: return
+        self._output = response
+        if parsed_json:
+            self.log_artifact("parsed_forecast.json", json.dumps(parsed_json, indent=2), type="json")
             
     def log_metric(self, key: str, value: float):
-        if not self.run_id: return
-        try:
-            requests.patch(f"{self.client.api_url}/runs/{self.run_id}", json={
-                "metrics": {key: value}
-            }, headers=self.client.headers)
-        except Exception as e:
-            print(f"Failed to log metric: {e}")
+        if not self._active: return
+        self._metrics[key] = value
             
     def log_artifact(self, name: str, content: str, type: str = "text"):
-        if not self.run_id: return
-        try:
-             requests.post(f"{self.client.api_url}/runs/{self.run_id}/artifact", json={
-                "name": name,
-                "content": content,
-                "type": type
-            }, headers=self.client.headers)
-        except Exception as e:
-            print(f"Failed to log artifact: {e}")
+        if not self._active: return
+        # Last write per name wins, as it would on the server
+        self._artifacts[name] = {"name": name, "content": content, "type": type}
@@ -0,0 +1,101 @@
+"""
+End-to-end request deadlines.
+
+A Deadline is created once per request (e.g. /chat) and travels with it on
+PipelineContext. Each step asks it for a budget instead of using a fixed
+timeout, so the whole request is bounded by one number:
+
+1. `budget(cap)` - seconds a step may use: min(cap, time remaining)
+2. `call(step, fn, cap)` - run a blocking call that has no timeout of its own
+   (guardrails validators) and stop waiting for it when the budget runs out
+3. `cut(step, reason)` - record that a step was skipped or degraded, so the
+   run shows which parts of the answer were cut for time
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a step has no time left, or overran its budget."""
+
+    def __init__(self, step: str, budget_s: float):
+        self.step = step
+        self.budget_s = budget_s
+        super().__init__(f"Deadline exceeded in '{step}' (budget {budget_s:.2f}s)")
+
+
+# Calls abandoned after their budget keep running here until they return on
+# their own; Python threads cannot be interrupted. Sized to absorb a few
+# stuck validators without starving new requests.
+_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DEADLINE_POOL_WORKERS", "16")),
+    thread_name_prefix="deadline",
+)
+
+
+class Deadline:
+    def __init__(self, seconds: float):
+        self.total_s = seconds
+        self.expires_at = time.monotonic() + seconds
+        self._lock = threading.Lock()
+        self._cuts: List[Dict[str, str]] = []
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def can_afford(self, seconds: float) -> bool:
+        """True if at least `seconds` remain; optional steps check this before starting."""
+        return self.remaining() >= seconds
+
+    def budget(self, cap: Optional[float] = None) -> float:
+        """Seconds available to the next step, capped at `cap`."""
+        remaining = self.remaining()
+        return remaining if cap is None else min(cap, remaining)
+
+    def call(self, step: str, fn: Callable[[], Any], cap: Optional[float] = None) -> Any:
+        """Run `fn` and wait at most `budget(cap)` seconds for it."""
+        return call_with_timeout(step, fn, self.budget(cap))
+
+    def cut(self, step: str, reason: str):
+        with self._lock:
+            self._cuts.append({"step": step, "reason": reason})
+
+    @property
+    def cuts(self) -> List[Dict[str, str]]:
+        with self._lock:
+            return list(self._cuts)
+
+    @property
+    def cut_steps(self) -> List[str]:
+        return [c["step"] for c in self.cuts]
+
+
+def call_with_timeout(step: str, fn: Callable[[], Any], timeout: float) -> Any:
+    """Run blocking `fn` on the deadline pool and stop waiting after `timeout` seconds."""
+    if timeout <= 0:
+        raise DeadlineExceeded(step, 0.0)
+    future = _pool.submit(fn)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        future.cancel()
+        raise DeadlineExceeded(step, timeout) from None
+
+
+def call_with_deadline(deadline: Optional[Deadline], step: str, fn: Callable[[], Any], cap: Optional[float] = None) -> Any:
+    """
+    Bound `fn` by the request deadline (and `cap`). Without a deadline only
+    `cap` applies; with neither, `fn` is called inline.
+    """
+    budget = deadline.budget(cap) if deadline is not None else cap
+    if budget is None:
+        return fn()
+    return call_with_timeout(step, fn, budget)
@@ -1,4 +1,5 @@
 import os
+import re
 import json
 import time
 import mlflow
@@ -40,30 +41,176 @@ try:
 except ImportError:
     from app.services.confidence import compute_confidence
 
+# Retry / circuit breaker for provider calls
+try:
+    from resilience import call_with_resilience
+except ImportError:
+    from app.resilience import call_with_resilience
+
+# Live Prometheus metrics
+try:
+    import prom_metrics
+except ImportError:
+    from app import prom_metrics
+
+# End-to-end request deadlines
+try:
+    from deadline import DeadlineExceeded, call_with_deadline
+except ImportError:
+    from app.deadline import DeadlineExceeded, call_with_deadline
+
+# Per-request timeout (seconds). Retries are handled by the resilience layer,
+# so the SDK's own retry loop is disabled to avoid multiplying attempts.
+_LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+
+# Provider endpoints. LLM_BASE_URL points every provider at one
+# OpenAI-compatible server (e.g. mock_llm_server.py for offline benchmarks).
+_LLM_BASE_URL = os.getenv("LLM_BASE_URL")
+_XAI_BASE_URL = os.getenv("XAI_BASE_URL") or _LLM_BASE_URL or "https://api.x.ai/v1"
+_TOGETHER_BASE_URL = os.getenv("TOGETHER_BASE_URL") or _LLM_BASE_URL or "https://api.together.xyz/v1"
+
+# Model cascade: answer with a fast/cheap model first and only re-ask the
+# requested (stronger) model when the fast answer scores below the threshold.
+_CASCADE_ENABLED = os.getenv("LLM_CASCADE_ENABLED", "false").lower() == "true"
+_CASCADE_FAST_MODEL = os.getenv("LLM_CASCADE_FAST_MODEL", "grok-4-fast")
+_CASCADE_THRESHOLD = float(os.getenv("LLM_CASCADE_THRESHOLD", "0.5"))
+
+# Deadline budgets (seconds). Guardrails calls are capped even without a
+# request deadline; output guardrails and cascade escalation are skipped
+# when less than their minimum remains.
+_GUARDRAILS_TIMEOUT_S = float(os.getenv("GUARDRAILS_TIMEOUT_SECONDS", "10"))
+_OUTPUT_GUARDRAILS_MIN_S = float(os.getenv("DEADLINE_OUTPUT_GUARDRAILS_MIN_SECONDS", "1"))
+_ESCALATION_MIN_S = float(os.getenv("DEADLINE_ESCALATION_MIN_SECONDS", "5"))
+
+_SYSTEM_PROMPT = "You are a helpful sales forecasting assistant."
+_FORECAST_JSON_RE = re.compile(r"```json\s*([\s\S]*?)\s*```")
+# Questions the prompt packet requires a ```json forecast block for
+# ("a numerical forecast (revenue, sales, growth)", see prompt_builder)
+_FORECAST_QUESTION_RE = re.compile(r"\b(forecast\w*|predict\w*|project(?:ed|ion)s?|revenue|sales|growth|how much)\b", re.I)
+
 
 class ContentGenerator:
     def __init__(self):
+        # A local stand-in server does not check keys
+        placeholder_key = "mock-key" if _LLM_BASE_URL else None
+
         # xAI Client
-        xai_key = os.getenv("OPENAI_API_KEY")
+        xai_key = os.getenv("OPENAI_API_KEY") or placeholder_key
         if not xai_key:
             print("WARNING: OPENAI_API_KEY not found in environment.")
             self.xai_client = None
         else:
             self.xai_client = OpenAI(
                 api_key=xai_key,
-                base_url="https://api.x.ai/v1"
+                base_url=_XAI_BASE_URL,
+                timeout=_LLM_TIMEOUT_S,
+                max_retries=0,
             )
 
         # Together.AI Client
-        together_key = os.getenv("TOGETHER_API_KEY")
+        together_key = os.getenv("TOGETHER_API_KEY") or placeholder_key
         if not together_key:
             print("WARNING: TOGETHER_API_KEY not found in environment.")
             self.together_client = None
         else:
             self.together_client = OpenAI(
                 api_key=together_key,
-                base_url="https://api.together.xyz/v1"
+                base_url=_TOGETHER_BASE_URL,
+                timeout=_LLM_TIMEOUT_S,
+                max_retries=0,
+            )
+
+    def _client_for(self, model: str):
+        """Return (provider, client) for a model name; client is None if not configured."""
+        if "grok" in model.lower():
+            return "xai", self.xai_client
+        return "together", self.together_client
+
+    def _call_llm(self, model: str, packet: str, span, deadline=None) -> str:
+        """
+        Single chat completion through the resilience layer, annotated on `span`.
+        Each attempt's timeout is the smaller of LLM_TIMEOUT_SECONDS and the time left on `deadline`.
+        """
+        provider, client = self._client_for(model)
+        if not client:
+            raise RuntimeError(f"No API client configured for provider '{provider}' (model {model})")
+
+        def attempt_timeout() -> float:
+            if deadline is None:
+                return _LLM_TIMEOUT_S
+            budget = deadline.budget(_LLM_TIMEOUT_S)
+            if budget <= 0:
+                raise DeadlineExceeded(span.name, 0.0)
+            return budget
+
+        retries = []
+
+        def on_retry(attempt, exc, delay):
+            retries.append({"attempt": attempt, "error": type(exc).__name__, "delay_s": round(delay, 3)})
+            prom_metrics.PROVIDER_ERRORS.labels(provider, type(exc).__name__).inc()
+
+        try:
+            response = call_with_resilience(
+                lambda: client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": _SYSTEM_PROMPT},
+                        {"role": "user", "content": packet}
+                    ],
+                    temperature=0.7,
+                    timeout=attempt_timeout(),
+                ),
+                provider=provider,
+                on_retry=on_retry,
+                deadline=deadline,
             )
+        except Exception as e:
+            prom_metrics.PROVIDER_ERRORS.labels(provider, type(e).__name__).inc()
+            prom_metrics.LLM_REQUESTS.labels(provider, model, "error").inc()
+            raise
+        prom_metrics.LLM_REQUESTS.labels(provider, model, "success").inc()
+        span.add_metadata("model", model)
+        span.add_metadata("provider", provider)
+        if retries:
+            span.add_metadata("retries", retries)
+        span.add_metadata("attempts", len(retries) + 1)
+        return response.choices[0].message.content or ""
+
+    @staticmethod
+    def _parse_forecast(content: str):
+        """
+        Extract the ```json forecast block.
+        Returns (parsed_or_None, block_present).
+        """
+        match = _FORECAST_JSON_RE.search(content)
+        if not match:
+            return None, False
+        try:
+            return json.loads(match.group(1)), True
+        except Exception:
+            return None, True
+
+    @staticmethod
+    def _log_deadline(deadline):
+        """Record the request budget and any steps cut to meet it on the active run."""
+        if deadline is None:
+            return
+        obs.log_metric("deadline_budget_ms", round(deadline.total_s * 1000))
+        obs.log_metric("deadline_remaining_ms", round(deadline.remaining() * 1000))
+        cuts = deadline.cuts
+        obs.log_metric("deadline_cut_count", len(cuts))
+        if cuts:
+            obs.set_tag("deadline_cut_steps", ",".join(c["step"] for c in cuts))
+            obs.log_dict(cuts, "deadline_cuts.json")
+
+    def _cascade_tiers(self, model: str, cascade: bool) -> list:
+        """Ordered (tier, model) attempts for this request."""
+        if not cascade or model == _CASCADE_FAST_MODEL:
+            return [("single", model)]
+        _, fast_client = self._client_for(_CASCADE_FAST_MODEL)
+        if not fast_client:
+            return [("single", model)]
+        return [("fast", _CASCADE_FAST_MODEL), ("strong", model)]
 
     def generate_response(
         self,
@@ -75,20 +222,31 @@ class ContentGenerator:
         chunk_size: int = 500,
         session_id: str = None,
         user_id: str = None,
+        cascade: bool = None,
+        deadline=None,
     ) -> tuple[str, str, dict]:
         """
         Send the prompt packet to the LLM and log the full run using Observability Layer.
         Returns (response_text, run_id, guardrails_metadata).
+
+        With `cascade` (default: LLM_CASCADE_ENABLED) the fast model answers first
+        and `model` is only called when the fast answer's confidence is below
+        LLM_CASCADE_THRESHOLD or its forecast JSON fails to parse.
+
+        With a `deadline` (app.deadline.Deadline) every stage gets the time left:
+        escalation and output guardrails are skipped when it runs short, and the
+        cut steps are logged on the run (deadline_cut_steps tag, deadline_cuts.json).
         """
         # Determine client based on model name
-        if "grok" in model.lower():
-            client = self.xai_client
-            if not client:
+        provider, client = self._client_for(model)
+        if not client:
+            if provider == "xai":
                 return "Error: OPENAI_API_KEY not configured for xAI models.", None, {}
-        else:
-            client = self.together_client
-            if not client:
-                return "Error: TOGETHER_API_KEY not configured. Please add it to your .env file.", None, {}
+            return "Error: TOGETHER_API_KEY not configured. Please add it to your .env file.", None, {}
+
+        if cascade is None:
+            cascade = _CASCADE_ENABLED
+        tiers = self._cascade_tiers(model, cascade)
 
         # Initialize guardrails metadata
         guardrails_meta = {
@@ -135,7 +293,9 @@ class ContentGenerator:
                     try:
                         from guardrails_wrapper import validate_input
                         
-                        validation_result = validate_input(packet)
+                        validation_result = call_with_deadline(
+                            deadline, "guardrails_input", lambda: validate_input(packet), _GUARDRAILS_TIMEOUT_S
+                        )
                         
                         if validation_result.validated_text:
                                 validated_packet = validation_result.validated_text
@@ -163,6 +323,13 @@ class ContentGenerator:
                             guardrails_meta["source"] = "guardrails_ai"
                             span.set_status("OK")
                             
+                    except DeadlineExceeded as e:
+                        # Same fail-open behaviour as a validator error; /chat already ran the policy check
+                        span.set_status("TIMEOUT")
+                        guardrails_meta["input_status"] = "timeout"
+                        if deadline is not None:
+                            deadline.cut("guardrails_input", str(e))
+                        obs.log_text(str(e), "guardrail_error.txt")
                     except ImportError:
                         # Fallback span
                         span.add_metadata("fallback", "true")
@@ -175,27 +342,81 @@ class ContentGenerator:
                         span.set_status("ERROR")
                         obs.log_text(str(e), "guardrail_error.txt")
 
-                # --- LLM CALL (Span) ---
+                # --- LLM CALL(S) (Span per tier) ---
                 content = ""
-                with obs.start_span("llm_generation") as span:
-                    response = client.chat.completions.create(
-                        model=model,
-                        messages=[
-                            {"role": "system", "content": "You are a helpful sales forecasting assistant."},
-                            {"role": "user", "content": validated_packet}
-                        ],
-                        temperature=0.7
+                parse_success = 0
+                parsed = None
+                conf_result = None
+                answered_tier, answered_model = tiers[-1]
+                prompt_chars = 0
+                completion_chars = 0
+                # A forecast question needs a parseable JSON block, present or not
+                question = user_question or packet.rsplit("USER QUESTION:", 1)[-1]
+                forecast_expected = bool(_FORECAST_QUESTION_RE.search(question))
+
+                for idx, (tier, tier_model) in enumerate(tiers):
+                    span_name = "llm_generation" if tier == "single" else f"llm_generation_{tier}"
+                    if idx > 0 and content and deadline is not None and not deadline.can_afford(_ESCALATION_MIN_S):
+                        # Keep the cheaper answer rather than start a call that can't finish
+                        deadline.cut(span_name, f"{deadline.remaining():.2f}s left, escalation needs {_ESCALATION_MIN_S:.0f}s")
+                        answered_tier, answered_model = tiers[idx - 1]
+                        break
+                    tier_start = time.time()
+                    is_last = idx == len(tiers) - 1
+                    with obs.start_span(span_name) as span:
+                        try:
+                            content = self._call_llm(tier_model, validated_packet, span, deadline=deadline)
+                        except Exception as e:
+                            if is_last:
+                                raise
+                            # A failed cheap tier escalates instead of failing the request
+                            span.set_status("ERROR")
+                            obs.log_text(str(e), f"cascade/{tier}_error.txt")
+                            continue
+                    prompt_chars += len(packet)
+                    completion_chars += len(content)
+
+                    parsed, block_present = self._parse_forecast(content)
+                    parse_success = 1 if parsed is not None else 0
+                    conf_result = compute_confidence(
+                        response_text=content,
+                        retrieval_count=retrieval_count,
+                        parse_success=(parse_success == 1)
                     )
-                    content = response.choices[0].message.content
-                    span.add_metadata("model", model)
+
+                    if tier == "single":
+                        break
+
+                    # Log every cascade attempt on the same run
+                    obs.log_text(content, f"cascade/{tier}_response.txt")
+                    obs.log_metric(f"cascade_{tier}_latency_ms", int((time.time() - tier_start) * 1000))
+                    obs.log_metric(f"cascade_{tier}_confidence", conf_result["score"])
+
+                    needs_escalation = conf_result["score"] < _CASCADE_THRESHOLD or (
+                        (forecast_expected or block_present) and parsed is None
+                    )
+                    if is_last or not needs_escalation:
+                        answered_tier, answered_model = tier, tier_model
+                        break
+
+                if len(tiers) > 1:
+                    obs.log_param("cascade_fast_model", tiers[0][1])
+                    obs.log_param("cascade_threshold", _CASCADE_THRESHOLD)
+                    obs.log_metric("cascade_escalated", 1 if answered_tier == "strong" else 0)
+                obs.set_tag("cascade_tier", answered_tier)
+                obs.set_tag("answered_by_model", answered_model)
 
                 latency_ms = int((time.time() - start_time) * 1000)
 
                 # --- OUTPUT VALIDATION (Span) ---
                 with obs.start_span("guardrails_output") as span:
                     try:
+                        if deadline is not None and not deadline.can_afford(_OUTPUT_GUARDRAILS_MIN_S):
+                            raise DeadlineExceeded("guardrails_output", deadline.remaining())
                         from guardrails_wrapper import validate_output
-                        output_validation = validate_output(content)
+                        output_validation = call_with_deadline(
+                            deadline, "guardrails_output", lambda: validate_output(content), _GUARDRAILS_TIMEOUT_S
+                        )
                         
                         obs.log_metric("validation_output_passed", 1.0 if output_validation.passed else 0.0)
                         if output_validation.failures:
@@ -206,6 +427,12 @@ class ContentGenerator:
                         else:
                             guardrails_meta["output_status"] = "passed"
                             span.set_status("OK")
+                    except DeadlineExceeded as e:
+                        # Optional stage: answer without it
+                        span.set_status("SKIPPED")
+                        guardrails_meta["output_status"] = "skipped_deadline"
+                        if deadline is not None:
+                            deadline.cut("guardrails_output", str(e))
                     except Exception as e:
                         span.set_status("ERROR")
                         guardrails_meta["output_status"] = "error"
@@ -213,28 +440,13 @@ class ContentGenerator:
                 # Log response artifact
                 obs.log_text(content, "llm_response.txt")
 
-                # Attempt to parse forecast JSON
-                parse_success = 0
-                try:
-                    import re
-                    pattern = r"```json\s*([\s\S]*?)\s*```"
-                    match = re.search(pattern, content)
-                    if match:
-                        parsed = json.loads(match.group(1))
-                        obs.log_dict(parsed, "parsed_forecast.json")
-                        parse_success = 1
-                except Exception:
-                    pass
-
-                # Cost estimate
-                cost = 0.001 * (len(packet) + len(content)) / 1000
+                if parsed is not None:
+                    obs.log_dict(parsed, "parsed_forecast.json")
+
+                # Cost estimate (every cascade attempt is billed)
+                cost = 0.001 * (prompt_chars + completion_chars) / 1000
                 
-                # Compute Confidence with Components
-                conf_result = compute_confidence(
-                    response_text=content,
-                    retrieval_count=retrieval_count,
-                    parse_success=(parse_success == 1)
-                )
+                # Confidence with Components (computed for the answering tier)
                 confidence = conf_result["score"]
                 
                 # Log components artifact
@@ -251,6 +463,7 @@ class ContentGenerator:
                 obs.set_tag("confidence_label", conf_result["label"])
 
                 obs.set_tag("run_type", "live")
+                self._log_deadline(deadline)
 
                 return content, run_id, guardrails_meta
 
@@ -265,5 +478,9 @@ class ContentGenerator:
                 obs.log_metric("confidence", 0.0)
                 obs.set_tag("run_type", "live")
                 obs.set_tag("mlflow.runStatus", "FAILED")
+                obs.set_run_status("FAILED")
+                if isinstance(e, DeadlineExceeded):
+                    obs.set_tag("deadline_exceeded", "true")
+                self._log_deadline(deadline)
 
                 return f"Error calling API: {error_msg}", run_id, guardrails_meta
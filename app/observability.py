@@ -1,8 +1,27 @@
 import os
 import time
+import json
+import queue
+import atexit
+import logging
+import hashlib
+import threading
+import uuid
 import mlflow
 import contextlib
-from typing import Any, Dict, Optional, Generator
+from typing import Any, Callable, Dict, List, Optional, Generator
+from mlflow.entities import Metric, Param, Run, RunTag
+from mlflow.tracking import MlflowClient
+
+try:
+    from artifact_store import ArtifactStore, default_cas_dir
+except ImportError:
+    from app.artifact_store import ArtifactStore, default_cas_dir
+
+try:
+    import prom_metrics
+except ImportError:
+    from app import prom_metrics
 
 # ---------------------------------------------------------------------------
 # Setup MLflow URI
@@ -22,73 +41,424 @@ else:
 mlflow.set_tracking_uri(_TRACKING_URI)
 _EXPERIMENT_NAME = os.getenv("MLFLOW_EXPERIMENT_NAME", "sales-predictor-layer2")
 
+# Background writer tuning
+_QUEUE_MAXSIZE = int(os.getenv("OBS_QUEUE_MAXSIZE", "1000"))
+_DRAIN_TIMEOUT_S = float(os.getenv("OBS_DRAIN_TIMEOUT_SECONDS", "10"))
+
+TRACE_ARTIFACT = "trace.json"
+
+# Content-addressed blob store for large text artifacts
+_CAS_ENABLED = os.getenv("ARTIFACT_CAS_ENABLED", "true").lower() == "true"
+_CAS_DIR = os.getenv("ARTIFACT_CAS_DIR") or default_cas_dir(_TRACKING_URI)
+_CAS_MIN_BYTES = int(os.getenv("ARTIFACT_CAS_MIN_BYTES", "1024"))
+
+# Heavy-artifact sampling: full artifacts for a fraction of runs, and always
+# for failed / blocked / low-confidence / slow ones; hashes only for the rest
+_SAMPLE_RATE = float(os.getenv("OBS_ARTIFACT_SAMPLE_RATE", "1.0"))
+_SAMPLE_LOW_CONFIDENCE = float(os.getenv("OBS_SAMPLE_LOW_CONFIDENCE", "0.5"))
+_SAMPLE_SLOW_MS = float(os.getenv("OBS_SAMPLE_SLOW_MS", "10000"))
+_HEAVY_ARTIFACTS = {
+    a.strip() for a in
+    os.getenv("OBS_HEAVY_ARTIFACTS", "prompt_packet.txt,retrieved_sources.json,trace.json").split(",")
+    if a.strip()
+}
+
+# MLflow log_batch limits
+_MAX_METRICS_PER_BATCH = 1000
+_MAX_PARAMS_TAGS_PER_BATCH = 100
+
+logger = logging.getLogger(__name__)
+
+
+class _TelemetryWriter:
+    """
+    Single background thread that performs MLflow I/O off the request path.
+    Jobs run in submission order; a full queue degrades to a synchronous
+    write rather than dropping telemetry.
+    """
+    def __init__(self, maxsize: int = _QUEUE_MAXSIZE):
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="obs-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, fn: Callable, *args, **kwargs):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((fn, args, kwargs))
+        except queue.Full:
+            logger.warning("Observability queue full; writing synchronously")
+            self._run((fn, args, kwargs))
+        prom_metrics.QUEUE_DEPTH.labels("telemetry").set(self._queue.qsize())
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self, job):
+        fn, args, kwargs = job
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Observability write failed ({getattr(fn, '__name__', fn)}): {e}")
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(job)
+            finally:
+                self._queue.task_done()
+                prom_metrics.QUEUE_DEPTH.labels("telemetry").set(self._queue.qsize())
+
+    def drain(self, timeout: float = _DRAIN_TIMEOUT_S) -> bool:
+        """Block until all queued writes are done (or timeout). Returns True if drained."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+
+class _RunBuffer:
+    """Params, metrics, tags and finished spans collected for one run until it ends."""
+    def __init__(self, run_id: str, run_name: str = None):
+        self.run_id = run_id
+        self.params: Dict[str, str] = {}
+        self.tags: Dict[str, str] = {}
+        self.metrics: List[Metric] = []
+        self.status = "FINISHED"
+        # Tracing: the run itself is the root span
+        self.root = Span(run_name or "run")
+        self.span_stack: List["Span"] = [self.root]
+        self.spans: List[Dict[str, Any]] = []
+        self.started_at = time.time()
+        # Heavy artifacts held until the sampling decision at run end
+        self.deferred: Dict[str, str] = {}
+
+    def last_metric(self, key: str) -> Optional[float]:
+        for m in reversed(self.metrics):
+            if m.key == key:
+                return m.value
+        return None
+
+    def trace_document(self) -> Dict[str, Any]:
+        """One JSON document with every span of the run, offsets relative to the root."""
+        origin = self.root.start_ns
+        spans = [self.root.to_dict(origin)] + sorted(
+            ({**s, "start_offset_ms": (s["start_ns"] - origin) / 1e6} for s in self.spans),
+            key=lambda s: s["start_ns"],
+        )
+        return {
+            "version": 1,
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "duration_ms": self.root.duration_ms,
+            "spans": spans,
+        }
+
+
 class ObservabilityClient:
     """
     Wrapper around MLflow to provide a span-like interface and centralized logging.
+
+    Params, metrics and tags are buffered per run and flushed with a single
+    `log_batch` when the run ends; artifacts are uploaded by a background
+    writer thread. Nothing on the request path waits for telemetry I/O.
+    Spans form a tree under the run and are written as one trace.json.
+    Heavy artifacts (prompt packet, sources, trace) are subject to sampling.
     """
     def __init__(self):
         self.experiment_name = _EXPERIMENT_NAME
+        self._client = None
+        self._experiment_ids: Dict[str, str] = {}
+        self._local = threading.local()
+        self._writer = _TelemetryWriter()
+        self._run_listeners: List[Callable[[str], None]] = []
+        self.cas = ArtifactStore(_CAS_DIR if _CAS_ENABLED else None, min_bytes=_CAS_MIN_BYTES)
+        atexit.register(self.flush)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    @property
+    def client(self) -> MlflowClient:
+        if self._client is None:
+            self._client = MlflowClient(tracking_uri=_TRACKING_URI)
+        return self._client
+
+    def _stack(self) -> List[_RunBuffer]:
+        if not hasattr(self._local, "runs"):
+            self._local.runs = []
+        return self._local.runs
+
+    def _active(self) -> Optional[_RunBuffer]:
+        stack = self._stack()
+        return stack[-1] if stack else None
 
+    def _experiment_id(self, name: str = None) -> str:
+        name = name or self.experiment_name
+        if name not in self._experiment_ids:
+            exp = self.client.get_experiment_by_name(name)
+            self._experiment_ids[name] = exp.experiment_id if exp else self.client.create_experiment(name)
+        return self._experiment_ids[name]
+
+    def _sampling_decision(self, buf: _RunBuffer) -> str:
+        """
+        Why this run keeps its heavy artifacts, or "unsampled" if it does not.
+        Sampling is keyed on the run_id so the decision is reproducible.
+        """
+        if buf.status == "FAILED":
+            return "failed"
+        if buf.tags.get("guardrail_status") == "BLOCKED" or buf.tags.get("guardrails_status") == "blocked":
+            return "blocked"
+        confidence = buf.last_metric("confidence")
+        if confidence is not None and confidence < _SAMPLE_LOW_CONFIDENCE:
+            return "low_confidence"
+        latency = buf.last_metric("latency_ms")
+        if latency is None:
+            latency = buf.root.duration_ms
+        if latency >= _SAMPLE_SLOW_MS:
+            return "slow"
+        if int(hashlib.sha256(buf.run_id.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF < _SAMPLE_RATE:
+            return "sampled"
+        return "unsampled"
+
+    def _write_text(self, run_id: str, text: str, artifact_file: str):
+        """Runs on the writer thread: dedupe/compress through the CAS, then log."""
+        self.client.log_text(run_id, self.cas.encode(text), artifact_file)
+
+    def _flush_run(self, buf: _RunBuffer, end_time_ms: int):
+        """Runs on the writer thread: sampling, one log_batch (chunked to MLflow limits), then terminate."""
+        heavy = dict(buf.deferred)
+        trace = json.dumps(buf.trace_document(), default=str)
+        if TRACE_ARTIFACT in _HEAVY_ARTIFACTS:
+            heavy[TRACE_ARTIFACT] = trace
+
+        reason = self._sampling_decision(buf) if heavy else None
+        if reason:
+            keep = reason != "unsampled"
+            buf.tags["artifact_sampling"] = "full" if keep else "hashes_only"
+            buf.tags["artifact_sampling_reason"] = reason
+            buf.tags["artifact_sample_rate"] = str(_SAMPLE_RATE)
+            if not keep:
+                for name, text in heavy.items():
+                    data = text.encode("utf-8")
+                    buf.tags[f"artifact_sha256.{name}"] = hashlib.sha256(data).hexdigest()
+                    buf.tags[f"artifact_bytes.{name}"] = str(len(data))
+                heavy = {}
+
+        params = [Param(k, v) for k, v in buf.params.items()]
+        tags = [RunTag(k, v) for k, v in buf.tags.items()]
+        metrics = buf.metrics
+        while params or tags or metrics:
+            self.client.log_batch(
+                buf.run_id,
+                metrics=metrics[:_MAX_METRICS_PER_BATCH - 2 * _MAX_PARAMS_TAGS_PER_BATCH],
+                params=params[:_MAX_PARAMS_TAGS_PER_BATCH],
+                tags=tags[:_MAX_PARAMS_TAGS_PER_BATCH],
+            )
+            metrics = metrics[_MAX_METRICS_PER_BATCH - 2 * _MAX_PARAMS_TAGS_PER_BATCH:]
+            params = params[_MAX_PARAMS_TAGS_PER_BATCH:]
+            tags = tags[_MAX_PARAMS_TAGS_PER_BATCH:]
+        if TRACE_ARTIFACT not in _HEAVY_ARTIFACTS:
+            self.client.log_text(buf.run_id, trace, TRACE_ARTIFACT)
+        for name, text in heavy.items():
+            self._write_text(buf.run_id, text, name)
+        self.client.set_terminated(buf.run_id, status=buf.status, end_time=end_time_ms)
+        for listener in self._run_listeners:
+            try:
+                listener(buf.run_id)
+            except Exception as e:
+                logger.warning(f"Run listener failed for {buf.run_id}: {e}")
+
+    # ------------------------------------------------------------------
+    # Runs
+    # ------------------------------------------------------------------
     def set_experiment(self, name: str = None):
-        mlflow.set_experiment(name or self.experiment_name)
+        self.experiment_name = name or self.experiment_name
+        self._experiment_id(self.experiment_name)
 
     @contextlib.contextmanager
-    def start_run(self, run_name: str = None, nested: bool = False) -> Generator[mlflow.ActiveRun, None, None]:
-        """Context manager for an MLflow run."""
-        self.set_experiment()
-        with mlflow.start_run(run_name=run_name, nested=nested) as run:
+    def start_run(self, run_name: str = None, nested: bool = False) -> Generator[Run, None, None]:
+        """
+        Context manager for an MLflow run.
+        The run is created synchronously (callers need the run_id); everything
+        logged inside it is flushed in the background when the block exits.
+        """
+        parent = self._active()
+        tags = {"mlflow.parentRunId": parent.run_id} if (nested and parent) else None
+        run = self.client.create_run(self._experiment_id(), run_name=run_name, tags=tags)
+
+        buf = _RunBuffer(run.info.run_id, run_name)
+        self._stack().append(buf)
+        try:
             yield run
+        except BaseException:
+            buf.status = "FAILED"
+            raise
+        finally:
+            buf.root.finish("ERROR" if buf.status == "FAILED" else None)
+            self._stack().pop()
+            self._writer.submit(self._flush_run, buf, int(time.time() * 1000))
+
+    def add_run_listener(self, callback: Callable[[str], None]):
+        """Call `callback(run_id)` on the writer thread once a run is fully written."""
+        self._run_listeners.append(callback)
 
+    def set_run_status(self, status: str):
+        """Final MLflow status for the active run (FINISHED, FAILED, KILLED)."""
+        buf = self._active()
+        if buf:
+            buf.status = status
+
+    def flush(self, timeout: float = _DRAIN_TIMEOUT_S) -> bool:
+        """Wait for queued telemetry to be written (called automatically at exit)."""
+        return self._writer.drain(timeout)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._writer.depth
+
+    # ------------------------------------------------------------------
+    # Spans
+    # ------------------------------------------------------------------
     @contextlib.contextmanager
-    def start_span(self, name: str, parent_ctx: Any = None) -> Generator["Span", None, None]:
+    def start_span(self, name: str, parent_ctx: "Span" = None) -> Generator["Span", None, None]:
         """
-        Mimics a tracing span. In MLflow, we might map this to a nested run 
-        or just log timing metrics if nested runs are too heavy.
-        For now, let's use a simple timer and log a metric on exit.
+        Open a child span of the innermost open span (or of `parent_ctx`).
+        Finished spans are appended to the run's trace in memory and written
+        once, as trace.json, when the run ends. Span durations also feed the
+        Prometheus stage latency histogram.
         """
-        start_time = time.time()
-        span = Span(name)
+        buf = self._active()
+        if buf is None:
+            with prom_metrics.stage_timer(name):
+                yield Span(name)
+            return
+
+        parent = parent_ctx or buf.span_stack[-1]
+        span = Span(name, parent_id=parent.span_id)
+        buf.span_stack.append(span)
         try:
             yield span
+        except BaseException:
+            span.set_status("ERROR")
+            raise
         finally:
-            duration_ms = (time.time() - start_time) * 1000
-            mlflow.log_metric(f"{name}_duration_ms", duration_ms)
-            if span.status:
-                mlflow.set_tag(f"{name}.status", span.status)
-            if span.metadata:
-                mlflow.log_dict(span.metadata, f"{name}_metadata.json")
+            span.finish()
+            buf.span_stack.remove(span)
+            buf.spans.append(span.to_dict())
+            prom_metrics.observe_stage(name, span.duration_ms / 1000.0)
 
+    # ------------------------------------------------------------------
+    # Logging (buffered / queued)
+    # ------------------------------------------------------------------
     def log_event(self, name: str, payload: Dict[str, Any]):
         """Logs a significant event as a dictionary artifact."""
-        mlflow.log_dict(payload, f"event_{name}.json")
+        self.log_dict(payload, f"event_{name}.json")
 
     def log_metric(self, key: str, value: float):
-        mlflow.log_metric(key, value)
+        buf = self._active()
+        if buf is None:
+            mlflow.log_metric(key, value)
+            return
+        buf.metrics.append(Metric(key, float(value), int(time.time() * 1000), 0))
 
     def log_param(self, key: str, value: Any):
-        mlflow.log_param(key, value)
+        buf = self._active()
+        if buf is None:
+            mlflow.log_param(key, value)
+            return
+        buf.params[key] = str(value)
+
+    def set_tag(self, key: str, value: Any):
+        buf = self._active()
+        if buf is None:
+            mlflow.set_tag(key, value)
+            return
+        buf.tags[key] = str(value)
 
     def log_text(self, text: str, artifact_file: str):
-        mlflow.log_text(text, artifact_file)
-    
-    def log_dict(self, data: Dict, artifact_file: str):
-        mlflow.log_dict(data, artifact_file)
+        buf = self._active()
+        if buf is None:
+            mlflow.log_text(text, artifact_file)
+            return
+        if artifact_file in _HEAVY_ARTIFACTS:
+            # Subject to sampling; written (or hashed) when the run ends
+            buf.deferred[artifact_file] = text
+            return
+        self._writer.submit(self._write_text, buf.run_id, text, artifact_file)
 
-    def set_tag(self, key: str, value: Any):
-        mlflow.set_tag(key, value)
+    def log_dict(self, data: Dict, artifact_file: str):
+        buf = self._active()
+        if buf is None:
+            mlflow.log_dict(data, artifact_file)
+            return
+        if artifact_file.endswith(".json"):
+            # Serialize now so later mutation by the caller cannot leak in
+            self.log_text(json.dumps(data, indent=2), artifact_file)
+        else:
+            self._writer.submit(self.client.log_dict, buf.run_id, data, artifact_file)
 
 
 class Span:
-    def __init__(self, name: str):
+    """A timed unit of work inside a run. Timestamps come from perf_counter_ns."""
+    def __init__(self, name: str, parent_id: str = None):
         self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
         self.status = "OK"
-        self.metadata = {}
+        self.attributes: Dict[str, Any] = {}
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.attributes
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end_ns - self.start_ns) / 1e6
 
     def set_status(self, status: str):
         self.status = status
 
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
     def add_metadata(self, key: str, value: Any):
-        self.metadata[key] = value
+        self.set_attribute(key, value)
+
+    def finish(self, status: str = None):
+        if self.end_ns is None:
+            self.end_ns = time.perf_counter_ns()
+        if status:
+            self.status = status
+
+    def to_dict(self, origin_ns: int = None) -> Dict[str, Any]:
+        d = {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "status": self.status,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+        }
+        if origin_ns is not None:
+            d["start_offset_ms"] = (self.start_ns - origin_ns) / 1e6
+        return d
 
 # Global singleton
 obs = ObservabilityClient()
@@ -0,0 +1,18 @@
+from .interfaces import PipelineContext, PipelineStep, StepResult
+from .pipeline import Pipeline
+from .dag import DagPipeline, FunctionStep, ProcessStep, IO, CPU
+from .cache import StepCache, cache_key
+
+__all__ = [
+    "PipelineContext",
+    "PipelineStep",
+    "StepResult",
+    "Pipeline",
+    "DagPipeline",
+    "FunctionStep",
+    "ProcessStep",
+    "IO",
+    "CPU",
+    "StepCache",
+    "cache_key",
+]
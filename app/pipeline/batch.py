@@ -0,0 +1,260 @@
+"""
+Batch runner: push a JSONL file of questions through a DagPipeline.
+
+    python -m app.pipeline.batch questions.jsonl -o results.parquet --concurrency 16 --workers 8
+
+Each input line is a JSON object with at least "question" (a bare JSON
+string also works); optional "id", "model", "top_k", "cascade" and any
+other pipeline input keys override the CLI defaults. Items without an "id"
+are identified by their line number.
+
+Concurrency:
+- `concurrency` items are in flight at once (match it to the provider's
+  rate limit); blocking LLM calls run on a thread pool of the same size
+- CPU-heavy steps (retrieval) run on a process pool, one worker per core
+
+Every finished item is appended to a checkpoint JSONL (default
+<output>.checkpoint.jsonl) and flushed. Re-running the same command skips
+items already completed or blocked and retries the ones that errored. The
+final output (JSONL, or Parquet for a .parquet path) is in input order
+with per-step timings; the checkpoint is removed once every item succeeded.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .dag import DagPipeline
+from .interfaces import PipelineContext, StepResult
+
+logger = logging.getLogger(__name__)
+
+DONE_STATUSES = ("ok", "blocked")
+
+
+def read_items(path: str) -> List[Dict[str, Any]]:
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"question": item}
+            if not item.get("question"):
+                raise ValueError(f"{path}:{lineno}: missing 'question'")
+            item["id"] = str(item.get("id", lineno))
+            items.append(item)
+
+    seen = set()
+    for item in items:
+        if item["id"] in seen:
+            raise ValueError(f"{path}: duplicate id '{item['id']}'")
+        seen.add(item["id"])
+    return items
+
+
+def write_results(records: List[Dict[str, Any]], path: str):
+    """JSONL, or Parquet (nested fields flattened to dotted columns) for *.parquet."""
+    if path.endswith(".parquet"):
+        import pandas as pd
+
+        df = pd.json_normalize(records)
+        # Free-form nested values (forecast, errors) don't have a stable Parquet type
+        for col in df.columns:
+            if df[col].map(lambda v: isinstance(v, (list, dict))).any():
+                df[col] = df[col].map(lambda v: json.dumps(v, default=str) if isinstance(v, (list, dict)) else v)
+        df.to_parquet(path, index=False)
+        return
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, default=str) + "\n")
+    os.replace(tmp, path)
+
+
+class BatchRunner:
+    """
+    Runs items through `pipeline` with bounded concurrency and a resumable
+    checkpoint. `defaults` are merged under each item to form the pipeline input.
+    """
+    def __init__(
+        self,
+        pipeline: DagPipeline,
+        checkpoint_path: str,
+        concurrency: int = 8,
+        defaults: Optional[Dict[str, Any]] = None,
+    ):
+        self.pipeline = pipeline
+        self.checkpoint_path = checkpoint_path
+        self.concurrency = max(1, concurrency)
+        self.defaults = defaults or {}
+
+    def load_checkpoint(self) -> Dict[str, Dict[str, Any]]:
+        """Completed records by id (last write wins). A torn last line from a crash is ignored."""
+        done = {}
+        if not os.path.exists(self.checkpoint_path):
+            return done
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("status") in DONE_STATUSES:
+                    done[record["id"]] = record
+                else:
+                    done.pop(record.get("id"), None)
+        return done
+
+    def run(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return asyncio.run(self.arun(items))
+
+    async def arun(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        done = self.load_checkpoint()
+        pending = [item for item in items if item["id"] not in done]
+        if done:
+            logger.info(f"Resuming batch: {len(items) - len(pending)}/{len(items)} items already done")
+
+        # Blocking LLM calls are offloaded with asyncio.to_thread; size that pool to the concurrency
+        threads = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch-io")
+        asyncio.get_running_loop().set_default_executor(threads)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+        finished = 0
+
+        with open(self.checkpoint_path, "a", encoding="utf-8") as checkpoint:
+            async def process(item: Dict[str, Any]):
+                nonlocal finished
+                async with semaphore:
+                    record = await self._run_item(item)
+                # Single event loop thread: writes never interleave
+                checkpoint.write(json.dumps(record, default=str) + "\n")
+                checkpoint.flush()
+                done[item["id"]] = record
+                finished += 1
+                if finished % 10 == 0 or finished == len(pending):
+                    elapsed = time.perf_counter() - started
+                    logger.info(f"Batch progress: {finished}/{len(pending)} ({finished / elapsed:.2f} items/s)")
+
+            await asyncio.gather(*(process(item) for item in pending))
+
+        threads.shutdown(wait=False)
+        return [done[item["id"]] for item in items]
+
+    async def _run_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        request = {**self.defaults, **item}
+        ctx = PipelineContext(session_id=request.get("session_id"), user_id=request.get("user_id"))
+        start = time.perf_counter()
+        try:
+            result = await self.pipeline.arun(request, ctx)
+        except Exception as e:
+            logger.exception(f"Batch item {item['id']} crashed")
+            result = StepResult(output=None, success=False, errors=[str(e)])
+        total = time.perf_counter() - start
+
+        if result.success:
+            status = "ok"
+        elif result.metadata.get("blocked"):
+            status = "blocked"
+        else:
+            status = "error"
+
+        return {
+            "id": item["id"],
+            "question": item["question"],
+            "status": status,
+            "run_id": ctx.run_id,
+            "output": result.output if result.success else None,
+            "errors": result.errors,
+            "timings": {
+                r["step_name"]: round(r["duration_seconds"], 4)
+                for r in ctx.metadata.get("step_runs", [])
+                if "duration_seconds" in r
+            },
+            "critical_path": ctx.metadata.get("critical_path", []),
+            "total_seconds": round(total, 4),
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a JSONL of questions through the chat pipeline.")
+    parser.add_argument("input", help="JSONL file, one question per line")
+    parser.add_argument("-o", "--output", required=True, help="results path (.jsonl or .parquet)")
+    parser.add_argument("--checkpoint", help="checkpoint JSONL (default: <output>.checkpoint.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", "8")),
+                        help="items in flight; match the provider rate limit")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("BATCH_WORKERS", "0")) or os.cpu_count(),
+                        help="processes for CPU-heavy steps (default: one per core)")
+    parser.add_argument("--model", default="grok-4-fast")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--no-guardrails", action="store_true", help="skip the input policy check")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    try:
+        import ingest
+        import guardrails_wrapper
+        from llm import ContentGenerator
+        from prompt_builder import compute_kpi_summary
+    except ImportError:
+        from app import ingest, guardrails_wrapper
+        from app.llm import ContentGenerator
+        from app.prompt_builder import compute_kpi_summary
+    from .steps import build_batch_pipeline, init_retrieval_worker
+
+    items = read_items(args.input)
+    docs = ingest.load_unstructured_data()
+    kpi_summary = compute_kpi_summary(ingest.load_structured_data())
+
+    # spawn: the parent already runs telemetry threads, which fork doesn't copy safely
+    pool = ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_retrieval_worker,
+        initargs=(docs,),
+    )
+    content_gen = ContentGenerator()
+    pipeline = build_batch_pipeline(
+        content_gen,
+        pool,
+        kpi_summary=kpi_summary,
+        check_input=None if args.no_guardrails else guardrails_wrapper.check_input,
+    )
+    runner = BatchRunner(
+        pipeline,
+        checkpoint_path=args.checkpoint or f"{args.output}.checkpoint.jsonl",
+        concurrency=args.concurrency,
+        defaults={"model": args.model, "top_k": args.top_k},
+    )
+
+    try:
+        records = runner.run(items)
+    finally:
+        pool.shutdown()
+        try:
+            from observability import obs
+        except ImportError:
+            from app.observability import obs
+        obs.flush()
+
+    write_results(records, args.output)
+    counts = {s: sum(1 for r in records if r["status"] == s) for s in ("ok", "blocked", "error")}
+    logger.info(f"Wrote {len(records)} results to {args.output}: {counts}")
+    if counts["error"] == 0 and os.path.exists(runner.checkpoint_path):
+        os.remove(runner.checkpoint_path)
+    return 0 if counts["error"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,160 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from .interfaces import StepResult
+
+try:
+    import prom_metrics
+except ImportError:
+    from app import prom_metrics
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(step_name: str, *parts: Any, version: str = "1") -> str:
+    """
+    Stable key for a step invocation: step name, a version to bump when the
+    step's logic changes, and whatever input/config parts determine its output.
+    """
+    payload = json.dumps([step_name, version, parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class StepCache:
+    """
+    Bounded two-level memo for StepResults: an in-memory LRU in front of an
+    optional on-disk store (one pickle per key, least recently used pruned).
+
+    The disk entries are listed once at startup, ordered by mtime; after that
+    their use order is tracked in memory and disk hits touch the file's
+    mtime, so eviction stays close to LRU across restarts without listing
+    the directory on every write.
+
+    Steps opt in by defining `cache_key(ctx, input_data) -> Optional[str]`;
+    returning None skips the cache for that call. Only successful results
+    are stored.
+    """
+    def __init__(self, max_entries: int = 256, disk_dir: Optional[str] = None, max_disk_entries: int = 2048):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, StepResult]" = OrderedDict()
+        self._disk: "OrderedDict[str, None]" = OrderedDict()  # keys on disk, least recently used first
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "disk_hits": 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            entries = [e for e in os.scandir(disk_dir) if e.name.endswith(".pkl")]
+            entries.sort(key=lambda e: e.stat().st_mtime)
+            for e in entries:
+                self._disk[e.name[:-len(".pkl")]] = None
+            self._prune_disk()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def get(self, key: str) -> Optional[StepResult]:
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.stats["hits"] += 1
+                return copy.deepcopy(result)
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                with open(path, "rb") as f:
+                    result = pickle.load(f)
+                self._remember(key, result)
+                try:
+                    os.utime(path)  # mtime is the LRU order the next start sees
+                except OSError:
+                    pass
+                with self._lock:
+                    self._disk[key] = None
+                    self._disk.move_to_end(key)
+                    self.stats["hits"] += 1
+                    self.stats["disk_hits"] += 1
+                return copy.deepcopy(result)
+            except FileNotFoundError:
+                with self._lock:
+                    self._disk.pop(key, None)
+            except Exception as e:
+                logger.warning(f"Dropping unreadable step cache entry {key}: {e}")
+                with self._lock:
+                    self._disk.pop(key, None)
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, result: StepResult):
+        result = copy.deepcopy(result)
+        self._remember(key, result)
+        if self.disk_dir:
+            try:
+                fd, tmp = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, self._disk_path(key))
+                with self._lock:
+                    self._disk[key] = None
+                    self._disk.move_to_end(key)
+                self._prune_disk()
+            except Exception as e:
+                logger.warning(f"Could not persist step cache entry {key}: {e}")
+
+    def _remember(self, key: str, result: StepResult):
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _prune_disk(self):
+        with self._lock:
+            evicted = []
+            while len(self._disk) > self.max_disk_entries:
+                evicted.append(self._disk.popitem(last=False)[0])
+        for key in evicted:
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+
+def run_cached(step, ctx, input_data, cache: Optional[StepCache], run_fn=None) -> Tuple[StepResult, Optional[str]]:
+    """
+    Run `step` through `cache` if the step opts in. Returns (result, "hit"|"miss"|None)
+    and records the outcome in result.metadata["cache"].
+    """
+    run_fn = run_fn or step.run
+    key = step.cache_key(ctx, input_data) if cache is not None and hasattr(step, "cache_key") else None
+    if key is None:
+        return run_fn(ctx, input_data), None
+
+    result = cache.get(key)
+    if result is not None:
+        result.metadata["cache"] = "hit"
+        prom_metrics.record_cache("pipeline_step", True)
+        return result, "hit"
+
+    result = run_fn(ctx, input_data)
+    prom_metrics.record_cache("pipeline_step", False)
+    if result.success:
+        cache.put(key, result)
+    result.metadata["cache"] = "miss"
+    return result, "miss"
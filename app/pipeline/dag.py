@@ -0,0 +1,324 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .interfaces import PipelineContext, PipelineStep, StepResult
+from .cache import StepCache, cache_key, run_cached
+
+try:
+    import prom_metrics
+except ImportError:
+    from app import prom_metrics
+
+logger = logging.getLogger(__name__)
+
+IO = "io"
+CPU = "cpu"
+
+
+@dataclass
+class FunctionStep:
+    """
+    Adapter turning a plain function into a DAG step.
+
+    `fn(ctx, inputs)` receives a dict with the pipeline input under "input"
+    and each dependency's output under that dependency's name. It may return
+    a StepResult or a bare output value.
+
+    `key_fn(ctx, inputs)` opts the step into memoization: it returns the
+    input/config values that determine the output (or None to skip caching).
+    Bump `version` when `fn` changes meaning.
+
+    `timeout` caps the step's share of the request deadline. An `optional`
+    step that runs out of time yields `fallback` instead of failing the run.
+    """
+    name: str
+    fn: Callable[[PipelineContext, Dict[str, Any]], Any]
+    depends_on: Sequence[str] = ()
+    kind: str = CPU
+    key_fn: Optional[Callable[[PipelineContext, Dict[str, Any]], Any]] = None
+    version: str = "1"
+    timeout: Optional[float] = None
+    optional: bool = False
+    fallback: Any = None
+
+    def run(self, ctx: PipelineContext, input_data: Any) -> StepResult:
+        out = self.fn(ctx, input_data)
+        return out if isinstance(out, StepResult) else StepResult(output=out)
+
+    def cache_key(self, ctx: PipelineContext, input_data: Any) -> Optional[str]:
+        if self.key_fn is None:
+            return None
+        parts = self.key_fn(ctx, input_data)
+        return None if parts is None else cache_key(self.name, parts, version=self.version)
+
+
+@dataclass
+class ProcessStep:
+    """
+    CPU-heavy step run in a process pool, so it scales past the GIL.
+
+    `fn` must be a picklable module-level function; `args_fn(ctx, inputs)`
+    builds its positional arguments in the parent process. Without a pool
+    (or outside an event loop) `fn` runs inline.
+    """
+    name: str
+    fn: Callable[..., Any]
+    args_fn: Callable[[PipelineContext, Dict[str, Any]], Sequence[Any]]
+    pool: Optional[Executor] = None
+    depends_on: Sequence[str] = ()
+    kind: str = IO  # awaited on the loop; the work itself happens in the pool
+    timeout: Optional[float] = None
+    optional: bool = False
+    fallback: Any = None
+
+    def run(self, ctx: PipelineContext, input_data: Any) -> StepResult:
+        return StepResult(output=self.fn(*self.args_fn(ctx, input_data)))
+
+    async def arun(self, ctx: PipelineContext, input_data: Any) -> StepResult:
+        if self.pool is None:
+            return await asyncio.to_thread(self.run, ctx, input_data)
+        loop = asyncio.get_running_loop()
+        out = await loop.run_in_executor(self.pool, self.fn, *self.args_fn(ctx, input_data))
+        return StepResult(output=out)
+
+
+@dataclass
+class _StepRun:
+    step: PipelineStep
+    depends_on: List[str]
+    kind: str
+    result: Optional[StepResult] = None
+    start: float = 0.0
+    end: float = 0.0
+    skipped: bool = False
+    cut: Optional[str] = None
+
+
+class DagPipeline:
+    """
+    Runs PipelineSteps as a dependency graph instead of a fixed sequence.
+
+    Steps declare `depends_on` (names of upstream steps) and `kind`:
+    - "io":  `arun(ctx, inputs)` coroutines are awaited on the event loop;
+             blocking `run` is offloaded with asyncio.to_thread
+    - "cpu": `run` executes on the pipeline's thread pool
+    Both attributes are optional (no dependencies, "cpu").
+    With a StepCache, synchronous steps that define `cache_key` are memoized.
+
+    A step starts as soon as all of its dependencies have succeeded, so
+    independent steps overlap. If a step fails, its dependents are skipped.
+    Independent branches that are already running still finish.
+
+    Each step is bounded by min(step.timeout, time left on ctx.deadline).
+    When that runs out an optional step is cut (its `fallback` is used and
+    downstream steps carry on); a required step fails the run with
+    metadata["deadline_exceeded"]. Cut steps are listed in
+    ctx.metadata["cut_steps"] and on the deadline.
+    """
+    def __init__(self, name: str, steps: List[PipelineStep], max_workers: int = 4, cache: Optional[StepCache] = None):
+        self.name = name
+        self.steps = steps
+        self.max_workers = max_workers
+        self.cache = cache
+        self._order = self._toposort()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _toposort(self) -> List[str]:
+        by_name = {s.name: s for s in self.steps}
+        if len(by_name) != len(self.steps):
+            raise ValueError(f"Pipeline '{self.name}' has duplicate step names")
+        for s in self.steps:
+            for dep in getattr(s, "depends_on", ()):
+                if dep not in by_name:
+                    raise ValueError(f"Step '{s.name}' depends on unknown step '{dep}'")
+
+        order, state = [], {}
+
+        def visit(name: str):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Pipeline '{self.name}' has a dependency cycle through '{name}'")
+            state[name] = "visiting"
+            for dep in getattr(by_name[name], "depends_on", ()):
+                visit(dep)
+            state[name] = "done"
+            order.append(name)
+
+        for s in self.steps:
+            visit(s.name)
+        return order
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"dag-{self.name}")
+        return self._pool
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+    def run(self, initial_input: Any, context: Optional[PipelineContext] = None) -> StepResult:
+        """Synchronous entry point; use `arun` from inside an event loop."""
+        return asyncio.run(self.arun(initial_input, context))
+
+    async def arun(self, initial_input: Any, context: Optional[PipelineContext] = None) -> StepResult:
+        if context is None:
+            context = PipelineContext()
+        logger.info(f"Starting DAG pipeline '{self.name}' with {len(self.steps)} steps. Request ID: {context.request_id}")
+
+        by_name = {s.name: s for s in self.steps}
+        runs: Dict[str, _StepRun] = {
+            name: _StepRun(
+                step=by_name[name],
+                depends_on=list(getattr(by_name[name], "depends_on", ())),
+                kind=getattr(by_name[name], "kind", CPU),
+            )
+            for name in self._order
+        }
+        origin = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def execute(name: str) -> bool:
+            run = runs[name]
+            if run.depends_on:
+                deps_ok = await asyncio.gather(*(tasks[d] for d in run.depends_on))
+                if not all(deps_ok):
+                    run.skipped = True
+                    return False
+
+            inputs = {"input": initial_input}
+            inputs.update({d: runs[d].result.output for d in run.depends_on})
+
+            run.start = time.perf_counter()
+            try:
+                run.result = await self._execute_bounded(run, context, inputs)
+            except Exception as e:
+                logger.exception(f"Unhandled exception in step '{name}'")
+                run.result = StepResult(
+                    output=None,
+                    success=False,
+                    errors=[str(e)],
+                    metadata={"exception_type": type(e).__name__},
+                )
+            run.end = time.perf_counter()
+            prom_metrics.observe_stage(name, run.end - run.start)
+            if not run.result.success:
+                logger.error(f"Step '{name}' failed: {run.result.errors}")
+            return run.result.success
+
+        for name in self._order:
+            tasks[name] = asyncio.ensure_future(execute(name))
+        await asyncio.gather(*tasks.values())
+
+        pipeline_duration = time.perf_counter() - origin
+        self._record(context, runs, origin, pipeline_duration)
+        return self._final_result(runs)
+
+    async def _execute_bounded(self, run: _StepRun, ctx: PipelineContext, inputs: Dict[str, Any]) -> StepResult:
+        timeout = getattr(run.step, "timeout", None)
+        budget = ctx.deadline.budget(timeout) if ctx.deadline is not None else timeout
+        if budget is None:
+            return await self._execute_step(run, ctx, inputs)
+        if budget <= 0:
+            return self._cut(run, ctx, "no time left")
+        try:
+            return await asyncio.wait_for(self._execute_step(run, ctx, inputs), timeout=budget)
+        except asyncio.TimeoutError:
+            # The worker thread can't be interrupted; its result is discarded
+            return self._cut(run, ctx, f"timed out after {budget:.2f}s")
+
+    @staticmethod
+    def _cut(run: _StepRun, ctx: PipelineContext, reason: str) -> StepResult:
+        step = run.step
+        run.cut = reason
+        if ctx.deadline is not None:
+            ctx.deadline.cut(step.name, reason)
+        if getattr(step, "optional", False):
+            logger.warning(f"Optional step '{step.name}' cut: {reason}")
+            return StepResult(output=getattr(step, "fallback", None), metadata={"cut": reason})
+        return StepResult(
+            output=None,
+            success=False,
+            errors=[f"Deadline exceeded in '{step.name}': {reason}"],
+            metadata={"deadline_exceeded": True, "cut": reason},
+        )
+
+    async def _execute_step(self, run: _StepRun, ctx: PipelineContext, inputs: Dict[str, Any]) -> StepResult:
+        step = run.step
+        if run.kind == IO:
+            if hasattr(step, "arun"):
+                return await step.arun(ctx, inputs)
+            result, _ = await asyncio.to_thread(run_cached, step, ctx, inputs, self.cache)
+            return result
+        loop = asyncio.get_running_loop()
+        result, _ = await loop.run_in_executor(self.pool, run_cached, step, ctx, inputs, self.cache)
+        return result
+
+    # ------------------------------------------------------------------
+    # Telemetry
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _critical_path(runs: Dict[str, _StepRun]) -> List[str]:
+        """Walk back from the last step to finish through its latest-finishing dependency."""
+        finished = {n: r for n, r in runs.items() if r.result is not None}
+        if not finished:
+            return []
+        path = [max(finished, key=lambda n: finished[n].end)]
+        while True:
+            deps = [d for d in finished[path[-1]].depends_on if d in finished]
+            if not deps:
+                break
+            path.append(max(deps, key=lambda d: finished[d].end))
+        return list(reversed(path))
+
+    def _record(self, context: PipelineContext, runs: Dict[str, _StepRun], origin: float, duration: float):
+        step_runs = context.metadata.setdefault("step_runs", [])
+        for name in self._order:
+            run = runs[name]
+            entry = {
+                "step_name": name,
+                "kind": run.kind,
+                "depends_on": run.depends_on,
+            }
+            if run.skipped:
+                entry.update({"success": False, "skipped": True, "errors": ["upstream step failed"]})
+            else:
+                entry.update({
+                    "start_offset_seconds": run.start - origin,
+                    "duration_seconds": run.end - run.start,
+                    "success": run.result.success,
+                    "metadata": run.result.metadata,
+                    "errors": run.result.errors,
+                })
+                if run.cut:
+                    entry["cut"] = run.cut
+            step_runs.append(entry)
+
+        path = self._critical_path(runs)
+        context.metadata["critical_path"] = path
+        context.metadata["critical_path_seconds"] = sum(runs[n].end - runs[n].start for n in path)
+        context.metadata["pipeline_duration_seconds"] = duration
+        context.metadata["cut_steps"] = [n for n in self._order if runs[n].cut]
+
+        if all(r.result is not None and r.result.success for r in runs.values()):
+            logger.info(f"Pipeline '{self.name}' completed successfully in {duration:.2f}s (critical path: {' -> '.join(path)})")
+        else:
+            logger.warning(f"Pipeline '{self.name}' failed or incomplete in {duration:.2f}s")
+
+    def _final_result(self, runs: Dict[str, _StepRun]) -> StepResult:
+        """First failure if any, else the output of the sink step (dict of outputs if several)."""
+        for name in self._order:
+            result = runs[name].result
+            if result is not None and not result.success:
+                return result
+
+        upstream = {d for r in runs.values() for d in r.depends_on}
+        sinks = [n for n in self._order if n not in upstream]
+        if len(sinks) == 1:
+            return runs[sinks[0]].result
+        return StepResult(output={n: runs[n].result.output for n in sinks})
@@ -3,6 +3,11 @@ from typing import Any, Dict, List, Optional, Protocol, runtime_checkable
 import uuid
 from datetime import datetime
 
+try:
+    from deadline import Deadline
+except ImportError:
+    from app.deadline import Deadline
+
 @dataclass
 class PipelineContext:
     """Carries state through the pipeline execution."""
@@ -12,6 +17,7 @@ class PipelineContext:
     user_id: Optional[str] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
     created_at: datetime = field(default_factory=datetime.utcnow)
+    deadline: Optional[Deadline] = None  # end-to-end budget shared by every step
 
 @dataclass
 class StepResult:
@@ -24,7 +30,14 @@ class StepResult:
 
 @runtime_checkable
 class PipelineStep(Protocol):
-    """Interface for a modular processing step."""
+    """
+    Interface for a modular processing step.
+
+    Steps run by DagPipeline may also define `depends_on` (names of upstream
+    steps), `kind` ("io" or "cpu") and an async `arun(ctx, input_data)`,
+    plus `timeout` (seconds, further capped by ctx.deadline), `optional`
+    and `fallback` (the output used when an optional step is cut for time).
+    """
     
     @property
     def name(self) -> str:
@@ -4,17 +4,20 @@ from typing import Any, List, Optional
 from datetime import datetime
 from dataclasses import asdict
 
-from app.pipeline.interfaces import PipelineContext, PipelineStep, StepResult
+from .interfaces import PipelineContext, PipelineStep, StepResult
+from .cache import StepCache, run_cached
 
 logger = logging.getLogger(__name__)
 
 class Pipeline:
     """
     Orchestrates the execution of a sequence of PipelineSteps.
+    With a StepCache, steps that define `cache_key` are memoized.
     """
-    def __init__(self, name: str, steps: List[PipelineStep]):
+    def __init__(self, name: str, steps: List[PipelineStep], cache: Optional[StepCache] = None):
         self.name = name
         self.steps = steps
+        self.cache = cache
 
     def run(self, initial_input: Any, context: Optional[PipelineContext] = None) -> StepResult:
         """
@@ -40,7 +43,7 @@ class Pipeline:
             step_start = time.time()
             try:
                 logger.debug(f"Running step: {step.name}")
-                result = step.run(context, current_input)
+                result, _ = run_cached(step, context, current_input, self.cache)
                 
                 duration = time.time() - step_start
                 
@@ -0,0 +1,247 @@
+import os
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cache import StepCache, cache_key
+from .dag import CPU, IO, DagPipeline, FunctionStep, ProcessStep
+from .interfaces import PipelineContext, PipelineStep, StepResult
+
+try:
+    from retrieve import get_relevant_context
+    from prompt_builder import build_prompt_packet, compute_kpi_summary
+except ImportError:
+    from app.retrieve import get_relevant_context
+    from app.prompt_builder import build_prompt_packet, compute_kpi_summary
+
+# Per-step caps (seconds) on top of the request deadline. Retrieval and KPIs
+# are optional: when cut, the prompt is built without them.
+_RETRIEVAL_TIMEOUT_S = float(os.getenv("RETRIEVAL_TIMEOUT_SECONDS", "5"))
+_KPI_TIMEOUT_S = float(os.getenv("KPI_TIMEOUT_SECONDS", "5"))
+_POLICY_CHECK_TIMEOUT_S = float(os.getenv("GUARDRAILS_TIMEOUT_SECONDS", "10"))
+
+
+def _data_fingerprint(structured_data: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Content hash of the loaded DataFrames, so KPI results invalidate when data changes."""
+    if not structured_data:
+        return None
+    import pandas as pd
+
+    return cache_key("structured_data", {
+        name: int(pd.util.hash_pandas_object(df, index=True).sum())
+        for name, df in sorted(structured_data.items())
+    })
+
+
+def retrieval_step(docs: List[Tuple[str, str]]) -> FunctionStep:
+    """Fuzzy retrieval; memoized on (question, top_k, corpus)."""
+    docs_fp = cache_key("docs", docs)
+
+    def retrieval(ctx: PipelineContext, inputs: Dict[str, Any]) -> Optional[List[Dict]]:
+        req = inputs["input"]
+        if not req.get("retrieval_enabled", True):
+            return []
+        return get_relevant_context(req["question"], docs, top_k=req.get("top_k", 3))
+
+    def key(ctx: PipelineContext, inputs: Dict[str, Any]):
+        req = inputs["input"]
+        if not req.get("retrieval_enabled", True):
+            return None
+        return (req["question"], req.get("top_k", 3), docs_fp)
+
+    return FunctionStep(
+        "retrieval", retrieval, kind=CPU, key_fn=key,
+        timeout=_RETRIEVAL_TIMEOUT_S, optional=True, fallback=[],
+    )
+
+
+# Corpus held by each batch worker process (set once by the pool initializer)
+_worker_docs: List[Tuple[str, str]] = []
+
+
+def init_retrieval_worker(docs: List[Tuple[str, str]]):
+    """ProcessPoolExecutor initializer: ship the corpus to the worker once, not per item."""
+    global _worker_docs
+    _worker_docs = docs
+
+
+def _retrieve_in_worker(question: str, top_k: int, enabled: bool) -> List[Dict]:
+    if not enabled:
+        return []
+    return get_relevant_context(question, _worker_docs, top_k=top_k)
+
+
+def process_retrieval_step(pool: Executor) -> ProcessStep:
+    """Retrieval on a process pool whose workers ran `init_retrieval_worker`."""
+    return ProcessStep(
+        "retrieval",
+        _retrieve_in_worker,
+        lambda ctx, inputs: (
+            inputs["input"]["question"],
+            inputs["input"].get("top_k", 3),
+            inputs["input"].get("retrieval_enabled", True),
+        ),
+        pool=pool,
+        timeout=_RETRIEVAL_TIMEOUT_S,
+        optional=True,
+        fallback=[],
+    )
+
+
+def kpi_step(kpi_summary: Optional[str] = None, structured_data: Optional[Dict[str, Any]] = None) -> FunctionStep:
+    """KPI summary: the precomputed text if given, else computed (and memoized) from the data."""
+    data_fp = None if kpi_summary is not None else _data_fingerprint(structured_data)
+
+    def kpis(ctx: PipelineContext, inputs: Dict[str, Any]) -> Optional[str]:
+        if not inputs["input"].get("kpi_enabled", True):
+            return None
+        if kpi_summary is not None:
+            return kpi_summary
+        return compute_kpi_summary(structured_data or {})
+
+    def key(ctx: PipelineContext, inputs: Dict[str, Any]):
+        if not inputs["input"].get("kpi_enabled", True) or data_fp is None:
+            return None
+        return data_fp
+
+    return FunctionStep(
+        "kpi_summary", kpis, kind=CPU, key_fn=key,
+        timeout=_KPI_TIMEOUT_S, optional=True, fallback="",
+    )
+
+
+def generate_step(content_gen) -> FunctionStep:
+    """LLM call through ContentGenerator (logs the MLflow run); sets ctx.run_id."""
+
+    def generate(ctx: PipelineContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        req = inputs["input"]
+        response, run_id, guardrails_meta = content_gen.generate_response(
+            inputs["prompt_build"],
+            retrieval_context=inputs["retrieval"],
+            model=req["model"],
+            user_question=req["question"],
+            top_k=req.get("top_k", 3),
+            session_id=req.get("session_id"),
+            user_id=req.get("user_id"),
+            cascade=req.get("cascade"),
+            deadline=ctx.deadline,
+        )
+        ctx.run_id = run_id
+        return {
+            "response": response,
+            "run_id": run_id,
+            "guardrails": guardrails_meta,
+            "context": inputs["retrieval"],
+        }
+
+    return FunctionStep("generate", generate, depends_on=("policy_check", "prompt_build", "retrieval"), kind=IO)
+
+
+def build_context_pipeline(
+    docs: List[Tuple[str, str]],
+    structured_data: Optional[Dict[str, Any]] = None,
+    cache: Optional[StepCache] = None,
+) -> DagPipeline:
+    """
+    Retrieval and KPI stages only, for replays that recompute them.
+    Input: question, top_k, retrieval_enabled, kpi_enabled.
+    Output: {"retrieval": [...] | [], "kpi_summary": str | None}.
+    """
+    return DagPipeline(
+        "replay_context",
+        [retrieval_step(docs), kpi_step(structured_data=structured_data)],
+        cache=cache,
+    )
+
+
+def build_chat_pipeline(
+    content_gen,
+    docs: List[Tuple[str, str]],
+    kpi_summary: Optional[str] = None,
+    structured_data: Optional[Dict[str, Any]] = None,
+    check_input: Optional[Callable] = None,
+    max_workers: int = 4,
+    cache: Optional[StepCache] = None,
+    retrieval: Optional[PipelineStep] = None,
+) -> DagPipeline:
+    """
+    The chat flow as a DAG.
+
+    policy_check, retrieval and kpi_summary are independent and overlap;
+    prompt_build waits for retrieval + KPIs, generate waits for the prompt
+    and the policy check. With ctx.deadline set, retrieval and KPIs are cut
+    (empty) rather than failing when they run out of time.
+
+    Pipeline input is a dict with: question, top_k, retrieval_enabled, model,
+    session_id, user_id, cascade. The final output is a dict with response,
+    run_id, guardrails and context. With `cache`, retrieval is memoized.
+    `retrieval` replaces the default in-thread retrieval step.
+    """
+
+    def policy_check(ctx: PipelineContext, inputs: Dict[str, Any]) -> StepResult:
+        if check_input is None:
+            return StepResult(output=None)
+        req = inputs["input"]
+        result = check_input(req["question"], ctx={"user_id": req.get("user_id"), "session_id": req.get("session_id")})
+        if result.passed:
+            return StepResult(output=result)
+        return StepResult(
+            output=result,
+            success=False,
+            errors=[result.failure_message],
+            metadata={"blocked": True},
+        )
+
+    def prompt_build(ctx: PipelineContext, inputs: Dict[str, Any]) -> str:
+        return build_prompt_packet(inputs["input"]["question"], inputs["kpi_summary"], inputs["retrieval"])
+
+    return DagPipeline(
+        "chat",
+        [
+            FunctionStep("policy_check", policy_check, kind=IO, timeout=_POLICY_CHECK_TIMEOUT_S),
+            retrieval or retrieval_step(docs),
+            kpi_step(kpi_summary=kpi_summary, structured_data=structured_data),
+            FunctionStep("prompt_build", prompt_build, depends_on=("retrieval", "kpi_summary"), kind=CPU),
+            generate_step(content_gen),
+        ],
+        max_workers=max_workers,
+        cache=cache,
+    )
+
+
+def build_batch_pipeline(
+    content_gen,
+    pool: Executor,
+    kpi_summary: Optional[str] = None,
+    check_input: Optional[Callable] = None,
+    max_workers: int = 4,
+) -> DagPipeline:
+    """
+    The chat flow plus a parse step, for bulk runs: retrieval runs on `pool`
+    (see `init_retrieval_worker`), the LLM call on the event loop's threads.
+    The final output adds `forecast` and `parse_success` from the response.
+    """
+    chat = build_chat_pipeline(
+        content_gen,
+        docs=[],
+        kpi_summary=kpi_summary,
+        check_input=check_input,
+        max_workers=max_workers,
+        retrieval=process_retrieval_step(pool),
+    )
+
+    def parse(ctx: PipelineContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        generated = inputs["generate"]
+        forecast, block_present = content_gen._parse_forecast(generated["response"] or "")
+        return {
+            "response": generated["response"],
+            "run_id": generated["run_id"],
+            "forecast": forecast,
+            "parse_success": forecast is not None,
+            "forecast_block_present": block_present,
+        }
+
+    return DagPipeline(
+        "batch",
+        chat.steps + [FunctionStep("parse", parse, depends_on=("generate",), kind=CPU)],
+        max_workers=max_workers,
+    )
@@ -0,0 +1,84 @@
+"""
+In-process Prometheus metrics for the LLM layer.
+
+Stage latencies, provider outcomes/errors, cache hit rates and queue depths
+are recorded here and exported by the backend's /metrics/prometheus scrape
+endpoint, so alerts can use live numbers instead of scanning MLflow runs.
+
+`prometheus_client` is optional: without it every metric is a no-op.
+For multi-worker uvicorn, set PROMETHEUS_MULTIPROC_DIR (an empty,
+writable directory) before the workers start.
+"""
+
+import contextlib
+import time
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram
+except ImportError:
+    Counter = Gauge = Histogram = None
+
+
+# Seconds; LLM calls dominate so the upper buckets are wide
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+
+class _NoopMetric:
+    """Stand-in used when prometheus_client is not installed."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def set(self, value: float):
+        pass
+
+    def observe(self, value: float):
+        pass
+
+
+def _metric(cls, *args, **kwargs):
+    return cls(*args, **kwargs) if cls is not None else _NoopMetric()
+
+
+STAGE_LATENCY = _metric(
+    Histogram, "fulcrum_stage_latency_seconds",
+    "Latency of pipeline stages (guardrails, retrieval, LLM generation, ...)",
+    ["stage"], buckets=LATENCY_BUCKETS,
+)
+LLM_REQUESTS = _metric(
+    Counter, "fulcrum_llm_requests_total",
+    "LLM provider calls by outcome", ["provider", "model", "outcome"],
+)
+PROVIDER_ERRORS = _metric(
+    Counter, "fulcrum_llm_provider_errors_total",
+    "LLM provider errors (including retried attempts)", ["provider", "error"],
+)
+CACHE_REQUESTS = _metric(
+    Counter, "fulcrum_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)", ["cache", "result"],
+)
+QUEUE_DEPTH = _metric(
+    Gauge, "fulcrum_queue_depth",
+    "Items waiting in internal queues", ["queue"], multiprocess_mode="livesum",
+)
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_LATENCY.labels(stage).observe(seconds)
+
+
+@contextlib.contextmanager
+def stage_timer(stage: str):
+    """Time a block into the stage latency histogram."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
@@ -0,0 +1,251 @@
+"""
+Resilience helpers for outbound LLM provider calls.
+
+Provides:
+1. Exponential backoff with full jitter for retryable errors
+2. A per-provider circuit breaker that fails fast while a provider is down
+3. A registry so breaker state can be surfaced on /health
+
+ai-confidence/src/ai_confidence/resilience.py is a copy of this module for
+the separately installed ai-confidence package, which cannot import the app.
+Keep the two in sync: a breaker or retry fix lands in both (that copy defines
+its own DeadlineExceeded instead of importing app.deadline).
+"""
+
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import openai
+except ImportError:
+    openai = None
+
+try:
+    from deadline import DeadlineExceeded
+except ImportError:
+    from app.deadline import DeadlineExceeded
+
+
+# HTTP status codes that are safe to retry (transient / provider-side)
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is rejected because the provider's breaker is open."""
+
+    def __init__(self, provider: str, retry_in: float):
+        self.provider = provider
+        self.retry_in = retry_in
+        super().__init__(f"Circuit open for provider '{provider}', retry in {retry_in:.1f}s")
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter: sleep = U(0, min(max_delay, base * 2^n))."""
+    max_attempts: int = int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "3"))
+    base_delay: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+    max_delay: float = float(os.getenv("LLM_RETRY_MAX_DELAY", "8.0"))
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (0-based)."""
+        cap = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0, cap)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Decide whether an exception is transient.
+    Connection errors, timeouts, 429s and 5xx are retryable; auth and
+    validation errors (4xx) are not.
+    """
+    if isinstance(exc, (CircuitOpenError, DeadlineExceeded)):
+        return False
+
+    if openai is not None:
+        # APITimeoutError is a subclass of APIConnectionError
+        if isinstance(exc, openai.APIConnectionError):
+            return True
+        if isinstance(exc, openai.APIStatusError):
+            return exc.status_code in RETRYABLE_STATUS_CODES
+
+    status_code = getattr(exc, "status_code", None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+
+    return isinstance(exc, (ConnectionError, TimeoutError))
+
+
+def is_provider_response(exc: BaseException) -> bool:
+    """True if the exception carries an HTTP answer from the provider."""
+    if openai is not None and isinstance(exc, openai.APIStatusError):
+        return True
+    return getattr(exc, "status_code", None) is not None
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker (closed -> open -> half_open -> closed).
+
+    Only retryable (provider-side) failures count towards tripping the breaker,
+    so a malformed request cannot take a healthy provider out of rotation.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = False
+
+        # Stats tracking
+        self.stats = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        # Caller must hold the lock
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_in_flight = False
+        return self._state
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call should not be attempted."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.OPEN:
+                self.stats["rejected"] += 1
+                retry_in = self.reset_timeout - (time.monotonic() - self._opened_at)
+                raise CircuitOpenError(self.name, max(retry_in, 0.0))
+            if state == self.HALF_OPEN:
+                # Allow a single probe request through
+                if self._half_open_in_flight:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(self.name, 0.0)
+                self._half_open_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.stats["successes"] += 1
+            self._consecutive_failures = 0
+            self._half_open_in_flight = False
+            self._state = self.CLOSED
+
+    def release(self):
+        """End a call that says nothing about the provider's health (frees the half-open probe)."""
+        with self._lock:
+            self._half_open_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.stats["failures"] += 1
+            self._consecutive_failures += 1
+            self._half_open_in_flight = False
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.stats["opened"] += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout_s": self.reset_timeout,
+                **self.stats,
+            }
+
+
+# ---------------------------------------------------------------------------
+# Breaker registry (one breaker per provider, shared by all callers)
+# ---------------------------------------------------------------------------
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    """Get (or lazily create) the breaker for a provider."""
+    with _registry_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                provider,
+                failure_threshold=int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5")),
+                reset_timeout=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30")),
+            )
+            _breakers[provider] = breaker
+        return breaker
+
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of all provider breakers, for health endpoints."""
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.snapshot() for b in breakers}
+
+
+def call_with_resilience(
+    fn: Callable[[], Any],
+    provider: str,
+    policy: Optional[RetryPolicy] = None,
+    idempotent: bool = True,
+    on_retry: Optional[Callable[[int, BaseException, float], None]] = None,
+    deadline=None,
+) -> Any:
+    """
+    Call `fn` guarded by the provider's circuit breaker, retrying retryable
+    errors with jittered exponential backoff.
+
+    Non-idempotent calls are attempted once. `on_retry(attempt, exc, delay)`
+    is invoked before each backoff sleep. With a `deadline` (app.deadline),
+    no retry is attempted once the backoff would use up the time left.
+    """
+    policy = policy or RetryPolicy()
+    breaker = get_breaker(provider)
+    attempts = policy.max_attempts if idempotent else 1
+
+    for attempt in range(attempts):
+        if deadline is not None and deadline.remaining() <= 0:
+            raise DeadlineExceeded(provider, 0.0)
+        breaker.before_call()
+        try:
+            result = fn()
+        except Exception as e:
+            if not is_retryable(e):
+                if is_provider_response(e):
+                    # The provider answered; it is up even if the request was bad
+                    breaker.record_success()
+                else:
+                    # Deadline, nested breaker or local error: the provider never answered
+                    breaker.release()
+                raise
+            breaker.record_failure()
+            if attempt + 1 >= attempts:
+                raise
+            delay = policy.backoff(attempt)
+            if deadline is not None and deadline.remaining() <= delay:
+                raise
+            if on_retry:
+                on_retry(attempt + 1, e, delay)
+            time.sleep(delay)
+            continue
+
+        breaker.record_success()
+        return result
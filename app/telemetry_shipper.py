@@ -0,0 +1,221 @@
+"""
+Background shipping of FulcrumClient telemetry.
+
+Finished client runs are handed to a daemon sender thread through a bounded
+queue, so `RunContext.__exit__` returns immediately. The sender posts them
+in bulk to POST /runs/ingest.
+
+When the queue is full, or the backend cannot be reached, records are
+appended to a local JSONL spool instead of being dropped. The spool is
+replayed in bulk once the backend answers again. The backend deduplicates
+on `client_run_id`, so a record that is sent twice (crash mid-replay) is
+only stored once.
+
+Only an unreachable backend (connection errors, 5xx, 408/429, auth and
+routing errors) is retried. A batch the backend rejects as invalid (other
+4xx) is split in halves until the bad records are isolated; those go to a
+`.rejected.jsonl` dead-letter file next to the spool and the rest ships, so
+one bad record cannot block the spool forever.
+
+Nothing here ever blocks the caller on the network.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_QUEUE_SIZE = int(os.getenv("FULCRUM_TELEMETRY_QUEUE_SIZE", "256"))
+_BATCH_SIZE = int(os.getenv("FULCRUM_TELEMETRY_BATCH_SIZE", "50"))
+_RETRY_SECONDS = float(os.getenv("FULCRUM_TELEMETRY_RETRY_SECONDS", "30"))
+# Backend answers that say "try again later", not "this batch is invalid"
+_RETRY_STATUS_CODES = {401, 403, 404, 408, 429}
+_SPOOL_DIR = os.getenv(
+    "FULCRUM_TELEMETRY_SPOOL_DIR",
+    os.path.join(_PROJECT_ROOT, ".fulcrum_data", "telemetry_spool"),
+)
+
+
+def _rejected_status(exc: BaseException):
+    """HTTP status if the backend refused the records themselves, else None (unavailable)."""
+    status = getattr(getattr(exc, "response", None), "status_code", None) or getattr(exc, "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500 and status not in _RETRY_STATUS_CODES:
+        return status
+    return None
+
+
+class Spool:
+    """Append-only JSONL file of records waiting to be shipped."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.inflight_path = f"{path}.inflight"
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def append(self, records: List[Dict[str, Any]]):
+        if not records:
+            return
+        lines = "".join(json.dumps(r, default=str) + "\n" for r in records)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+
+    def pending(self) -> bool:
+        return os.path.exists(self.inflight_path) or (
+            os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        )
+
+    def take(self) -> List[Dict[str, Any]]:
+        """
+        Move the spool aside and return its records. A leftover .inflight file
+        from a crashed replay is taken first. Call `done()` once they are shipped.
+        """
+        with self._lock:
+            if not os.path.exists(self.inflight_path):
+                if not os.path.exists(self.path):
+                    return []
+                os.replace(self.path, self.inflight_path)
+        records = []
+        with open(self.inflight_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # torn write from a crash
+        return records
+
+    def done(self):
+        try:
+            os.remove(self.inflight_path)
+        except FileNotFoundError:
+            pass
+
+
+class TelemetryShipper:
+    """
+    Daemon sender for one backend. `send(records)` performs the bulk POST and
+    raises on failure; it only ever runs on the sender thread.
+    """
+
+    def __init__(self, send: Callable[[List[Dict[str, Any]]], None], spool_path: str, queue_size: int = _QUEUE_SIZE):
+        self._send = send
+        self.spool = Spool(spool_path)
+        base, ext = os.path.splitext(spool_path)
+        self.rejected = Spool(f"{base}.rejected{ext or '.jsonl'}")
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=queue_size)
+        self._down_until = 0.0
+        self._thread = threading.Thread(target=self._loop, name="fulcrum-telemetry", daemon=True)
+        self._thread.start()
+        atexit.register(self.spill)
+
+    def submit(self, record: Dict[str, Any]):
+        """Never blocks: a full queue spills straight to the spool."""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.spool.append([record])
+
+    def spill(self):
+        """Move everything still queued to the spool (at exit, instead of sending)."""
+        records = []
+        while True:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self.spool.append(records)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def _loop(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=_RETRY_SECONDS)
+            except queue.Empty:
+                first = None
+
+            batch = [first] if first is not None else []
+            while len(batch) < _BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if time.monotonic() < self._down_until:
+                # Backend known to be down: don't stall on another timeout
+                self.spool.append(batch)
+                continue
+
+            unsent = self._ship(batch) if batch else []
+            if unsent:
+                self.spool.append(unsent)
+                continue
+
+            if self.spool.pending():
+                self._replay()
+
+    def _ship(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send `records`; returns the ones to retry later (empty once all are shipped or rejected)."""
+        try:
+            self._send(records)
+            self._down_until = 0.0
+            return []
+        except Exception as e:
+            status = _rejected_status(e)
+            if status is None:
+                logger.warning(f"Telemetry backend unavailable ({e}); retrying in {_RETRY_SECONDS:g}s")
+                self._down_until = time.monotonic() + _RETRY_SECONDS
+                return records
+            if len(records) > 1:
+                # Bisect to isolate the invalid records; the backend dedupes anything resent
+                mid = len(records) // 2
+                unsent = self._ship(records[:mid])
+                if unsent:
+                    return unsent + records[mid:]
+                return self._ship(records[mid:])
+            detail = getattr(getattr(e, "response", None), "text", "") or str(e)
+            logger.error(
+                f"Telemetry record {records[0].get('client_run_id')} rejected by the backend "
+                f"({status}: {detail[:200]}); moved to {self.rejected.path}"
+            )
+            self.rejected.append(records)
+            return []
+
+    def _replay(self):
+        records = self.spool.take()
+        for i in range(0, len(records), _BATCH_SIZE):
+            unsent = self._ship(records[i:i + _BATCH_SIZE])
+            if unsent:
+                self.spool.append(unsent + records[i + _BATCH_SIZE:])
+                break
+        else:
+            if records:
+                logger.info(f"Replayed {len(records)} spooled telemetry records")
+        self.spool.done()
+
+
+_shippers: Dict[str, TelemetryShipper] = {}
+_shippers_lock = threading.Lock()
+
+
+def get_shipper(api_url: str, send: Callable[[List[Dict[str, Any]]], None]) -> TelemetryShipper:
+    """One shipper (thread + spool file) per backend URL, shared by every client pointing at it."""
+    with _shippers_lock:
+        shipper = _shippers.get(api_url)
+        if shipper is None:
+            name = hashlib.sha1(api_url.encode("utf-8")).hexdigest()[:12]
+            shipper = _shippers[api_url] = TelemetryShipper(send, os.path.join(_SPOOL_DIR, f"{name}.jsonl"))
+        return shipper
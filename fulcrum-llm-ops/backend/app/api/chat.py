@@ -56,11 +56,30 @@ except ImportError as e:
     logging.error(f"Failed to import validation module: {e}")
     validate_user_text = None
 
+try:
+    from pipeline.interfaces import PipelineContext
+    from deadline import Deadline
+    from pipeline.cache import StepCache
+    from pipeline.steps import build_chat_pipeline, build_context_pipeline
+except ImportError as e:
+    logging.error(f"Failed to import pipeline package: {e}")
+    build_chat_pipeline = None
+    build_context_pipeline = None
 
+try:
+    import resilience
+    breaker_states = resilience.breaker_states
+except ImportError as e:
+    logging.error(f"Failed to import resilience module: {e}")
+    breaker_states = None
 
-from fastapi import APIRouter, HTTPException, Depends
+
+
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
+from app.services import profiling
+from app.settings import settings
 
 router = APIRouter()
 logger = logging.getLogger("uvicorn")
@@ -73,6 +92,20 @@ try:
     unstructured_docs = load_unstructured_data()
     kpi_summary = compute_kpi_summary(structured_data)
     content_gen = ContentGenerator() # Handles MLflow initialization internally
+    step_cache = StepCache(
+        max_entries=settings.PIPELINE_CACHE_MAX_ENTRIES,
+        disk_dir=settings.PIPELINE_CACHE_DIR,
+    ) if settings.PIPELINE_CACHE_ENABLED else None
+    # Policy check, retrieval and KPIs run concurrently, then prompt -> generate
+    chat_pipeline = build_chat_pipeline(
+        content_gen,
+        unstructured_docs,
+        kpi_summary=kpi_summary,
+        check_input=check_input if obs else None,
+        cache=step_cache,
+    )
+    # Retrieval / KPI stages for staged replays (shares the step cache)
+    context_pipeline = build_context_pipeline(unstructured_docs, structured_data, cache=step_cache)
     logger.info("Data loaded successfully.")
 except Exception as e:
     logger.error(f"Failed to load data: {e}")
@@ -80,6 +113,8 @@ except Exception as e:
     unstructured_docs = []
     kpi_summary = ""
     content_gen = None
+    chat_pipeline = None
+    context_pipeline = None
 
 import uuid
 
@@ -90,6 +125,7 @@ class ChatRequest(BaseModel):
     retrieval_enabled: bool = True
     session_id: Optional[str] = None
     user_id: Optional[str] = None
+    cascade: Optional[bool] = None  # None -> LLM_CASCADE_ENABLED default
 
 class ChatResponse(BaseModel):
     response: str
@@ -97,10 +133,18 @@ class ChatResponse(BaseModel):
     session_id: str
     guardrails: Optional[Dict[str, Any]] = None
     context: List[Dict[str, Any]] = []
+    degraded_steps: List[str] = []  # steps skipped or cut short to meet the deadline
 
 @router.post("/", response_model=ChatResponse)
-async def chat_endpoint(req: ChatRequest):
-    if not content_gen:
+async def chat_endpoint(req: ChatRequest, request: Request):
+    with profiling.profile_request(request) as prof:
+        response = await _handle_chat(req)
+        prof.set_run(response.run_id)
+    return response
+
+
+async def _handle_chat(req: ChatRequest) -> ChatResponse:
+    if not content_gen or not chat_pipeline:
         raise HTTPException(status_code=500, detail="Backend data not initialized")
 
     try:
@@ -114,11 +158,26 @@ async def chat_endpoint(req: ChatRequest):
         # Generate session_id if not provided
         session_id = req.session_id or str(uuid.uuid4())
 
-        # 0.5 Policy Check (Guardrails)
-        if check_input and obs:
-            policy_result = check_input(req.message, ctx={"user_id": req.user_id, "session_id": session_id})
-            if not policy_result.passed:
+        # 1. Policy check || retrieval || KPIs -> prompt -> generate
+        deadline = Deadline(settings.CHAT_DEADLINE_SECONDS) if settings.CHAT_DEADLINE_SECONDS > 0 else None
+        ctx = PipelineContext(session_id=session_id, user_id=req.user_id, deadline=deadline)
+        result = await chat_pipeline.arun(
+            {
+                "question": req.message,
+                "top_k": req.top_k,
+                "retrieval_enabled": req.retrieval_enabled,
+                "model": req.model,
+                "session_id": session_id,
+                "user_id": req.user_id,
+                "cascade": req.cascade,
+            },
+            ctx,
+        )
+
+        if not result.success:
+            if result.metadata.get("blocked"):
                 # Log blocked request to MLflow
+                policy_result = result.output
                 with obs.start_run(run_name="blocked_input") as run:
                     obs.set_tag("session_id", session_id)
                     if req.user_id:
@@ -126,36 +185,31 @@ async def chat_endpoint(req: ChatRequest):
                     obs.set_tag("guardrails_status", "blocked")
                     obs.log_text(req.message, "user_input.txt")
                     obs.log_text(policy_result.failure_message, "violation.txt")
-                
-                raise HTTPException(status_code=400, detail=f"Policy violation: {policy_result.failure_message}")
 
-        # 1. Retrieval
-        relevant_chunks = []
-        if req.retrieval_enabled:
-            relevant_chunks = get_relevant_context(req.message, unstructured_docs, top_k=req.top_k)
-        
-        # 2. Build Prompt
-        packet = build_prompt_packet(req.message, kpi_summary, relevant_chunks)
-        
-        # 3. Generate
-        full_response, run_id, guardrails_meta = content_gen.generate_response(
-            packet,
-            retrieval_context=relevant_chunks,
-            model=req.model,
-            user_question=req.message,
-            top_k=req.top_k,
-            session_id=session_id,
-            user_id=req.user_id,
+                raise HTTPException(status_code=400, detail=f"Policy violation: {policy_result.failure_message}")
+            if result.metadata.get("deadline_exceeded"):
+                raise HTTPException(status_code=504, detail="; ".join(result.errors))
+            raise RuntimeError("; ".join(result.errors) or "Chat pipeline failed")
+
+        output = result.output
+        full_response, run_id, guardrails_meta = output["response"], output["run_id"], output["guardrails"]
+        relevant_chunks = output["context"]
+        logger.info(
+            f"Chat pipeline {ctx.metadata['pipeline_duration_seconds']:.2f}s, "
+            f"critical path {' -> '.join(ctx.metadata['critical_path'])}"
         )
-        
+
         return ChatResponse(
             response=full_response,
             run_id=run_id,
             session_id=session_id,
             guardrails=guardrails_meta,
-            context=relevant_chunks
+            context=relevant_chunks,
+            degraded_steps=deadline.cut_steps if deadline is not None else [],
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Chat error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
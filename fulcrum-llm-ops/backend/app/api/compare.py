@@ -1,20 +1,27 @@
 from fastapi import APIRouter, HTTPException, Query
 from app.schemas import CompareRunsResponse
-from app.mlflow_store import mlflow_store
+from app.mlflow_store import mlflow_store, parse_include
 from typing import List
 
 router = APIRouter()
 
 
 @router.get("", response_model=CompareRunsResponse)
-def compare_runs(run_ids: str = Query(..., description="Comma-separated run IDs (2-4)")):
+def compare_runs(
+    run_ids: str = Query(..., description="Comma-separated run IDs (2-4)"),
+    include: str = Query("metrics", description="Sections per run, as for GET /runs/{run_id}"),
+):
     ids = [rid.strip() for rid in run_ids.split(",") if rid.strip()]
     if len(ids) < 2 or len(ids) > 4:
         raise HTTPException(status_code=422, detail="Provide 2-4 run IDs")
+    try:
+        sections = parse_include(include)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     runs = []
     for rid in ids:
-        run = mlflow_store.get_run(rid)
+        run = mlflow_store.get_run(rid, include=sections)
         if not run:
             raise HTTPException(status_code=404, detail=f"Run {rid} not found")
         runs.append(run)
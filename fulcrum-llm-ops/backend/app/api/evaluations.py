@@ -8,7 +8,7 @@ router = APIRouter()
 @router.post("", response_model=EvaluationResponse)
 def create_evaluation(req: EvaluationRequest):
     """Persist a human evaluation (rating, label, comment) as MLflow tags."""
-    run = mlflow_store.get_run(req.run_id)
+    run = mlflow_store.get_run(req.run_id, include=())
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
 
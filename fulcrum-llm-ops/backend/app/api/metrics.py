@@ -4,6 +4,7 @@ from app.schemas import (
     CostByModelItem, ConfidenceDistributionResponse, ConfidenceBin, RunListItem
 )
 from app.mlflow_store import mlflow_store
+from app.services.run_index import cutoff_ms
 from typing import List
 import statistics
 import math
@@ -20,6 +21,22 @@ def _get_days(range_str: str):
 @router.get("/summary", response_model=DashboardSummaryResponse)
 def get_metrics_summary(range: str = "7d"):
     days = _get_days(range)
+    index = mlflow_store.run_index()
+    if index is not None:
+        stats = index.summary(cutoff_ms(days))
+        return DashboardSummaryResponse(
+            range=range,
+            kpis=MetricsKPIs(
+                p50_latency_ms=stats["p50_latency_ms"],
+                p95_latency_ms=stats["p95_latency_ms"],
+                total_cost_usd=round(stats["total_cost_usd"], 4),
+                avg_confidence=round(stats["avg_confidence"], 3),
+                parse_success_rate=round(stats["parse_success_rate"], 3),
+                run_count=stats["run_count"] if stats["latency_count"] else 0,
+            ),
+            models=stats["models"] if stats["latency_count"] else [],
+        )
+
     runs = mlflow_store.list_runs_in_range(days=days)
 
     latencies = [r.latency_ms for r in runs if r.latency_ms is not None]
@@ -95,6 +112,13 @@ def get_timeseries(
 @router.get("/cost_by_model", response_model=List[CostByModelItem])
 def get_cost_by_model(range: str = "7d"):
     days = _get_days(range)
+    index = mlflow_store.run_index()
+    if index is not None:
+        return [
+            CostByModelItem(model=row["model"], cost_usd=round(row["cost_usd"], 4), run_count=row["run_count"])
+            for row in index.cost_by_model(cutoff_ms(days))
+        ]
+
     runs = mlflow_store.list_runs_in_range(days=days)
     
     model_stats = {}
@@ -122,12 +146,15 @@ def get_cost_by_model(range: str = "7d"):
 @router.get("/confidence_distribution", response_model=ConfidenceDistributionResponse)
 def get_confidence_distribution(time_range: str = Query("7d", alias="range")):
     days = _get_days(time_range)
-    runs = mlflow_store.list_runs_in_range(days=days)
-    
-    confidences = [r.confidence for r in runs if r.confidence is not None]
-    
-    # 10 bins: 0.0-0.1, ... 0.9-1.0
-    bins = [0] * 10
+    index = mlflow_store.run_index()
+    if index is not None:
+        bins = index.confidence_histogram(cutoff_ms(days), bins=10)
+        confidences = []
+    else:
+        runs = mlflow_store.list_runs_in_range(days=days)
+        confidences = [r.confidence for r in runs if r.confidence is not None]
+        # 10 bins: 0.0-0.1, ... 0.9-1.0
+        bins = [0] * 10
     
     for c in confidences:
         # clamp to 0-1
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Query, Body
+from fastapi import APIRouter, HTTPException, Query, Body, Request, Response
 from typing import List, Optional
 from app.schemas import Prompt, CreatePromptRequest, CreateVersionRequest, RenderPromptRequest
 from app.services.prompts import prompts_service
@@ -10,10 +10,18 @@ def list_prompts():
     return prompts_service.list_prompts()
 
 @router.get("/{slug}", response_model=Prompt)
-def get_prompt(slug: str):
+def get_prompt(slug: str, request: Request, response: Response):
     prompt = prompts_service.get_prompt(slug)
     if not prompt:
         raise HTTPException(status_code=404, detail="Prompt not found")
+
+    # Conditional GET: clients revalidate their cached copy with If-None-Match
+    etag = prompts_service.etag(prompt)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [t.strip() for t in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
     return prompt
 
 @router.post("", response_model=Prompt)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from app.schemas import (
     ReplayRequest, ReplayResponse, 
     RunStagesResponse, RunStageArtifacts, 
@@ -15,15 +15,38 @@ import json
 # sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
 
 from app.guardrails_wrapper import validate_input, validate_output
+from app.settings import settings
+from app.services import profiling
 
 router = APIRouter()
 
+
+def _llm_client(model: str):
+    """
+    OpenAI-compatible client for a replay model, or None to use the canned mock.
+    With LLM_BASE_URL set every model (including 'mock-llm') goes to that server.
+    """
+    from openai import OpenAI
+
+    if settings.LLM_BASE_URL:
+        return OpenAI(api_key=os.getenv("OPENAI_API_KEY") or "mock-key", base_url=settings.LLM_BASE_URL)
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key or model == "mock-llm":
+        return None
+    return OpenAI(api_key=api_key, base_url="https://api.x.ai/v1" if "grok" in model else None)
+
 # ---------------- OLD REPLAY ENDPOINT (Keep for backward compat) ----------------
 
 @router.post("", response_model=ReplayResponse)
-def create_replay(request: ReplayRequest):
-    from openai import OpenAI
-    
+def create_replay(request: ReplayRequest, http_request: Request):
+    with profiling.profile_request(http_request) as prof:
+        response = _create_replay(request)
+        prof.set_run(response.new_run_id)
+    return response
+
+
+def _create_replay(request: ReplayRequest) -> ReplayResponse:
     # --- Guardrails Input Check ---
     input_val = validate_input(request.prompt or "")
     if input_val.failed and input_val.metadata.get("guardrails_ai") == "failed":
@@ -40,16 +63,15 @@ def create_replay(request: ReplayRequest):
     # Use validated text
     prompt = input_val.validated_text if input_val.validated_text else (request.prompt or "")
 
-    # Try Real Replay if API Key is present
-    api_key = os.getenv("OPENAI_API_KEY")
+    # Try Real Replay if API Key (or a base-URL override) is present
+    client = _llm_client(request.model)
     output_text = ""
     latency = 0
     cost = 0.0
     confidence = 0.0
     
-    if api_key and request.model not in ["mock-llm"]:
+    if client is not None:
         try:
-            client = OpenAI(api_key=api_key, base_url="https://api.x.ai/v1" if "grok" in request.model else None)
             start_time = time.time()
             
             # Simple system prompt for consistency
@@ -137,12 +159,57 @@ def create_replay(request: ReplayRequest):
 
 # ---------------- NEW STAGE-BASED REPLAY ----------------
 
+def _recompute_context(stages: dict, retrieval: bool, kpi: bool) -> dict:
+    """
+    Re-run retrieval and/or KPI stages through the memoized context pipeline.
+    Updates `stages` in place; returns cache.<step> tags (hit/miss).
+    """
+    from app.api import chat as chat_api
+
+    pipeline = chat_api.context_pipeline
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="Retrieval/KPI data not loaded")
+
+    ctx = chat_api.PipelineContext()
+    result = pipeline.run({
+        "question": stages.get("user_question") or "",
+        "top_k": len(stages.get("retrieved_sources") or []) or 3,
+        "retrieval_enabled": retrieval,
+        "kpi_enabled": kpi,
+    }, ctx)
+    if not result.success:
+        raise HTTPException(status_code=500, detail=f"Recompute failed: {'; '.join(result.errors)}")
+
+    if retrieval:
+        stages["retrieved_sources"] = result.output["retrieval"]
+    if kpi:
+        stages["kpi_summary"] = {"summary": result.output["kpi_summary"]}
+
+    return {
+        f"cache.{step['step_name']}": (step.get("metadata") or {}).get("cache", "off")
+        for step in ctx.metadata.get("step_runs", [])
+    }
+
+
+def _build_prompt(stages: dict) -> str:
+    from app.api import chat as chat_api
+
+    kpi = stages.get("kpi_summary")
+    if isinstance(kpi, dict):
+        kpi = kpi.get("summary") or json.dumps(kpi, indent=2)
+    return chat_api.build_prompt_packet(
+        stages.get("user_question") or "",
+        kpi or "",
+        stages.get("retrieved_sources") or [],
+    )
+
+
 @router.get("/runs/{run_id}/stages", response_model=RunStagesResponse)
 def get_run_stages(run_id: str):
     """
     Fetch all stage artifacts for a given run to populate the Replay Studio.
     """
-    run = mlflow_store.get_run(run_id)
+    run = mlflow_store.get_run(run_id, include=["metrics"])
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
         
@@ -184,7 +251,14 @@ def get_run_stages(run_id: str):
 
 
 @router.post("/staged", response_model=ReplayStagedResponse)
-def create_staged_replay(req: ReplayStagedRequest):
+def create_staged_replay(req: ReplayStagedRequest, http_request: Request):
+    with profiling.profile_request(http_request) as prof:
+        response = _create_staged_replay(req)
+        prof.set_run(response.new_run_id)
+    return response
+
+
+def _create_staged_replay(req: ReplayStagedRequest) -> ReplayStagedResponse:
     """
     Smart Replay:
     1. Load source stages
@@ -220,7 +294,17 @@ def create_staged_replay(req: ReplayStagedRequest):
         current_stages["llm_response"] = req.overrides.llm_response
 
     # 4. Conditional Recomputation
-    
+
+    # --- Stages 1-2: Retrieval / KPI (memoized steps) ---
+    recompute_retrieval = req.replay_from_stage <= 1 and req.options.recompute_retrieval
+    recompute_kpi = req.replay_from_stage <= 2 and req.options.recompute_kpi
+    cache_tags = {}
+    if recompute_retrieval or recompute_kpi:
+        cache_tags = _recompute_context(current_stages, recompute_retrieval, recompute_kpi)
+        # Rebuild the prompt from the new context unless it was edited directly
+        if req.overrides.prompt_packet is None:
+            current_stages["prompt_packet"] = _build_prompt(current_stages)
+
     # --- Guardrails: Check Prompt Input ---
     # Only if we are generating response (Stage <= 3)
     if req.replay_from_stage <= 3:
@@ -237,19 +321,10 @@ def create_staged_replay(req: ReplayStagedRequest):
         if val_res.validated_text:
              current_stages["prompt_packet"] = val_res.validated_text
 
-    # --- Stage 1: Retrieval ---
-    if req.replay_from_stage <= 1 and req.options.recompute_retrieval:
-        pass 
-
-    # --- Stage 2: KPI ---
-    if req.replay_from_stage <= 2 and req.options.recompute_kpi:
-        pass
-
     # --- Stage 3: Prompt Assembly ---
     # Assuming prompt_packet in current_stages is final
     
     # --- Stage 4: LLM Call ---
-    api_key = os.getenv("OPENAI_API_KEY")
     latency = 0.0
     cost = 0.0
     
@@ -257,10 +332,9 @@ def create_staged_replay(req: ReplayStagedRequest):
         # We need to call the LLM
         prompt_to_send = current_stages["prompt_packet"] or ""
         
-        if api_key and req.model != "mock-llm":
+        client = _llm_client(req.model)
+        if client is not None:
             try:
-                from openai import OpenAI
-                client = OpenAI(api_key=api_key, base_url="https://api.x.ai/v1" if "grok" in req.model else None)
                 start_time = time.time()
                 
                 messages = [
@@ -382,6 +456,7 @@ def create_staged_replay(req: ReplayStagedRequest):
         "replay_from_stage": str(req.replay_from_stage),
         "recompute_retrieval": str(req.options.recompute_retrieval),
         "recompute_kpi": str(req.options.recompute_kpi),
+        **cache_tags,
     }
 
     new_run_id = mlflow_store.log_staged_run(
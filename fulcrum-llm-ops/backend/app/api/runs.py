@@ -1,8 +1,18 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from fastapi.responses import PlainTextResponse
-from app.mlflow_store import mlflow_store
-from app.schemas import RunsResponse, RunDetail, CreateRunRequest, UpdateRunRequest, LogArtifactRequest
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
+from fastapi.responses import Response, StreamingResponse
+from app.mlflow_store import mlflow_store, parse_include
+from app.services.artifact_reader import parse_range
+from app.schemas import (
+    RunsResponse, RunListItem, RunDetail, RunTrace, RunPreview, ArtifactItem, ConfidenceExplanation,
+    CreateRunRequest, UpdateRunRequest,
+    LogArtifactRequest, RunBatchRequest, IngestRequest, IngestResponse,
+)
 from app.api.deps import verify_api_key
+from email.utils import formatdate
+from typing import List
+import mimetypes
+
+_TEXT_SUFFIXES = (".txt", ".md", ".log", ".csv", ".py", ".yaml", ".yml", ".ini")
 
 router = APIRouter()
 
@@ -13,47 +23,150 @@ def get_runs(
     model: str = None,
     status: str = Query(None, description="Run status filter (success|failed|running|pending)"),
     min_confidence: float = Query(None, ge=0, le=1),
+    sort: str = Query("started_at", description="started_at|latency_ms|cost_usd|confidence"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    cursor: str = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
 ):
-    # Fetch all runs first (unfiltered by status from MLflow) so we can
-    # build full model/status lists, then apply the status filter.
-    all_runs = mlflow_store.list_runs(query=q, model=model, min_confidence=min_confidence)
-
-    # Unique models and statuses from the full set
-    unique_models = sorted(set(r.model for r in all_runs if r.model))
-    unique_statuses = sorted(set(r.status for r in all_runs))
-
-    # Apply status filter client-side so the dropdown always has all options
-    if status:
-        filtered = [r for r in all_runs if r.status == status]
-    else:
-        filtered = all_runs
-
-    return RunsResponse(
-        runs=filtered,
-        models=unique_models,
-        statuses=unique_statuses,
-    )
+    try:
+        page = mlflow_store.list_runs_page(
+            query=q,
+            model=model,
+            status=status,
+            min_confidence=min_confidence,
+            sort=sort,
+            order=order,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return RunsResponse(**page)
+
+
+@router.get("/search", response_model=List[RunListItem])
+def search_runs(
+    q: str = Query(..., min_length=1, description="Words to find in questions, prompts and responses"),
+    model: str = None,
+    status: str = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Ranked full-text search across all runs, each with a highlighted snippet."""
+    return mlflow_store.search_runs(q, model=model, status=status, limit=limit)
 
 
 @router.get("/{run_id}", response_model=RunDetail)
-def get_run_details(run_id: str):
-    run = mlflow_store.get_run(run_id)
+def get_run_details(
+    run_id: str,
+    include: str = Query(None, description="Comma-separated sections: metrics,artifacts,preview,explanation (default: all)"),
+):
+    try:
+        sections = parse_include(include)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    run = mlflow_store.get_run(run_id, include=sections)
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
     return run
 
 
+# Heavy sections on their own, for tabs that load lazily
+
+@router.get("/{run_id}/artifacts", response_model=List[ArtifactItem])
+def get_run_artifacts(run_id: str):
+    run = mlflow_store.get_run(run_id, include=["artifacts"])
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run.artifacts
+
+
+@router.get("/{run_id}/preview", response_model=RunPreview)
+def get_run_preview(run_id: str):
+    run = mlflow_store.get_run(run_id, include=["preview"])
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return RunPreview(input_preview=run.input_preview or {}, output_preview=run.output_preview or {})
+
+
+@router.get("/{run_id}/explanation", response_model=ConfidenceExplanation)
+def get_run_explanation(run_id: str):
+    run = mlflow_store.get_run(run_id, include=["explanation"])
+    if not run or not run.confidence_explanation:
+        raise HTTPException(status_code=404, detail="Confidence explanation not found")
+    return run.confidence_explanation
+
+
+@router.get("/{run_id}/trace", response_model=RunTrace)
+def get_run_trace(run_id: str):
+    """Span tree for the waterfall view."""
+    trace = mlflow_store.get_trace(run_id)
+    if not trace:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
+
+
+def _artifact_media_type(path: str) -> str:
+    lower = path.lower()
+    if lower.endswith(".json"):
+        return "application/json"
+    if lower.endswith(_TEXT_SUFFIXES):
+        return "text/plain; charset=utf-8"
+    return mimetypes.guess_type(lower)[0] or "application/octet-stream"
+
+
 @router.get("/{run_id}/artifact")
-def get_artifact(run_id: str, path: str):
-    """Return artifact content as plain text (not JSON-wrapped)."""
+def get_artifact(
+    run_id: str,
+    path: str,
+    request: Request,
+    max_bytes: int = Query(None, ge=1, description="Serve at most this many bytes (previews)"),
+):
+    """
+    Stream artifact content as-is (not JSON-wrapped), in chunks. Supports a
+    single `Range: bytes=...`, conditional GETs via ETag, and `max_bytes`
+    previews; X-Artifact-Size always carries the full size.
+    """
     try:
-        content = mlflow_store.get_artifact_content(run_id, path)
-        media = "application/json" if path.lower().endswith(".json") else "text/plain"
-        return PlainTextResponse(content=content, media_type=media)
-    except ValueError as e:
-        raise HTTPException(status_code=415, detail=str(e))
+        body = mlflow_store.open_artifact(run_id, path)
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Artifact not found: {str(e)}")
+    if body is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    etag = f'"{body.etag}"'
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "X-Artifact-Size": str(body.size)}
+    if body.last_modified is not None:
+        headers["Last-Modified"] = formatdate(body.last_modified, usegmt=True)
+    if etag in request.headers.get("if-none-match", ""):
+        body.close()
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if request.headers.get("if-range", etag) == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), body.size)
+        except ValueError:
+            body.close()
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{body.size}"})
+
+    status = 200
+    start, end = byte_range or (0, body.size - 1)
+    if byte_range is not None:
+        status = 206
+        if max_bytes is not None:
+            end = min(end, start + max_bytes - 1)
+        headers["Content-Range"] = f"bytes {start}-{end}/{body.size}"
+    elif max_bytes is not None and max_bytes < body.size:
+        end = max_bytes - 1
+        headers["X-Artifact-Truncated"] = "true"
+    headers["Content-Length"] = str(max(end - start + 1, 0))
+
+    return StreamingResponse(
+        body.iter_bytes(start, end),
+        status_code=status,
+        media_type=_artifact_media_type(path),
+        headers=headers,
+    )
 
 
 # ----------------- WRITE ENDPOINTS -----------------
@@ -101,3 +214,33 @@ def log_artifact(run_id: str, request: LogArtifactRequest):
         return {"status": "logged"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/ingest", response_model=IngestResponse, dependencies=[Depends(verify_api_key)])
+def ingest_runs(request: IngestRequest):
+    """
+    Bulk upload of complete runs from background clients (including spool
+    replays). Runs already ingested under the same client_run_id are skipped,
+    so clients can safely resend.
+    """
+    run_ids, duplicates = {}, 0
+    try:
+        for record in request.runs:
+            run_id, created = mlflow_store.ingest_run(record)
+            run_ids[record.client_run_id] = run_id
+            duplicates += 0 if created else 1
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return IngestResponse(ingested=len(run_ids) - duplicates, duplicates=duplicates, run_ids=run_ids)
+
+
+@router.post("/{run_id}/batch", dependencies=[Depends(verify_api_key)])
+def log_run_batch(run_id: str, request: RunBatchRequest):
+    """Bulk write for buffered clients: params, metrics, tags, artifacts and final status in one call."""
+    try:
+        mlflow_store.log_run_batch(run_id, request)
+        return {"status": "logged", "artifacts": len(request.artifacts)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -8,25 +8,53 @@ from pathlib import Path
 root_path = Path(__file__).parent.parent.parent.parent.resolve()
 sys.path.append(str(root_path))
 
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.settings import settings
 from app.api import runs, replay, metrics, evaluations, compare, guardrails, chat, alerts
+from app.services import http_metrics
 
 app = FastAPI(title="Fulcrum LLM Ops API")
 
 @app.on_event("startup")
 def startup_event():
+    from app.mlflow_store import mlflow_store
+    mlflow_store.start_index()
+    if chat.obs is not None:
+        # /chat runs are written by the observability layer, not MLflowStore
+        chat.obs.add_run_listener(mlflow_store.reindex)
+
     if os.getenv("ALERTS_DEMO_MODE", "false").lower() == "true":
         from app.services.alerts import alerts_service
         alerts_service.seed_demo_alerts()
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template (/runs/{run_id}), not raw path, to bound cardinality
+        route = request.scope.get("route")
+        http_metrics.observe_request(
+            request.method,
+            getattr(route, "path", "unmatched"),
+            status,
+            time.perf_counter() - start,
+        )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Read by the artifact viewer for partial and preview responses
+    expose_headers=["Content-Range", "ETag", "X-Artifact-Size", "X-Artifact-Truncated"],
 )
 
 # Layer 2 core
@@ -49,7 +77,20 @@ app.include_router(chat.router, prefix="/chat", tags=["chat"])
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
+    # Provider circuit breakers live in the root app's resilience layer
+    breakers = chat.breaker_states() if chat.breaker_states else {}
+    degraded = any(b["state"] != "closed" for b in breakers.values())
+    return {
+        "status": "degraded" if degraded else "ok",
+        "circuit_breakers": breakers,
+    }
+
+
+@app.get("/metrics/prometheus", include_in_schema=False)
+def prometheus_metrics():
+    """Scrape endpoint: live request, stage, provider, cache and queue metrics."""
+    payload, content_type = http_metrics.render_latest()
+    return Response(content=payload, media_type=content_type)
 
 
 @app.get("/mlflow-info")
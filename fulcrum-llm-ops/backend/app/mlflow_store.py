@@ -1,13 +1,22 @@
 import mlflow
+from mlflow.entities import Metric, Param, RunTag
 from mlflow.tracking import MlflowClient
 from app.settings import settings
 from app.schemas import RunListItem, RunDetail, ArtifactItem
 from app.services.confidence import compute_confidence
-from typing import List, Optional
+from app.services.artifact_reader import ArtifactStore, default_cas_dir
+from app.services.artifact_reader import ArtifactReader
+from app.services.run_cache import RunDetailCache
+from app.services.run_index import SORT_KEYS, RunIndex, decode_cursor, encode_cursor, row_from_run, sort_value
+from typing import FrozenSet, Iterable, List, Optional
 import datetime
 import json
+import logging
+import os
 import re
 
+logger = logging.getLogger(__name__)
+
 # Map frontend status names to MLflow native status strings
 _STATUS_TO_MLFLOW = {
     "success": "FINISHED",
@@ -15,19 +24,83 @@ _STATUS_TO_MLFLOW = {
     "running": "RUNNING",
 }
 
+# Safe to quote into an MLflow filter string (matches IngestRun.client_run_id)
+_CLIENT_RUN_ID_RE = re.compile(r"^[A-Za-z0-9_.:-]{1,128}$")
+# Set once an ingested run is fully written; a resend finishes a run without it
+_INGEST_COMPLETE_TAG = "client_run_complete"
+
+# MLflow log_batch limits
+_MAX_METRICS_PER_BATCH = 1000
+_MAX_PARAMS_TAGS_PER_BATCH = 100
+
 _MLFLOW_TO_STATUS = {
     "FINISHED": "success",
     "FAILED": "failed",
     "RUNNING": "running",
 }
 
+# Optional parts of a RunDetail and the fields each fills. The header (the
+# RunListItem fields) comes from get_run alone and is always present.
+RUN_SECTIONS = {
+    "metrics": ("params", "metrics", "tags", "confidence_components"),
+    "artifacts": ("artifacts",),
+    "preview": ("input_preview", "output_preview"),
+    "explanation": ("confidence_explanation",),
+}
+ALL_SECTIONS = frozenset(RUN_SECTIONS)
+
+
+def parse_include(include: Optional[str]) -> FrozenSet[str]:
+    """Sections named in an ?include= value; None or empty means all of them."""
+    if not include:
+        return ALL_SECTIONS
+    sections = frozenset(s.strip() for s in include.split(",") if s.strip())
+    unknown = sections - ALL_SECTIONS
+    if unknown:
+        raise ValueError(f"Unknown include section(s): {', '.join(sorted(unknown))}; expected {', '.join(RUN_SECTIONS)}")
+    return sections
+
+
+def _without_sections(detail: RunDetail, sections: FrozenSet[str]) -> RunDetail:
+    for section in ALL_SECTIONS - sections:
+        for field in RUN_SECTIONS[section]:
+            setattr(detail, field, None)
+    return detail
+
 
 class MLflowStore:
     def __init__(self):
         mlflow.set_tracking_uri(settings.MLFLOW_TRACKING_URI)
         self.client = MlflowClient()
         self.experiment_name = settings.MLFLOW_EXPERIMENT_NAME
+        cas_dir = settings.ARTIFACT_CAS_DIR or default_cas_dir(settings.MLFLOW_TRACKING_URI)
+        self.cas = ArtifactStore(
+            cas_dir if settings.ARTIFACT_CAS_ENABLED else None,
+            min_bytes=settings.ARTIFACT_CAS_MIN_BYTES,
+        )
+        self.artifacts = ArtifactReader(
+            self.client,
+            self.cas,
+            cache_bytes=settings.ARTIFACT_READ_CACHE_BYTES,
+            local_fast_path=settings.ARTIFACT_LOCAL_FAST_PATH,
+            max_workers=settings.ARTIFACT_FETCH_WORKERS,
+        )
         self._ensure_experiment()
+        self.run_cache = RunDetailCache(
+            max_entries=settings.RUN_DETAIL_CACHE_MAX_ENTRIES,
+            active_ttl_s=settings.RUN_DETAIL_CACHE_ACTIVE_TTL_SECONDS,
+            finished_ttl_s=settings.RUN_DETAIL_CACHE_FINISHED_TTL_SECONDS,
+        )
+        self.index = (
+            RunIndex(
+                settings.RUN_INDEX_PATH,
+                refresh_seconds=settings.RUN_INDEX_REFRESH_SECONDS,
+                text_loader=self._run_text,
+                text_max_chars=settings.RUN_INDEX_TEXT_MAX_CHARS,
+            )
+            if settings.RUN_INDEX_ENABLED
+            else None
+        )
 
     def _ensure_experiment(self):
         exp = self.client.get_experiment_by_name(self.experiment_name)
@@ -43,6 +116,81 @@ class MLflowStore:
         self._ensure_experiment()
         return self.experiment_id
 
+    # ------------------------------------------------------------------
+    # Run index
+    # ------------------------------------------------------------------
+    def start_index(self):
+        """Rebuild the run index from MLflow in the background (called on startup)."""
+        if self.index is not None:
+            self.index.start_rebuild(self.client, self.experiment_id)
+
+    def run_index(self) -> Optional[RunIndex]:
+        """The run index once it is rebuilt and caught up, else None (query MLflow)."""
+        if self.index is None or not self.index.ready:
+            return None
+        try:
+            self.index.refresh(self.client, self.experiment_id, self._experiment_dir())
+        except Exception as e:
+            logger.warning(f"Run index refresh failed: {e}")
+        return self.index
+
+    def reindex(self, run_id: str):
+        """After a write: drop the run's cached detail and re-project it into the index."""
+        if not run_id:
+            return
+        self._invalidate(run_id)
+        if self.index is None:
+            return
+        try:
+            run = self.client.get_run(run_id)
+            if run.info.experiment_id == str(self.experiment_id):
+                self.index.upsert_run(run)
+        except Exception as e:
+            logger.warning(f"Failed to index run {run_id}: {e}")
+
+    def _invalidate(self, run_id: str):
+        """Drop everything cached for a run the store just wrote to."""
+        self.run_cache.invalidate(run_id)
+        self.artifacts.invalidate_run(run_id)
+
+    def _run_text(self, run) -> dict:
+        """Searchable text of a run: user question, prompt packet, LLM response."""
+        run_id = run.info.run_id
+        question = run.data.params.get("user_question")
+        if not question:
+            question = self.get_text_artifact(run_id, "user_question.txt") or self.get_text_artifact(run_id, "user_input.txt")
+        return {
+            "question": question,
+            "prompt": self.get_text_artifact(run_id, "prompt_packet.txt"),
+            "response": self.get_text_artifact(run_id, "llm_response.txt"),
+        }
+
+    def _experiment_dir(self) -> Optional[str]:
+        uri = settings.MLFLOW_TRACKING_URI
+        if not uri.startswith("file:"):
+            return None
+        return os.path.join(uri.replace("file:", ""), str(self.experiment_id))
+
+    @staticmethod
+    def _item_from_row(row: dict) -> RunListItem:
+        return RunListItem(
+            run_id=row["run_id"],
+            status=row["status"],
+            model=row["model"],
+            latency_ms=row["latency_ms"],
+            cost_usd=row["cost_usd"],
+            confidence=row["confidence"],
+            confidence_label=row["confidence_label"],
+            parse_success=row["parse_success"] or 0,
+            question=row.get("question"),
+            snippet=row.get("snippet"),
+            started_at=(
+                datetime.datetime.fromtimestamp(row["started_at"] / 1000.0)
+                if row["started_at"]
+                else None
+            ),
+        )
+
     # ------------------------------------------------------------------
     # List runs
     # ------------------------------------------------------------------
@@ -54,6 +202,13 @@ class MLflowStore:
         min_confidence: float = None,
         limit: int = 1000,
     ) -> List[RunListItem]:
+        index = self.run_index()
+        if index is not None:
+            rows = index.query(
+                query=query, model=model, status=status, min_confidence=min_confidence, limit=limit
+            )
+            return [self._item_from_row(row) for row in rows]
+
         conditions = []
 
         # Status: convert frontend name -> MLflow native name
@@ -112,6 +267,7 @@ class MLflowStore:
                     cost_usd=cost,
                     confidence=confidence,
                     confidence_label=confidence_label,
+                    question=params.get("user_question"),
                     started_at=(
                         datetime.datetime.fromtimestamp(run.info.start_time / 1000.0)
                         if run.info.start_time
@@ -122,11 +278,94 @@ class MLflowStore:
 
         return results
 
+    def list_runs_page(
+        self,
+        query: str = None,
+        model: str = None,
+        status: str = None,
+        min_confidence: float = None,
+        sort: str = "started_at",
+        order: str = "desc",
+        cursor: str = None,
+        limit: int = 100,
+    ) -> dict:
+        """
+        One page of runs ordered by (sort, run_id), with the total number of
+        matches, the cursor of the next page (None on the last one) and the
+        model/status values among runs matching every filter except status.
+        Raises ValueError for an unknown sort or a cursor from another order.
+        """
+        after = decode_cursor(cursor, sort, order) if cursor else None
+        filters = {"query": query, "model": model, "min_confidence": min_confidence}
+
+        index = self.run_index()
+        if index is not None:
+            rows = index.page(sort=sort, order=order, after=after, limit=limit + 1, status=status, **filters)
+            if query:
+                snippets = index.snippets(query, [row["run_id"] for row in rows])
+                rows = [{**row, "snippet": snippets.get(row["run_id"])} for row in rows]
+            total = index.count(status=status, **filters)
+            models = index.distinct("model", **filters)
+            statuses = index.distinct("status", **filters)
+        else:
+            # No index yet: search MLflow (capped at 1000 runs) and page in memory
+            if sort not in SORT_KEYS or order not in ("asc", "desc"):
+                raise ValueError(f"Unsupported sort: {sort} {order}")
+            items = self.list_runs(**filters)
+            models = sorted(set(r.model for r in items if r.model))
+            statuses = sorted(set(r.status for r in items))
+            rows = [
+                {**r.dict(), "started_at": round(r.started_at.timestamp() * 1000) if r.started_at else 0}
+                for r in items
+                if not status or r.status == status
+            ]
+            rows.sort(key=lambda r: (sort_value(sort, r), r["run_id"]), reverse=order == "desc")
+            total = len(rows)
+            if after is not None:
+                after = tuple(after)
+
+                def past(r):
+                    key = (sort_value(sort, r), r["run_id"])
+                    return key < after if order == "desc" else key > after
+
+                rows = [r for r in rows if past(r)]
+            rows = rows[:limit + 1]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(sort, order, sort_value(sort, last), last["run_id"])
+
+        return {
+            "runs": [self._item_from_row(row) for row in rows],
+            "total": total,
+            "next_cursor": next_cursor,
+            "models": models,
+            "statuses": statuses,
+        }
+
+    def search_runs(self, text: str, model: str = None, status: str = None, limit: int = 20) -> List[RunListItem]:
+        """
+        Full-text search over run questions, prompts and responses, best match
+        first, with a highlighted snippet. Without the run index (or FTS5) this
+        degrades to the substring filter of `list_runs`, newest first.
+        """
+        index = self.run_index()
+        if index is not None and index.fts:
+            rows = index.search(text, limit=limit, model=model, status=status)
+            return [self._item_from_row(row) for row in rows]
+        return self.list_runs(query=text, model=model, status=status, limit=limit)
+
     def list_runs_in_range(
         self,
         days: float,  # Can be 1 for 24h
         limit: int = 10000
     ) -> List[RunListItem]:
+        index = self.run_index()
+        if index is not None:
+            return [self._item_from_row(row) for row in index.in_range(days, limit=limit)]
+
         # Calculate cutoff timestamp in ms
         cutoff_dt = datetime.datetime.now() - datetime.timedelta(days=days)
         cutoff_ms = int(cutoff_dt.timestamp() * 1000)
@@ -182,39 +421,55 @@ class MLflowStore:
     # ------------------------------------------------------------------
     # Artifact helpers
     # ------------------------------------------------------------------
-    def _list_artifacts_recursive(self, run_id: str, path: str = None) -> List[ArtifactItem]:
-        artifacts = []
+    def _list_artifacts_recursive(self, run_id: str) -> List[ArtifactItem]:
+        # One local walk on file: stores; otherwise each tree level is listed concurrently
         try:
-            items = self.client.list_artifacts(run_id, path)
+            paths = self.artifacts.list_files(run_id)
         except Exception:
             return []
 
-        for item in items:
-            if item.is_dir:
-                artifacts.extend(self._list_artifacts_recursive(run_id, item.path))
-            else:
-                art_type = "file"
-                lower_path = item.path.lower()
-                if lower_path.endswith(".json"):
-                    art_type = "json"
-                elif lower_path.endswith(
-                    (".txt", ".md", ".log", ".csv", ".py", ".yaml", ".yml", ".ini")
-                ):
-                    art_type = "text"
-
-                artifacts.append(
-                    ArtifactItem(
-                        name=item.path.split("/")[-1],
-                        path=item.path,
-                        type=art_type,
-                    )
+        artifacts = []
+        for path in paths:
+            art_type = "file"
+            lower_path = path.lower()
+            if lower_path.endswith(".json"):
+                art_type = "json"
+            elif lower_path.endswith(
+                (".txt", ".md", ".log", ".csv", ".py", ".yaml", ".yml", ".ini")
+            ):
+                art_type = "text"
+
+            artifacts.append(
+                ArtifactItem(
+                    name=path.split("/")[-1],
+                    path=path,
+                    type=art_type,
                 )
+            )
         return artifacts
 
     # ------------------------------------------------------------------
     # Single run detail
     # ------------------------------------------------------------------
-    def get_run(self, run_id: str) -> Optional[RunDetail]:
+    def get_run(self, run_id: str, include: Optional[Iterable[str]] = None) -> Optional[RunDetail]:
+        """
+        Assembled run view, served from the run cache when possible. `include`
+        limits the optional sections (see RUN_SECTIONS) to build; fields of the
+        others are None. Only complete details are cached.
+        """
+        sections = ALL_SECTIONS if include is None else frozenset(include)
+        detail = self.run_cache.get(run_id)
+        if detail is not None:
+            return _without_sections(detail, sections)
+        if sections != ALL_SECTIONS:
+            return self._build_run_detail(run_id, sections)
+        generation = self.run_cache.generation
+        detail = self._build_run_detail(run_id, sections)
+        if detail is not None:
+            self.run_cache.put(run_id, detail, generation)
+        return detail
+
+    def _build_run_detail(self, run_id: str, sections: FrozenSet[str] = ALL_SECTIONS) -> Optional[RunDetail]:
         try:
             run = self.client.get_run(run_id)
         except Exception:
@@ -229,15 +484,11 @@ class MLflowStore:
         cost = metrics.get("cost_usd")
         confidence = metrics.get("confidence")
         confidence_label = tags.get("confidence_label")
-        confidence_components = self.get_json_artifact(run_id, "confidence_components.json") or {}
-        confidence_explanation = self.get_json_artifact(run_id, "confidence_explanation.json")
-        
+
         run_model = params.get("model_name") or params.get("model") or "unknown"
 
         mapped_status = _MLFLOW_TO_STATUS.get(run.info.status, "pending")
 
-        artifacts = self._list_artifacts_recursive(run_id)
-
         # Try to resolve main inputs/outputs for preview
         input_preview = {}
         output_preview = {}
@@ -247,24 +498,48 @@ class MLflowStore:
             input_preview["user_question"] = params.get("user_question")
         if params.get("prompt"):
             input_preview["prompt"] = params.get("prompt")
-            
+
+        # Every read below is independent, so they go out together (with the
+        # tree listing) and the detail costs about the slowest one. The input
+        # and parsed-forecast reads are speculative; unused results are dropped.
+        # Sections that were not asked for cost no I/O at all.
+        self.artifacts.prime(run_id, run.info.artifact_uri)
+        calls = {}
+        if "metrics" in sections:
+            calls["components"] = lambda: self.get_json_artifact(run_id, "confidence_components.json")
+        if "explanation" in sections:
+            calls["explanation"] = lambda: self.get_json_artifact(run_id, "confidence_explanation.json")
+        if "artifacts" in sections:
+            calls["artifacts"] = lambda: self._list_artifacts_recursive(run_id)
+        if "preview" in sections:
+            calls["response"] = lambda: self.get_text_artifact(run_id, "llm_response.txt")
+            calls["parsed"] = lambda: self.get_json_artifact(run_id, "parsed_forecast.json")
+            if not input_preview:
+                calls["prompt_packet"] = lambda: self.get_text_artifact(run_id, "prompt_packet.txt")
+                calls["user_question"] = lambda: self.get_text_artifact(run_id, "user_question.txt")
+        fetched = self.artifacts.fetch_many(run_id, calls) if calls else {}
+
+        confidence_components = fetched.get("components") or {}
+        confidence_explanation = fetched.get("explanation")
+        artifacts = fetched.get("artifacts") or []
+
         # Try finding key text artifacts if params are empty
-        if not input_preview:
-            prompt_pkt = self.get_text_artifact(run_id, "prompt_packet.txt")
+        if "preview" in sections and not input_preview:
+            prompt_pkt = fetched["prompt_packet"]
             if prompt_pkt:
                 input_preview["prompt_packet"] = prompt_pkt[:2000] # Truncate for preview
             else:
-                q_txt = self.get_text_artifact(run_id, "user_question.txt")
+                q_txt = fetched["user_question"]
                 if q_txt:
                     input_preview["user_question"] = q_txt
         
         # Output: artifacts
         # Try llm_response.txt
-        llm_resp = self.get_text_artifact(run_id, "llm_response.txt")
+        llm_resp = fetched.get("response")
         if llm_resp:
             output_preview["response"] = llm_resp
             # Try to grab json too
-            parsed = self.get_json_artifact(run_id, "parsed_forecast.json")
+            parsed = fetched["parsed"]
             if parsed:
                 output_preview["parsed"] = parsed
         else:
@@ -272,7 +547,7 @@ class MLflowStore:
             # They stored output in artifact too?
             pass
 
-        return RunDetail(
+        detail = RunDetail(
             run_id=run_id,
             status=mapped_status,
             model=run_model,
@@ -294,22 +569,29 @@ class MLflowStore:
             input_preview=input_preview,
             output_preview=output_preview,
         )
+        return _without_sections(detail, sections)
 
-    # ------------------------------------------------------------------
-    # Artifact content
-    # ------------------------------------------------------------------
     # ------------------------------------------------------------------
     # Artifact content
     # ------------------------------------------------------------------
     def get_artifact_content(self, run_id: str, path: str) -> str:
-        # Check cache or download
+        # Read in place (file: stores) or via the byte-bounded cache; CAS references are resolved transparently
         try:
-            local_path = self.client.download_artifacts(run_id, path)
-            with open(local_path, "r", encoding="utf-8") as f:
-                return f.read()
+            return self.artifacts.read(run_id, path)
         except Exception:
             return None
 
+    def open_artifact(self, run_id: str, path: str):
+        """Artifact for streaming (see ArtifactBody), or None if it does not exist."""
+        return self.artifacts.open(run_id, path)
+
+    def _log_text(self, run_id: str, text: str, name: str):
+        """Write a text artifact through the content-addressed store."""
+        self.client.log_text(run_id, self.cas.encode(text), name)
+
+    def _log_dict(self, run_id: str, data, name: str):
+        self._log_text(run_id, json.dumps(data, indent=2), name)
+
     def get_json_artifact(self, run_id: str, path: str) -> Optional[dict]:
         content = self.get_artifact_content(run_id, path)
         if content:
@@ -322,6 +604,10 @@ class MLflowStore:
     def get_text_artifact(self, run_id: str, path: str) -> Optional[str]:
         return self.get_artifact_content(run_id, path)
 
+    def get_trace(self, run_id: str) -> Optional[dict]:
+        """Span tree written by the observability layer as trace.json."""
+        return self.get_json_artifact(run_id, "trace.json")
+
     # ------------------------------------------------------------------
     # Replay
     # ------------------------------------------------------------------
@@ -349,14 +635,14 @@ class MLflowStore:
                 mlflow.set_tag("run_type", "replay")
 
                 if prompt:
-                    mlflow.log_text(prompt, "prompt_override.txt")
+                    self._log_text(run.info.run_id, prompt, "prompt_override.txt")
 
                 mlflow.log_metric("latency_ms", latency)
                 mlflow.log_metric("cost_usd", cost)
                 mlflow.log_metric("confidence", confidence)
                 mlflow.log_metric("parse_success", parse_success)
 
-                mlflow.log_text(output_text, "llm_response.txt")
+                self._log_text(run.info.run_id, output_text, "llm_response.txt")
 
                 # Try to extract and log parsed forecast
                 try:
@@ -368,7 +654,9 @@ class MLflowStore:
                 except Exception:
                     pass
 
-                return run.info.run_id
+                run_id = run.info.run_id
+            self.reindex(run_id)
+            return run_id
         except Exception as e:
             import traceback
             with open("backend_error.log", "w") as f:
@@ -424,16 +712,16 @@ class MLflowStore:
                     mlflow.log_param("user_question", stages["user_question"][:500])
                     
                 if stages.get("retrieved_sources"):
-                    mlflow.log_dict(stages["retrieved_sources"], "retrieved_sources.json")
+                    self._log_dict(run.info.run_id, stages["retrieved_sources"], "retrieved_sources.json")
                     
                 if stages.get("kpi_summary"):
-                    mlflow.log_dict(stages["kpi_summary"], "kpi_summary.json")
+                    self._log_dict(run.info.run_id, stages["kpi_summary"], "kpi_summary.json")
                     
                 if stages.get("prompt_packet"):
-                    mlflow.log_text(stages["prompt_packet"], "prompt_packet.txt")
+                    self._log_text(run.info.run_id, stages["prompt_packet"], "prompt_packet.txt")
                     
                 if stages.get("llm_response"):
-                    mlflow.log_text(stages["llm_response"], "llm_response.txt")
+                    self._log_text(run.info.run_id, stages["llm_response"], "llm_response.txt")
                     
                 if stages.get("parsed_forecast"):
                     mlflow.log_dict(stages["parsed_forecast"], "parsed_forecast.json")
@@ -441,7 +729,9 @@ class MLflowStore:
                 if stages.get("parse_error"):
                     mlflow.log_dict(stages["parse_error"], "parse_error.json")
 
-                return run.info.run_id
+                run_id = run.info.run_id
+            self.reindex(run_id)
+            return run_id
         except Exception as e:
             import traceback
             print(f"Error logging staged run: {e}")
@@ -456,6 +746,7 @@ class MLflowStore:
         self.client.set_tag(run_id, "eval_rating", str(rating))
         self.client.set_tag(run_id, "eval_label", label)
         self.client.set_tag(run_id, "eval_comment", comment)
+        self._invalidate(run_id)
 
     # ------------------------------------------------------------------
     # Timeseries metrics (Layer 3)
@@ -465,6 +756,10 @@ class MLflowStore:
         cutoff = datetime.datetime.now() - datetime.timedelta(days=days)
         cutoff_ms = int(cutoff.timestamp() * 1000)
 
+        index = self.run_index()
+        if index is not None and metric in ("latency_ms", "cost_usd", "confidence", "parse_success"):
+            return index.timeseries(metric, cutoff_ms)
+
         filter_string = f"attribute.start_time >= {cutoff_ms}"
 
         runs = self.client.search_runs(
@@ -516,7 +811,8 @@ class MLflowStore:
         if tags:
             for k, v in tags.items():
                 self.client.set_tag(run_id, k, v)
-                
+
+        self.reindex(run_id)
         return run_id
 
     def update_run(self, run_id: str, status: str = None, metrics: dict = None, output: str = None, error: str = None, end_time: bool = False):
@@ -529,50 +825,182 @@ class MLflowStore:
                 self.client.log_metric(run_id, k, v)
                 
         if output:
-            self.client.log_text(run_id, output, "llm_response.txt")
+            self._log_text(run_id, output, "llm_response.txt")
             
         if error:
              self.client.log_text(run_id, error, "error.txt")
              
         if status in ["success", "failed"]:
             self._compute_and_log_confidence(run_id)
+        self.reindex(run_id)
 
     def log_artifact_data(self, run_id: str, name: str, content: str, type: str):
         if type == "json":
             try:
                 data = json.loads(content)
-                self.client.log_dict(run_id, data, name)
+                self._log_dict(run_id, data, name)
             except:
-                self.client.log_text(run_id, content, name)
+                self._log_text(run_id, content, name)
         else:
-            self.client.log_text(run_id, content, name)
+            self._log_text(run_id, content, name)
             
         self._compute_and_log_confidence(run_id)
+        self.reindex(run_id)
 
-    def _compute_and_log_confidence(self, run_id: str):
+    def log_profile(self, run_id: str, artifacts: dict, tags: dict):
+        """Attach a request profile (artifacts under profile/) and its tags to a run."""
+        for name, content in artifacts.items():
+            self._log_text(run_id, content, name)
+        self.client.log_batch(run_id, tags=[RunTag(k, str(v)) for k, v in tags.items()])
+        self.reindex(run_id)
+
+    def ingest_run(self, record) -> tuple:
+        """
+        Create and fill a run from a complete client record (IngestRun).
+        Idempotent on client_run_id: returns (run_id, created). A resend of a
+        record whose earlier attempt failed part-way fills the existing run
+        instead of reporting it as a duplicate.
+        """
+        run_id = self._run_for_client_id(record.client_run_id)
+        if run_id:
+            existing = self.client.get_run(run_id)
+            # Runs ingested before the completion tag existed count as complete once terminated
+            if existing.data.tags.get(_INGEST_COMPLETE_TAG) == "true" or existing.info.status != "RUNNING":
+                return run_id, False
+            logger.info(f"Resuming partially ingested run {run_id} ({record.client_run_id})")
+        else:
+            tags = {"source": "client_api", "client_run_id": record.client_run_id, **record.tags}
+            run = self.client.create_run(
+                self.experiment_id,
+                start_time=record.start_time_ms,
+                tags=tags,
+                run_name=record.tags.get("run_name"),
+            )
+            run_id = run.info.run_id
+            if self.index is not None:
+                # Recorded before anything else is written, so a resend finds it
+                self.index.upsert_many([row_from_run(run)])
+        record.params = {
+            "user_id": record.user_id,
+            "session_id": record.session_id,
+            "model": record.model,
+            **record.params,
+        }
+        record.tags = {}
+        self.log_run_batch(run_id, record, end_time_ms=record.end_time_ms)
+        self.client.set_tag(run_id, _INGEST_COMPLETE_TAG, "true")
+        self._invalidate(run_id)
+        return run_id, True
+
+    def _run_for_client_id(self, client_run_id: str) -> Optional[str]:
+        # The index answers with one indexed lookup; searching MLflow scans
+        # every run on a file store, so it is only the fallback
+        index = self.run_index()
+        if index is not None:
+            return index.run_for_client_id(client_run_id)
+        if not _CLIENT_RUN_ID_RE.match(client_run_id):
+            raise ValueError(f"Invalid client_run_id: {client_run_id!r}")
+        existing = self.client.search_runs(
+            [self.experiment_id],
+            filter_string=f"tags.client_run_id = '{client_run_id}'",
+            max_results=1,
+        )
+        return existing[0].info.run_id if existing else None
+
+    def log_run_batch(self, run_id: str, request, end_time_ms: Optional[int] = None) -> None:
+        """
+        Apply a client run's buffered data (RunBatchRequest) in one pass:
+        params/metrics/tags in a single log_batch (chunked to MLflow limits),
+        the artifacts, confidence scored once from the data in hand, then
+        the terminal status.
+        """
+        ts = end_time_ms or int(datetime.datetime.now().timestamp() * 1000)
+        metrics = [Metric(k, float(v), ts, 0) for k, v in request.metrics.items()]
+        params = [Param(k, str(v)[:500]) for k, v in request.params.items()]
+        tags = [RunTag(k, str(v)) for k, v in request.tags.items()]
+        while metrics or params or tags:
+            self.client.log_batch(
+                run_id,
+                metrics=metrics[:_MAX_METRICS_PER_BATCH - 2 * _MAX_PARAMS_TAGS_PER_BATCH],
+                params=params[:_MAX_PARAMS_TAGS_PER_BATCH],
+                tags=tags[:_MAX_PARAMS_TAGS_PER_BATCH],
+            )
+            metrics = metrics[_MAX_METRICS_PER_BATCH - 2 * _MAX_PARAMS_TAGS_PER_BATCH:]
+            params = params[_MAX_PARAMS_TAGS_PER_BATCH:]
+            tags = tags[_MAX_PARAMS_TAGS_PER_BATCH:]
+
+        names = set()
+        parse_success = int(request.metrics.get("parse_success", 0)) == 1
+        for artifact in request.artifacts:
+            names.add(artifact.name)
+            if artifact.type == "json":
+                try:
+                    self._log_dict(run_id, json.loads(artifact.content), artifact.name)
+                    continue
+                except ValueError:
+                    pass
+            self._log_text(run_id, artifact.content, artifact.name)
+        if request.output:
+            self._log_text(run_id, request.output, "llm_response.txt")
+        if request.error:
+            self.client.log_text(run_id, request.error, "error.txt")
+
+        if request.status in ["success", "failed"]:
+            retrieval_count = int(request.metrics.get("retrieval_count", 0))
+            if retrieval_count == 0 and "retrieved_sources.json" in names:
+                retrieval_count = 1
+            self._compute_and_log_confidence(
+                run_id,
+                response_text=request.output or "",
+                retrieval_count=retrieval_count,
+                parse_success=parse_success or "parsed_forecast.json" in names,
+                status=request.status,
+            )
+
+        if request.status:
+            self.client.set_terminated(
+                run_id,
+                status=_STATUS_TO_MLFLOW.get(request.status, "RUNNING"),
+                end_time=ts if request.end_time else None,
+            )
+        self.reindex(run_id)
+
+    def _compute_and_log_confidence(
+        self,
+        run_id: str,
+        response_text: Optional[str] = None,
+        retrieval_count: Optional[int] = None,
+        parse_success: Optional[bool] = None,
+        status: Optional[str] = None,
+    ):
+        """Score confidence; signals not passed in are read back from the run."""
         try:
-            run = self.client.get_run(run_id)
-            metrics = run.data.metrics
-            params = run.data.params
-            status = _MLFLOW_TO_STATUS.get(run.info.status, "pending")
-            
+            if None in (response_text, retrieval_count, parse_success, status):
+                run = self.client.get_run(run_id)
+                metrics = run.data.metrics
+                if status is None:
+                    status = _MLFLOW_TO_STATUS.get(run.info.status, "pending")
+
             # Extract signals for confidence
             # 1. Response Text
-            response_text = self.get_text_artifact(run_id, "llm_response.txt") or ""
-            
+            if response_text is None:
+                response_text = self.get_text_artifact(run_id, "llm_response.txt") or ""
+
             # 2. Retrieval Count
-            retrieval_count = int(metrics.get("retrieval_count", 0))
-            if retrieval_count == 0:
-                 # Fallback: check artifact existence if metric missing
-                 if self.get_json_artifact(run_id, "retrieved_sources.json"):
-                     retrieval_count = 1
-            
+            if retrieval_count is None:
+                retrieval_count = int(metrics.get("retrieval_count", 0))
+                if retrieval_count == 0:
+                     # Fallback: check artifact existence if metric missing
+                     if self.get_json_artifact(run_id, "retrieved_sources.json"):
+                         retrieval_count = 1
+
             # 3. Parse Success
-            parse_success = int(metrics.get("parse_success", 0)) == 1
-            if not parse_success:
-                 # Fallback: check artifact
-                 if self.get_json_artifact(run_id, "parsed_forecast.json"):
-                     parse_success = True
+            if parse_success is None:
+                parse_success = int(metrics.get("parse_success", 0)) == 1
+                if not parse_success:
+                     # Fallback: check artifact
+                     if self.get_json_artifact(run_id, "parsed_forecast.json"):
+                         parse_success = True
 
             result = compute_confidence(
                 response_text=response_text,
@@ -585,6 +1013,7 @@ class MLflowStore:
             self.client.set_tag(run_id, "confidence_label", result["label"])
             self.client.log_dict(run_id, result["components"], "confidence_components.json")
             self.client.log_dict(run_id, result["explanation"], "confidence_explanation.json")
+            self._invalidate(run_id)
 
             # Trigger Alert Evaluation
             from app.services.alerts import alerts_service
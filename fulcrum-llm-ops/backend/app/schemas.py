@@ -1,5 +1,5 @@
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 
@@ -13,6 +13,9 @@ class RunListItem(BaseModel):
     confidence_label: Optional[str] = None
     confidence_components: Optional[Dict[str, float]] = None
     parse_success: Optional[float] = 0
+    question: Optional[str] = None
+    # Search results only: matched text with hits wrapped in <mark></mark>
+    snippet: Optional[str] = None
     started_at: Optional[datetime] = None
 
 
@@ -47,17 +50,43 @@ class ConfidenceExplanation(BaseModel):
     improvement_actions: List[str]
 
 class RunDetail(RunListItem):
-    params: Dict[str, Any]
-    metrics: Dict[str, float]
-    tags: Dict[str, str]
-    artifacts: List[ArtifactItem]
+    # None when the section was left out of ?include=
+    params: Optional[Dict[str, Any]] = None
+    metrics: Optional[Dict[str, float]] = None
+    tags: Optional[Dict[str, str]] = None
+    artifacts: Optional[List[ArtifactItem]] = None
     input_preview: Optional[Dict[str, Any]] = None
     output_preview: Optional[Dict[str, Any]] = None
     confidence_explanation: Optional[ConfidenceExplanation] = None
 
 
+class RunPreview(BaseModel):
+    input_preview: Dict[str, Any] = {}
+    output_preview: Dict[str, Any] = {}
+
+
+class TraceSpan(BaseModel):
+    span_id: str
+    parent_id: Optional[str] = None
+    name: str
+    status: str = "OK"
+    start_offset_ms: float
+    duration_ms: float
+    attributes: Dict[str, Any] = {}
+
+
+class RunTrace(BaseModel):
+    run_id: str
+    started_at: Optional[float] = None
+    duration_ms: float
+    spans: List[TraceSpan]
+
+
 class RunsResponse(BaseModel):
     runs: List[RunListItem]
+    total: int = 0
+    # Pass back as ?cursor= for the next page; None on the last page
+    next_cursor: Optional[str] = None
     models: List[str]
     statuses: List[str]
 
@@ -226,6 +255,39 @@ class LogArtifactRequest(BaseModel):
     type: str # "text" or "json"
 
 
+class RunBatchRequest(BaseModel):
+    """Everything a client run logged, sent once when the run ends."""
+    status: Optional[str] = None
+    end_time: bool = False
+    params: Dict[str, Any] = {}
+    metrics: Dict[str, float] = {}
+    tags: Dict[str, str] = {}
+    output: Optional[str] = None
+    error: Optional[str] = None
+    artifacts: List[LogArtifactRequest] = []
+
+
+class IngestRun(RunBatchRequest):
+    """A complete client run shipped after the fact (background clients, spool replay)."""
+    # Used in an MLflow filter string when the run index is not ready
+    client_run_id: str = Field(..., pattern=r"^[A-Za-z0-9_.:-]{1,128}$")
+    user_id: Optional[str] = "default_user"
+    session_id: Optional[str] = "default_session"
+    model: str = "unknown"
+    start_time_ms: Optional[int] = None
+    end_time_ms: Optional[int] = None
+
+
+class IngestRequest(BaseModel):
+    runs: List[IngestRun]
+
+
+class IngestResponse(BaseModel):
+    ingested: int
+    duplicates: int
+    run_ids: Dict[str, str]  # client_run_id -> run_id
+
+
 class Alert(BaseModel):
     id: str
     run_id: Optional[str] = None
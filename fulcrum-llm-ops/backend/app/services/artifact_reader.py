@@ -0,0 +1,323 @@
+"""
+Artifact reads without the download round trip.
+
+`MlflowClient.download_artifacts` copies an artifact into a fresh temp
+directory before anything can read it, even on a local file store. That
+costs a copy per read and leaves temp directories behind.
+
+- file: stores: the run's artifact URI is resolved to a directory and the
+  artifact is read in place (artifact roots are cached per run; they never
+  change)
+- other stores: artifacts are downloaded into a temp directory that is
+  removed right away, and the decoded content is kept in an LRU bounded by
+  total bytes, keyed by (run_id, path)
+
+CAS references are resolved as before. Writes through MLflowStore call
+`invalidate_run`, since artifacts such as confidence_components.json are
+rewritten in place.
+
+`fetch_many` and `list_files` serve RunDetail assembly. On remote stores the
+reads run concurrently on a bounded pool, and the tree is listed one level
+at a time with each level's directories in parallel (MLflow's repositories
+only list one directory per call). On file: stores the tree is one local
+walk and reads are inline, since threads would cost more than they save.
+
+`open` backs the artifact endpoint: it returns an `ArtifactBody` that streams
+the file (or the decompressed CAS blob) in fixed-size chunks, so memory per
+request does not grow with the artifact. Remote artifacts are downloaded to
+a temp file that is removed when the stream is closed.
+"""
+
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+# The CAS lives in the root 'app' folder (shared with the observability writer),
+# which conflicts with the backend 'app' package; import it directly, as chat.py does
+for _candidate in [Path(__file__).resolve().parents[4] / "app", Path("/project/app"), Path("/rootapp")]:
+    if _candidate.is_dir() and str(_candidate) not in sys.path:
+        sys.path.insert(0, str(_candidate))
+
+from artifact_store import REF_MAGIC, ArtifactStore, default_cas_dir, is_ref, parse_ref  # noqa: E402
+
+_MAX_ROOTS = 4096
+_CHUNK_BYTES = 64 * 1024
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def local_artifact_dir(artifact_uri: str) -> Optional[str]:
+    """Filesystem directory of a file: (or plain path) artifact URI, else None."""
+    parsed = urlparse(artifact_uri)
+    if parsed.scheme == "file":
+        return url2pathname(parsed.path)
+    if parsed.scheme == "" or (len(parsed.scheme) == 1 and os.name == "nt"):  # C:\... on Windows
+        return artifact_uri
+    return None
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) for a single-range `Range: bytes=...` header, or
+    None to serve the whole body (no header, a multi-range or malformed
+    one). Raises ValueError when the range cannot be satisfied.
+    """
+    match = _RANGE_RE.match((header or "").strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:  # suffix: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("unsatisfiable range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+class ArtifactBody:
+    """An artifact opened for streaming: size and validators up front, bytes on demand."""
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        size: int,
+        etag: str,
+        last_modified: Optional[float] = None,
+        cleanup: Optional[Callable[[], None]] = None,
+    ):
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self._stream = stream
+        self._cleanup = cleanup
+
+    def iter_bytes(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Bytes start..end (inclusive) in chunks; closes the body when done or abandoned."""
+        end = self.size - 1 if end is None else end
+        try:
+            if start:
+                self._stream.seek(start)  # compressed blobs skip forward by decompressing
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = self._stream.read(min(_CHUNK_BYTES, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        self._stream.close()
+        if self._cleanup is not None:
+            self._cleanup()
+            self._cleanup = None
+
+
+class ArtifactReader:
+    def __init__(
+        self,
+        client,
+        cas,
+        cache_bytes: int = 64 * 1024 * 1024,
+        local_fast_path: bool = True,
+        max_workers: int = 8,
+    ):
+        self.client = client
+        self.cas = cas
+        self.cache_bytes = cache_bytes
+        self.local_fast_path = local_fast_path
+        self._roots: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[str, int]]" = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"local_reads": 0, "downloads": 0, "cache_hits": 0}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="artifact-fetch")
+        # Separate pool: a listing submitted through fetch_many waits on these
+        self._list_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="artifact-list")
+
+    def read(self, run_id: str, path: str) -> Optional[str]:
+        """Artifact content as text (CAS references resolved), or None if missing."""
+        root = self._local_root(run_id) if self.local_fast_path else None
+        if root is not None:
+            full = os.path.realpath(os.path.join(root, path))
+            if not full.startswith(os.path.realpath(root) + os.sep):
+                return None  # path escapes the run's artifact directory
+            try:
+                with open(full, "r", encoding="utf-8") as f:
+                    content = f.read()
+            except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+                return None
+            with self._lock:
+                self.stats["local_reads"] += 1
+            return self.cas.resolve(content)
+
+        key = (run_id, path)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return entry[0]
+
+        with tempfile.TemporaryDirectory(prefix="fulcrum-artifact-") as tmp:
+            local_path = self.client.download_artifacts(run_id, path, tmp)
+            with open(local_path, "r", encoding="utf-8") as f:
+                content = self.cas.resolve(f.read())
+        with self._lock:
+            self.stats["downloads"] += 1
+        self._remember(key, content, len(content.encode("utf-8")))
+        return content
+
+    def open(self, run_id: str, path: str) -> Optional[ArtifactBody]:
+        """The artifact as an `ArtifactBody` (CAS references resolved), or None if missing."""
+        root = self._local_root(run_id) if self.local_fast_path else None
+        cleanup = None
+        if root is not None:
+            full = os.path.realpath(os.path.join(root, path))
+            if not full.startswith(os.path.realpath(root) + os.sep) or not os.path.isfile(full):
+                return None
+        else:
+            tmp = tempfile.TemporaryDirectory(prefix="fulcrum-artifact-")
+            try:
+                full = self.client.download_artifacts(run_id, path, tmp.name)
+            except Exception:
+                tmp.cleanup()
+                return None
+            cleanup = tmp.cleanup
+
+        stream = None
+        try:
+            stat = os.stat(full)
+            stream = open(full, "rb")
+            head = stream.read(len(REF_MAGIC))
+            if is_ref(head.decode("utf-8", "replace")):
+                document = head + stream.read()
+                ref = parse_ref(document)
+                stream.close()
+                stream = self.cas.open_ref(ref)
+                # The reference names every chunk by hash, so it identifies the content
+                etag = hashlib.sha256(document).hexdigest()
+                return ArtifactBody(stream, ref["size"], etag, stat.st_mtime, cleanup)
+            stream.seek(0)
+            if root is not None:
+                etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+                return ArtifactBody(stream, stat.st_size, etag, stat.st_mtime, cleanup)
+            # A fresh download has a fresh mtime; identify it by content instead
+            digest = hashlib.sha256()
+            for chunk in iter(lambda: stream.read(_CHUNK_BYTES), b""):
+                digest.update(chunk)
+            stream.seek(0)
+            return ArtifactBody(stream, stat.st_size, digest.hexdigest(), None, cleanup)
+        except BaseException:
+            if stream is not None:
+                stream.close()
+            if cleanup is not None:
+                cleanup()
+            raise
+
+    def fetch_many(self, run_id: str, calls: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+        """
+        Run independent reads for one run and return their results by name; a
+        call that raises yields None. Concurrent unless the run is local.
+        """
+        def guarded(fn):
+            try:
+                return fn()
+            except Exception:
+                return None
+
+        if self.is_local(run_id):
+            return {name: guarded(fn) for name, fn in calls.items()}
+        futures = {name: self._pool.submit(guarded, fn) for name, fn in calls.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    def list_files(self, run_id: str) -> List[str]:
+        """Every artifact file of the run, as '/'-separated paths relative to its root."""
+        root = self._local_root(run_id) if self.local_fast_path else None
+        if root is not None:
+            return self._walk_local(root)
+
+        files, level = [], [None]
+        while level:
+            listings = self._list_pool.map(lambda path: self._list_dir(run_id, path), level)
+            level = []
+            for items in listings:
+                for item in items:
+                    (level if item.is_dir else files).append(item.path)
+        return sorted(files)
+
+    def _list_dir(self, run_id: str, path: Optional[str]):
+        try:
+            return self.client.list_artifacts(run_id, path)
+        except Exception:
+            return []
+
+    @staticmethod
+    def _walk_local(root: str) -> List[str]:
+        files = []
+
+        def walk(directory: str, prefix: str):
+            try:
+                entries = sorted(os.scandir(directory), key=lambda e: e.name)
+            except (FileNotFoundError, NotADirectoryError):
+                return
+            for entry in entries:
+                if entry.is_dir():
+                    walk(entry.path, f"{prefix}{entry.name}/")
+                else:
+                    files.append(f"{prefix}{entry.name}")
+
+        walk(root, "")
+        return files
+
+    def prime(self, run_id: str, artifact_uri: str):
+        """Record a run's artifact root from a Run the caller already fetched."""
+        with self._lock:
+            self._roots[run_id] = local_artifact_dir(artifact_uri)
+            self._roots.move_to_end(run_id)
+            while len(self._roots) > _MAX_ROOTS:
+                self._roots.popitem(last=False)
+
+    def is_local(self, run_id: str) -> bool:
+        return self.local_fast_path and self._local_root(run_id) is not None
+
+    def invalidate_run(self, run_id: str):
+        with self._lock:
+            for key in [k for k in self._cache if k[0] == run_id]:
+                self._cached_bytes -= self._cache.pop(key)[1]
+
+    def _local_root(self, run_id: str) -> Optional[str]:
+        with self._lock:
+            if run_id in self._roots:
+                self._roots.move_to_end(run_id)
+                return self._roots[run_id]
+        self.prime(run_id, self.client.get_run(run_id).info.artifact_uri)
+        with self._lock:
+            return self._roots.get(run_id)
+
+    def _remember(self, key: Tuple[str, str], content: str, size: int):
+        if size > self.cache_bytes // 4:
+            return  # one huge artifact would flush everything else
+        with self._lock:
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self._cached_bytes -= old[1]
+            self._cache[key] = (content, size)
+            self._cached_bytes += size
+            while self._cached_bytes > self.cache_bytes:
+                self._cached_bytes -= self._cache.popitem(last=False)[1][1]
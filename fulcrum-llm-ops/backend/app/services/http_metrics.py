@@ -0,0 +1,41 @@
+"""
+Prometheus metrics for the API itself, plus the scrape-endpoint renderer.
+
+The LLM layer (root app `prom_metrics`) registers its stage/provider/cache
+metrics in the same default registry, so one scrape covers both. When
+PROMETHEUS_MULTIPROC_DIR is set every uvicorn worker writes to that
+directory and the scrape aggregates across workers.
+"""
+
+import os
+from typing import Tuple
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Histogram, generate_latest, multiprocess
+    )
+except ImportError:
+    Histogram = None
+
+HTTP_REQUEST_LATENCY = Histogram(
+    "fulcrum_http_request_duration_seconds",
+    "API request latency by route template, method and status",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+) if Histogram is not None else None
+
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    if HTTP_REQUEST_LATENCY is not None:
+        HTTP_REQUEST_LATENCY.labels(method, route, str(status)).observe(seconds)
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """Exposition-format payload and content type for the scrape endpoint."""
+    if Histogram is None:
+        return b"# prometheus_client is not installed\n", "text/plain; charset=utf-8"
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,262 @@
+"""
+Opt-in per-request profiling for /chat and /replay.
+
+A request is profiled when it carries `X-Fulcrum-Profile: 1` or is picked by
+PROFILE_SAMPLE_RATE. The handler then runs under a sampling profiler
+(pyinstrument, a backend requirement; cProfile if it is missing) with
+tracemalloc. The profile and the top allocations are attached as artifacts
+to the run the request produced (profile/...).
+
+Both profilers only see the event-loop thread, where the handler mostly
+awaits. The LLM call, guardrails, retrieval and MLflow writes run on worker
+threads (asyncio.to_thread, the deadline and pipeline step pools), so a
+stack sampler covers every other thread as well (profile/threads.txt).
+
+When a request is not profiled, the only cost is one header lookup.
+"""
+
+import cProfile
+import contextlib
+import io
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+
+from app.settings import settings
+
+try:
+    from pyinstrument import Profiler as _Pyinstrument
+except ImportError:
+    _Pyinstrument = None
+
+PROFILE_HEADER = "x-fulcrum-profile"
+_SAMPLER_THREAD_PREFIX = "fulcrum-profile-sampler"
+# A thread whose innermost frame is here is blocked on a lock, condition,
+# queue or selector: idle, or waiting on work that shows up in another thread
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py")
+# Executor workers wait for work in C (SimpleQueue.get) from this frame
+_IDLE_FRAMES = {(os.path.join("concurrent", "futures", "thread.py"), "_worker")}
+_MAX_STACK_DEPTH = 64
+_TOP_STACKS = 30
+
+logger = logging.getLogger("uvicorn")
+
+# tracemalloc is process-global: keep it on while any profiled request runs
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def _tracemalloc_acquire():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+        _tracemalloc_users += 1
+
+
+def _tracemalloc_release():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+
+
+def _is_idle(frame) -> bool:
+    filename = frame.f_code.co_filename
+    if os.path.basename(filename) in _IDLE_FILES:
+        return True
+    return any(filename.endswith(f) and frame.f_code.co_name == name for f, name in _IDLE_FRAMES)
+
+
+class ThreadSampler:
+    """
+    Samples the stacks of every thread except the excluded one (the event
+    loop, which the main profiler covers) at a fixed interval. The sampler
+    lives in its own thread and never touches the sampled ones, so its cost
+    does not depend on what they run.
+    """
+
+    def __init__(self, interval_s: float, exclude_ident: Optional[int] = None):
+        self.interval_s = interval_s
+        self.exclude_ident = exclude_ident
+        self.ticks = 0
+        self.by_thread: Counter = Counter()
+        self.stacks: "Counter[Tuple[str, Tuple[str, ...]]]" = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=_SAMPLER_THREAD_PREFIX, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self.sample()
+
+    def sample(self):
+        self.ticks += 1
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            name = names.get(ident, str(ident))
+            if ident == self.exclude_ident or name.startswith(_SAMPLER_THREAD_PREFIX):
+                continue
+            if _is_idle(frame):
+                continue
+            stack = []
+            while frame is not None and len(stack) < _MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}")
+                frame = frame.f_back
+            self.by_thread[name] += 1
+            self.stacks[(name, tuple(reversed(stack)))] += 1
+
+    def report(self, path: str) -> str:
+        lines = [
+            f"Worker thread samples during {path} ({self.interval_s * 1000:g} ms interval, {self.ticks} ticks)",
+            "Note: every thread but the event loop is sampled; concurrent requests are included.",
+            "Threads blocked on a lock, condition, queue or selector are skipped as idle.",
+            "",
+            "Busy samples by thread:",
+        ]
+        for name, count in self.by_thread.most_common():
+            lines.append(f"{count:8d}  {name}")
+        lines += ["", f"Top {_TOP_STACKS} stacks (outermost call first):"]
+        for (name, stack), count in self.stacks.most_common(_TOP_STACKS):
+            lines.append(f"{count:8d}  [{name}]")
+            lines.extend(f"          {frame}" for frame in stack)
+        return "\n".join(lines)
+
+
+class _NullSession:
+    """Returned when the request is not profiled; every call is a no-op."""
+
+    def set_run(self, run_id: Optional[str]):
+        pass
+
+
+_NULL_SESSION = _NullSession()
+
+
+class ProfileSession:
+    def __init__(self, trigger: str, path: str):
+        self.trigger = trigger
+        self.path = path
+        self.run_id: Optional[str] = None
+        self._profiler = None
+        self._cprofile = None
+        self._sampler: Optional[ThreadSampler] = None
+        self._snapshot_before = None
+        self._started = 0.0
+        self.wall_ms = 0.0
+
+    def set_run(self, run_id: Optional[str]):
+        self.run_id = run_id
+
+    def start(self):
+        _tracemalloc_acquire()
+        self._snapshot_before = tracemalloc.take_snapshot()
+        if _Pyinstrument is not None:
+            self._profiler = _Pyinstrument(interval=0.001, async_mode="enabled")
+            self._profiler.start()
+        else:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._sampler = ThreadSampler(settings.PROFILE_THREAD_INTERVAL_MS / 1000, threading.get_ident())
+        self._sampler.start()
+        self._started = time.perf_counter()
+
+    def stop(self) -> Dict[str, str]:
+        """Stop profiling and return {artifact_path: content}."""
+        self.wall_ms = (time.perf_counter() - self._started) * 1000
+        artifacts = {}
+        if self._profiler is not None:
+            self._profiler.stop()
+            artifacts["profile/profile.html"] = self._profiler.output_html()
+            artifacts["profile/profile.txt"] = self._profiler.output_text(unicode=True, color=False)
+        else:
+            self._cprofile.disable()
+            out = io.StringIO()
+            pstats.Stats(self._cprofile, stream=out).sort_stats("cumulative").print_stats(60)
+            artifacts["profile/profile.txt"] = out.getvalue()
+        self._sampler.stop()
+        artifacts["profile/threads.txt"] = self._sampler.report(self.path)
+
+        snapshot = tracemalloc.take_snapshot()
+        _tracemalloc_release()
+        artifacts["profile/allocations.txt"] = self._format_allocations(snapshot)
+        return artifacts
+
+    def _format_allocations(self, snapshot) -> str:
+        stats = snapshot.compare_to(self._snapshot_before, "lineno")
+        top = stats[: settings.PROFILE_TOP_ALLOCATIONS]
+        lines = [
+            f"Top {len(top)} allocation sites during {self.path} ({self.wall_ms:.0f} ms wall)",
+            "Note: tracemalloc is process-wide; concurrent requests are included.",
+            "",
+        ]
+        for stat in top:
+            lines.append(f"{stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8d} blocks  {stat.traceback[0]}")
+        return "\n".join(lines)
+
+
+def _should_profile(request: Request) -> Optional[str]:
+    header = request.headers.get(PROFILE_HEADER)
+    if header and header.lower() not in ("0", "false", "no"):
+        return "header"
+    if settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+def _attach(session: ProfileSession, artifacts: Dict[str, str]):
+    if not session.run_id or session.run_id == "blocked":
+        logger.info(f"Profiled {session.path} produced no run; discarding profile")
+        return
+    from app.mlflow_store import mlflow_store
+
+    # Through the store, so the cached run detail and the index see the new tags
+    mlflow_store.log_profile(
+        session.run_id,
+        artifacts,
+        {
+            "profiled": "true",
+            "profile_trigger": session.trigger,
+            "profile_wall_ms": f"{session.wall_ms:.1f}",
+        },
+    )
+
+
+@contextlib.contextmanager
+def profile_request(request: Request):
+    """
+    Wrap a handler body. Call `session.set_run(run_id)` once the run is known;
+    the profile is attached to it when the block exits.
+    """
+    trigger = _should_profile(request)
+    if trigger is None:
+        yield _NULL_SESSION
+        return
+
+    session = ProfileSession(trigger, request.url.path)
+    session.start()
+    try:
+        yield session
+    finally:
+        artifacts = session.stop()
+        try:
+            _attach(session, artifacts)
+        except Exception as e:
+            logger.error(f"Failed to attach profile to run {session.run_id}: {e}")
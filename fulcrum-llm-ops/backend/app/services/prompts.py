@@ -1,3 +1,4 @@
+import hashlib
 import json
 import os
 import re
@@ -41,6 +42,12 @@ class PromptsService:
                 return p
         return None
 
+    @staticmethod
+    def etag(prompt: Prompt) -> str:
+        """Strong ETag over the prompt's full content; any new version or edit changes it."""
+        payload = json.dumps(prompt.dict(), sort_keys=True, default=str)
+        return '"' + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32] + '"'
+
     def create_prompt(self, req: CreatePromptRequest) -> Prompt:
         prompts = self._load_prompts()
         
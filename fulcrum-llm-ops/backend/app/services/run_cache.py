@@ -0,0 +1,84 @@
+"""
+In-process LRU of assembled RunDetail objects.
+
+Building a RunDetail costs a get_run, a recursive artifact listing and up to
+five artifact reads. The store caches the result per run and drops it
+whenever it writes to that run (status, metrics, artifacts, evaluations,
+confidence), so repeat views of /runs/{id}, /compare, replay stages and
+alert evaluation are served from memory.
+
+Runs can also be written by other processes (the Streamlit app, scripts),
+which cannot invalidate this cache. Entries therefore expire: quickly while
+a run is still running, much later once it has finished and only an
+evaluation (written through this store) can change it.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.schemas import RunDetail
+
+try:
+    import prom_metrics
+except ImportError:
+    prom_metrics = None
+
+_FINISHED = ("success", "failed")
+
+
+class RunDetailCache:
+    def __init__(self, max_entries: int = 512, active_ttl_s: float = 2.0, finished_ttl_s: float = 3600.0):
+        self.max_entries = max_entries
+        self.active_ttl_s = active_ttl_s
+        self.finished_ttl_s = finished_ttl_s
+        self._entries: "OrderedDict[str, Tuple[float, RunDetail]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by invalidate(); a build that started before it must not be stored
+        self._generation = 0
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, run_id: str) -> Optional[RunDetail]:
+        with self._lock:
+            entry = self._entries.get(run_id)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[run_id]
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+            else:
+                self._entries.move_to_end(run_id)
+                self.stats["hits"] += 1
+        if prom_metrics is not None:
+            prom_metrics.record_cache("run_detail", entry is not None)
+        # Callers may modify what they get back
+        return entry[1].model_copy(deep=True) if entry is not None else None
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def put(self, run_id: str, detail: RunDetail, generation: Optional[int] = None):
+        """Store `detail`, unless the run was invalidated since `generation` was read."""
+        ttl = self.finished_ttl_s if detail.status in _FINISHED else self.active_ttl_s
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[run_id] = (time.monotonic() + ttl, detail.model_copy(deep=True))
+            self._entries.move_to_end(run_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, run_id: str):
+        with self._lock:
+            self._generation += 1
+            self.stats["invalidations"] += 1
+            self._entries.pop(run_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
@@ -0,0 +1,632 @@
+"""
+SQLite projection of the MLflow runs that the list and metrics views read.
+
+MLflow stays the source of truth. `search_runs` on a file store opens every
+run directory (meta.yaml, params, metrics, tags) on each call, so /runs and
+/metrics get slower linearly with history. The index keeps one row per run
+with just the hot fields, indexed for the filters the UI uses, so those
+endpoints run a single SQL query whatever the run count.
+
+The index is kept current three ways:
+1. `MLflowStore` upserts a run after every write it makes
+2. The backend's own /chat runs are upserted when the observability writer
+   finishes flushing them (`obs.add_run_listener`)
+3. `refresh()` picks up runs written by other processes (the Streamlit app,
+   scripts): new run directories on file stores, a start_time watermark
+   otherwise, plus any run still marked running
+
+On startup `rebuild()` re-projects everything from MLflow in the background;
+until it has finished, callers fall back to querying MLflow directly.
+
+Run text (user question, prompt packet, LLM response) goes into an FTS5
+table alongside, so search covers all history with ranking and snippets.
+Text is read from artifacts by the `text_loader` the store passes in. It is
+indexed when a run is written or first discovered; runs that predate the
+index are backfilled after the rebuild. Without FTS5 in the local SQLite
+build, search falls back to a LIKE over the indexed question.
+"""
+
+import base64
+import datetime
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MLFLOW_TO_STATUS = {
+    "FINISHED": "success",
+    "FAILED": "failed",
+    "RUNNING": "running",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id           TEXT PRIMARY KEY,
+    status           TEXT NOT NULL,
+    model            TEXT NOT NULL,
+    latency_ms       REAL,
+    cost_usd         REAL,
+    confidence       REAL,
+    confidence_label TEXT,
+    parse_success    REAL,
+    started_at       INTEGER,
+    session_id       TEXT,
+    user_id          TEXT,
+    question         TEXT,
+    client_run_id    TEXT,
+    updated_at       INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs (started_at DESC, run_id DESC);
+CREATE INDEX IF NOT EXISTS idx_runs_status_started ON runs (status, started_at DESC, run_id DESC);
+CREATE INDEX IF NOT EXISTS idx_runs_model_started ON runs (model, started_at DESC, run_id DESC);
+CREATE INDEX IF NOT EXISTS idx_runs_confidence ON runs (confidence);
+CREATE INDEX IF NOT EXISTS idx_runs_session ON runs (session_id, started_at DESC);
+CREATE INDEX IF NOT EXISTS idx_runs_user ON runs (user_id, started_at DESC);
+-- Keyset sorts: the expressions must match SORT_KEYS exactly to be used
+CREATE INDEX IF NOT EXISTS idx_runs_sort_latency ON runs (COALESCE(latency_ms, -1), run_id);
+CREATE INDEX IF NOT EXISTS idx_runs_sort_cost ON runs (COALESCE(cost_usd, -1), run_id);
+CREATE INDEX IF NOT EXISTS idx_runs_sort_confidence ON runs (COALESCE(confidence, -1), run_id);
+CREATE INDEX IF NOT EXISTS idx_runs_client_run_id ON runs (client_run_id) WHERE client_run_id IS NOT NULL;
+"""
+
+# run_text maps run_id to the integer rowid FTS5 needs, so a run's text can be
+# replaced by rowid instead of scanning the FTS table for its run_id.
+_TEXT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS run_text (
+    id         INTEGER PRIMARY KEY,
+    run_id     TEXT UNIQUE NOT NULL,
+    indexed_at INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS runs_fts USING fts5(
+    question, prompt, response,
+    tokenize = 'porter unicode61'
+);
+"""
+
+# Bump when a schema changes; an index built by an older version is dropped and rebuilt
+_SCHEMA_VERSION = 5
+
+_TEXT_COLUMNS = ("question", "prompt", "response")
+# bm25 weights: a hit in the question matters most, the (boilerplate-heavy) prompt least
+_RANK = "bm25(runs_fts, 4.0, 1.0, 2.0)"
+_SNIPPET_TOKENS = 16
+MARK_START, MARK_END = "<mark>", "</mark>"
+
+# Sortable columns. Metrics can be missing; they sort as -1 (below any real value)
+# so that the keyset comparison never meets a NULL. Each has a (key, run_id)
+# index in _SCHEMA.
+SORT_KEYS = {
+    "started_at": "started_at",
+    "latency_ms": "COALESCE(latency_ms, -1)",
+    "cost_usd": "COALESCE(cost_usd, -1)",
+    "confidence": "COALESCE(confidence, -1)",
+}
+
+_COLUMNS = (
+    "run_id", "status", "model", "latency_ms", "cost_usd", "confidence",
+    "confidence_label", "parse_success", "started_at", "session_id",
+    "user_id", "question", "client_run_id", "updated_at",
+)
+
+_REBUILD_PAGE_SIZE = 1000
+
+
+def row_from_run(run) -> Dict[str, Any]:
+    """Project an MLflow Run onto an index row."""
+    data = run.data
+    params, metrics, tags = data.params, data.metrics, data.tags
+    return {
+        "run_id": run.info.run_id,
+        "status": _MLFLOW_TO_STATUS.get(run.info.status, "pending"),
+        "model": params.get("model_name") or params.get("model") or "unknown",
+        "latency_ms": metrics.get("latency_ms"),
+        "cost_usd": metrics.get("cost_usd"),
+        "confidence": metrics.get("confidence"),
+        "confidence_label": tags.get("confidence_label"),
+        "parse_success": metrics.get("parse_success"),
+        "started_at": run.info.start_time,
+        "session_id": params.get("session_id") or tags.get("session_id"),
+        "user_id": params.get("user_id") or tags.get("user_id"),
+        "question": params.get("user_question"),
+        "client_run_id": tags.get("client_run_id"),
+        "updated_at": int(time.time() * 1000),
+    }
+
+
+def sort_value(sort: str, row: Dict[str, Any]) -> Any:
+    """A row's value of SORT_KEYS[sort], computed in Python."""
+    value = row.get(sort)
+    return -1 if value is None and sort != "started_at" else value
+
+
+def encode_cursor(sort: str, order: str, value: Any, run_id: str) -> str:
+    """Opaque cursor pointing just past (value, run_id) in the given order."""
+    payload = json.dumps([sort, order, value, run_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, str]:
+    """(sort value, run_id) of a cursor; ValueError if it is malformed or for another sort."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        c_sort, c_order, value, run_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("Malformed cursor")
+    if (c_sort, c_order) != (sort, order):
+        raise ValueError("Cursor belongs to a different sort order")
+    return value, run_id
+
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    FTS5 MATCH expression for free text typed into a search box: every word
+    must appear (the last one as a prefix, for search-as-you-type). Words are
+    quoted, so FTS operators and punctuation in the input are never parsed.
+    """
+    words = re.findall(r"\w+", text or "")
+    if not words:
+        return None
+    return " ".join([f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}"*'])
+
+
+def cutoff_ms(days: float) -> int:
+    cutoff = datetime.datetime.now() - datetime.timedelta(days=days)
+    return int(cutoff.timestamp() * 1000)
+
+
+class RunIndex:
+    """Thread-safe SQLite table of run summaries (one connection, WAL mode)."""
+
+    def __init__(
+        self,
+        path: str,
+        refresh_seconds: float = 30.0,
+        text_loader: Optional[Callable[[Any], Dict[str, Optional[str]]]] = None,
+        text_max_chars: int = 20000,
+    ):
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self.text_loader = text_loader
+        self.text_max_chars = text_max_chars
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._last_refresh = 0.0
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                # Only a projection of MLflow: the startup rebuild refills it
+                for table in ("runs", "run_text", "runs_fts"):
+                    self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self._conn.executescript(_SCHEMA)
+            try:
+                self._conn.executescript(_TEXT_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError as e:
+                logger.warning(f"SQLite without FTS5 ({e}); run search falls back to LIKE")
+                self.fts = False
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    @property
+    def ready(self) -> bool:
+        """True once a rebuild has completed; until then the index may be partial."""
+        return self._ready.is_set()
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def upsert_many(self, rows: Iterable[Dict[str, Any]]):
+        values = [tuple(row.get(c) for c in _COLUMNS) for row in rows]
+        if not values:
+            return
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in _COLUMNS[1:])
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO runs ({', '.join(_COLUMNS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT(run_id) DO UPDATE SET {updates}",
+                values,
+            )
+
+    def upsert_run(self, run):
+        """Project one run, text included (the write path)."""
+        self.upsert_many([row_from_run(run)])
+        self.index_text([run])
+
+    def upsert_text(self, run_id: str, text: Dict[str, Optional[str]]):
+        """Replace a run's searchable text (columns: question, prompt, response)."""
+        if not self.fts:
+            return
+        values = [(text.get(c) or "")[:self.text_max_chars] for c in _TEXT_COLUMNS]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO run_text (run_id, indexed_at) VALUES (?, ?) "
+                "ON CONFLICT(run_id) DO UPDATE SET indexed_at = excluded.indexed_at",
+                (run_id, int(time.time() * 1000)),
+            )
+            rowid = self._conn.execute("SELECT id FROM run_text WHERE run_id = ?", (run_id,)).fetchone()[0]
+            self._conn.execute("DELETE FROM runs_fts WHERE rowid = ?", (rowid,))
+            self._conn.execute(
+                "INSERT INTO runs_fts (rowid, question, prompt, response) VALUES (?, ?, ?, ?)",
+                (rowid, *values),
+            )
+
+    def index_text(self, runs: Iterable[Any]):
+        """Load and index the text of MLflow runs through `text_loader`."""
+        if not self.fts or self.text_loader is None:
+            return
+        for run in runs:
+            try:
+                self.upsert_text(run.info.run_id, self.text_loader(run))
+            except Exception as e:
+                logger.warning(f"Failed to index text of run {run.info.run_id}: {e}")
+
+    def text_indexed_ids(self) -> set:
+        if not self.fts:
+            return set()
+        with self._lock:
+            return {r[0] for r in self._conn.execute("SELECT run_id FROM run_text")}
+
+    def backfill_text(self, client):
+        """Index the text of every run that has none yet (runs from before the index)."""
+        if not self.fts or self.text_loader is None:
+            return
+        missing = self.run_ids() - self.text_indexed_ids()
+        if not missing:
+            return
+        started = time.perf_counter()
+        for run_id in missing:
+            try:
+                self.index_text([client.get_run(run_id)])
+            except Exception:
+                continue  # deleted since
+        logger.info(f"Run text indexed for {len(missing)} runs in {time.perf_counter() - started:.2f}s")
+
+    def delete(self, run_ids: Iterable[str]):
+        ids = [(run_id,) for run_id in run_ids]
+        if ids:
+            with self._lock, self._conn:
+                self._conn.executemany("DELETE FROM runs WHERE run_id = ?", ids)
+                if self.fts:
+                    self._conn.executemany(
+                        "DELETE FROM runs_fts WHERE rowid = (SELECT id FROM run_text WHERE run_id = ?)", ids
+                    )
+                    self._conn.executemany("DELETE FROM run_text WHERE run_id = ?", ids)
+
+    def run_ids(self, updated_before: Optional[int] = None) -> set:
+        sql, args = "SELECT run_id FROM runs", ()
+        if updated_before is not None:
+            sql, args = sql + " WHERE updated_at < ?", (updated_before,)
+        with self._lock:
+            return {r[0] for r in self._conn.execute(sql, args)}
+
+    def rebuild(self, client, experiment_id: str):
+        """Re-project every run of the experiment, page by page, and drop rows for deleted runs."""
+        started = time.perf_counter()
+        started_ms = int(time.time() * 1000)
+        seen = set()
+        page_token = None
+        while True:
+            page = client.search_runs(
+                experiment_ids=[experiment_id],
+                max_results=_REBUILD_PAGE_SIZE,
+                order_by=["attribute.start_time DESC"],
+                page_token=page_token,
+            )
+            self.upsert_many(row_from_run(run) for run in page)
+            seen.update(run.info.run_id for run in page)
+            page_token = page.token
+            if not page_token:
+                break
+        # Rows upserted by writes during the rebuild are newer than it; keep them
+        self.delete(self.run_ids(updated_before=started_ms) - seen)
+        self._last_refresh = time.monotonic()
+        self._ready.set()
+        logger.info(f"Run index rebuilt: {len(seen)} runs in {time.perf_counter() - started:.2f}s")
+
+    def start_rebuild(self, client, experiment_id: str) -> threading.Thread:
+        def target():
+            try:
+                self.rebuild(client, experiment_id)
+            except Exception:
+                logger.exception("Run index rebuild failed; list queries will keep using MLflow")
+                return
+            try:
+                self.backfill_text(client)
+            except Exception:
+                logger.exception("Run text backfill failed")
+
+        thread = threading.Thread(target=target, name="run-index-rebuild", daemon=True)
+        thread.start()
+        return thread
+
+    def refresh(self, client, experiment_id: str, experiment_dir: Optional[str] = None, force: bool = False):
+        """
+        Catch up with runs written outside this process. Throttled to once per
+        `refresh_seconds`. With `experiment_dir` (file store) new runs are
+        found by listing run directories, which is far cheaper than search_runs.
+        """
+        now = time.monotonic()
+        if not self.ready or (not force and now - self._last_refresh < self.refresh_seconds):
+            return
+        self._last_refresh = now
+
+        with self._lock:
+            running = [r[0] for r in self._conn.execute("SELECT run_id FROM runs WHERE status = 'running'")]
+            watermark = self._conn.execute("SELECT MAX(started_at) FROM runs").fetchone()[0]
+
+        if experiment_dir:
+            known = self.run_ids()
+            try:
+                on_disk = {e.name for e in os.scandir(experiment_dir) if e.is_dir() and len(e.name) == 32}
+            except FileNotFoundError:
+                on_disk = set()
+            self.delete(known - on_disk)
+            fetched = []
+            for run_id in (on_disk - known) | set(running):
+                try:
+                    run = client.get_run(run_id)
+                except Exception:
+                    continue  # half-written run directory
+                if run.info.lifecycle_stage != "deleted":
+                    fetched.append(run)
+            self.upsert_many(row_from_run(run) for run in fetched)
+            self.index_text(fetched)
+            return
+
+        # Other stores: new runs by start_time, and whatever was still running
+        since = (watermark or 0) - 60_000
+        runs = client.search_runs(
+            experiment_ids=[experiment_id],
+            filter_string=f"attribute.start_time >= {since}",
+            max_results=_REBUILD_PAGE_SIZE,
+        )
+        known = self.run_ids()
+        fetched = {run.info.run_id: run for run in runs}
+        for run_id in running:
+            if run_id not in fetched:
+                try:
+                    fetched[run_id] = client.get_run(run_id)
+                except Exception:
+                    continue
+        self.upsert_many(row_from_run(run) for run in fetched.values())
+        # Text only for runs that are new or were still being written
+        self.index_text(run for run_id, run in fetched.items() if run_id not in known or run_id in running)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def query(
+        self,
+        query: Optional[str] = None,
+        model: Optional[str] = None,
+        status: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        since_ms: Optional[int] = None,
+        session_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        limit: int = 1000,
+    ) -> List[Dict[str, Any]]:
+        """Rows matching every given filter, newest first."""
+        where, args = self._where(query, model, status, min_confidence, since_ms, session_id, user_id)
+        sql = f"SELECT * FROM runs{where} ORDER BY started_at DESC LIMIT ?"
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(sql, (*args, limit))]
+
+    def page(
+        self,
+        sort: str = "started_at",
+        order: str = "desc",
+        after: Optional[Tuple[Any, str]] = None,
+        limit: int = 100,
+        **filters,
+    ) -> List[Dict[str, Any]]:
+        """
+        One page of rows matching `filters`, ordered by (sort key, run_id).
+        `after` is the (sort value, run_id) of the previous page's last row
+        (keyset pagination: no OFFSET, so deep pages cost the same as the first).
+        """
+        if sort not in SORT_KEYS or order not in ("asc", "desc"):
+            raise ValueError(f"Unsupported sort: {sort} {order}")
+        key = SORT_KEYS[sort]
+        where, args = self._where(**filters)
+        if after is not None:
+            op = "<" if order == "desc" else ">"
+            # The plain bound on the key lets SQLite seek the expression
+            # indexes; the row-value comparison alone only filters a scan
+            where += (" AND " if where else " WHERE ") + f"{key} {op}= ? AND ({key}, run_id) {op} (?, ?)"
+            args = [*args, after[0], *after]
+        sql = f"SELECT * FROM runs{where} ORDER BY {key} {order.upper()}, run_id {order.upper()} LIMIT ?"
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(sql, (*args, limit))]
+
+    def run_for_client_id(self, client_run_id: str) -> Optional[str]:
+        """MLflow run_id of the run ingested under `client_run_id`, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id FROM runs WHERE client_run_id = ? LIMIT 1", (client_run_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def count(self, **filters) -> int:
+        where, args = self._where(**filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM runs{where}", args).fetchone()[0]
+
+    def search(self, text: str, limit: int = 20, **filters) -> List[Dict[str, Any]]:
+        """
+        Runs whose text matches `text`, best first, each with a `snippet`
+        (matched words wrapped in MARK_START/MARK_END) and its bm25 `score`
+        (lower is better). Empty without FTS5 or for a query with no words.
+        """
+        match = fts_query(text) if self.fts else None
+        if not match:
+            return []
+        where, args = self._where(**filters)
+        if where:
+            where = f" AND t.run_id IN (SELECT run_id FROM runs{where})"
+        sql = (
+            f"SELECT r.*, snippet(runs_fts, -1, ?, ?, '…', {_SNIPPET_TOKENS}) AS snippet, {_RANK} AS score "
+            "FROM runs_fts JOIN run_text t ON t.id = runs_fts.rowid JOIN runs r ON r.run_id = t.run_id "
+            f"WHERE runs_fts MATCH ?{where} ORDER BY score LIMIT ?"
+        )
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(sql, (MARK_START, MARK_END, match, *args, limit))]
+
+    def snippets(self, text: str, run_ids: List[str]) -> Dict[str, str]:
+        """Snippet of the best-matching text column for each of `run_ids` that matches."""
+        match = fts_query(text) if self.fts else None
+        if not match or not run_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in run_ids)
+        sql = (
+            f"SELECT t.run_id, snippet(runs_fts, -1, ?, ?, '…', {_SNIPPET_TOKENS}) "
+            "FROM runs_fts JOIN run_text t ON t.id = runs_fts.rowid "
+            f"WHERE runs_fts MATCH ? AND t.run_id IN ({placeholders})"
+        )
+        with self._lock:
+            return dict(self._conn.execute(sql, (MARK_START, MARK_END, match, *run_ids)).fetchall())
+
+    def in_range(self, days: float, limit: int = 10000) -> List[Dict[str, Any]]:
+        return self.query(since_ms=cutoff_ms(days), limit=limit)
+
+    def distinct(self, column: str, **filters) -> List[str]:
+        """Sorted distinct values of `model` or `status` among rows matching `filters`."""
+        if column not in ("model", "status"):
+            raise ValueError(f"Unsupported column: {column}")
+        where, args = self._where(**filters)
+        sql = f"SELECT DISTINCT {column} FROM runs{where} ORDER BY {column}"
+        with self._lock:
+            return [r[0] for r in self._conn.execute(sql, args) if r[0]]
+
+    # ------------------------------------------------------------------
+    # Aggregates for /metrics
+    # ------------------------------------------------------------------
+    def summary(self, since_ms: int) -> Dict[str, Any]:
+        """Run count, latency percentiles, total cost, mean confidence and parse rate."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), COUNT(latency_ms), SUM(cost_usd), AVG(confidence), "
+                "AVG(COALESCE(parse_success, 0)) FROM runs WHERE started_at >= ?",
+                (since_ms,),
+            ).fetchone()
+            run_count, n_latency, total_cost, avg_confidence, parse_rate = row
+
+            def latency_at(q: float) -> float:
+                offset = min(int(q * n_latency), n_latency - 1)
+                return self._conn.execute(
+                    "SELECT latency_ms FROM runs WHERE started_at >= ? AND latency_ms IS NOT NULL "
+                    "ORDER BY latency_ms LIMIT 1 OFFSET ?",
+                    (since_ms, offset),
+                ).fetchone()[0]
+
+            p50 = latency_at(0.5) if n_latency else 0
+            p95 = latency_at(0.95) if n_latency else 0
+        return {
+            "run_count": run_count,
+            "latency_count": n_latency,
+            "p50_latency_ms": p50,
+            "p95_latency_ms": p95,
+            "total_cost_usd": total_cost or 0.0,
+            "avg_confidence": avg_confidence or 0.0,
+            "parse_success_rate": parse_rate or 0.0,
+            "models": self.distinct("model", since_ms=since_ms),
+        }
+
+    def cost_by_model(self, since_ms: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT model, COALESCE(SUM(cost_usd), 0), COUNT(*) FROM runs "
+                "WHERE started_at >= ? GROUP BY model ORDER BY 2 DESC",
+                (since_ms,),
+            ).fetchall()
+        return [{"model": m, "cost_usd": c, "run_count": n} for m, c, n in rows]
+
+    def confidence_histogram(self, since_ms: int, bins: int = 10) -> List[int]:
+        """Counts per equal-width confidence bin over [0, 1]; 1.0 lands in the last bin."""
+        counts = [0] * bins
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT MIN(CAST(MAX(0.0, MIN(1.0, confidence)) * ? AS INTEGER), ?), COUNT(*) "
+                "FROM runs WHERE started_at >= ? AND confidence IS NOT NULL GROUP BY 1",
+                (bins, bins - 1, since_ms),
+            ).fetchall()
+        for idx, n in rows:
+            counts[idx] = n
+        return counts
+
+    def timeseries(self, metric: str, since_ms: int, limit: int = 2000) -> List[Dict[str, Any]]:
+        """Per-run values of an indexed metric, oldest first."""
+        if metric not in ("latency_ms", "cost_usd", "confidence", "parse_success"):
+            raise ValueError(f"Metric not indexed: {metric}")
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT started_at, {metric}, run_id, model FROM runs "
+                f"WHERE started_at >= ? AND {metric} IS NOT NULL ORDER BY started_at ASC LIMIT ?",
+                (since_ms, limit),
+            ).fetchall()
+        return [
+            {
+                "timestamp": datetime.datetime.fromtimestamp(ts / 1000.0).isoformat(),
+                "value": value,
+                "run_id": run_id,
+                "model": model,
+            }
+            for ts, value, run_id, model in rows
+        ]
+
+    def _where(
+        self,
+        query: Optional[str] = None,
+        model: Optional[str] = None,
+        status: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        since_ms: Optional[int] = None,
+        session_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> Tuple[str, list]:
+        clauses, args = [], []
+        if query:
+            # Substring over the fields the MLflow path searched (run_id, model,
+            # status, question), or a full-text hit in the run's text
+            like = "(run_id || ' ' || model || ' ' || status || ' ' || COALESCE(question, '')) LIKE ? ESCAPE '\\'"
+            escaped = query.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            args.append(f"%{escaped}%")
+            match = fts_query(query) if self.fts else None
+            if match:
+                clauses.append(
+                    f"({like} OR run_id IN (SELECT t.run_id FROM runs_fts JOIN run_text t ON t.id = runs_fts.rowid "
+                    "WHERE runs_fts MATCH ?))"
+                )
+                args.append(match)
+            else:
+                clauses.append(like)
+        if model:
+            clauses.append("model = ?")
+            args.append(model)
+        if status:
+            clauses.append("status = ?")
+            args.append(status)
+        if min_confidence is not None:
+            clauses.append("confidence >= ?")
+            args.append(min_confidence)
+        if since_ms is not None:
+            clauses.append("started_at >= ?")
+            args.append(since_ms)
+        if session_id:
+            clauses.append("session_id = ?")
+            args.append(session_id)
+        if user_id:
+            clauses.append("user_id = ?")
+            args.append(user_id)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 
@@ -7,6 +8,43 @@ class Settings(BaseSettings):
     MLFLOW_EXPERIMENT_NAME: str = "sales-predictor-layer2"
     FULCRUM_API_KEY: str = "dev-key-123"
     AUTH_DISABLED: bool = False
+    # Point replay LLM calls at an OpenAI-compatible server (e.g. the
+    # offline mock_llm_server.py) instead of the real providers.
+    LLM_BASE_URL: Optional[str] = None
+    # Content-addressed artifact blobs; defaults to <mlruns>-cas for file: stores.
+    # Must be the same directory the Streamlit app writes to.
+    ARTIFACT_CAS_ENABLED: bool = True
+    ARTIFACT_CAS_DIR: Optional[str] = None
+    ARTIFACT_CAS_MIN_BYTES: int = 1024
+    # Opt-in request profiling for /chat and /replay (X-Fulcrum-Profile: 1
+    # header, or this fraction of requests)
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_TOP_ALLOCATIONS: int = 25
+    PROFILE_THREAD_INTERVAL_MS: float = 5.0  # worker-thread stack sampling
+    # Memoized pipeline steps (retrieval, KPI summary) shared by chat and replay
+    PIPELINE_CACHE_ENABLED: bool = True
+    PIPELINE_CACHE_MAX_ENTRIES: int = 256
+    PIPELINE_CACHE_DIR: str = os.path.join(".fulcrum_data", "step_cache")
+    # End-to-end /chat budget in seconds (0 disables); optional steps are cut to meet it
+    CHAT_DEADLINE_SECONDS: float = 30.0
+    # SQLite projection of runs for /runs and /metrics, rebuilt from MLflow on startup
+    RUN_INDEX_ENABLED: bool = True
+    RUN_INDEX_PATH: str = os.path.join(".fulcrum_data", "run_index.sqlite")
+    # How often list queries look for runs written by other processes
+    RUN_INDEX_REFRESH_SECONDS: float = 15.0
+    # Per-field cap on question/prompt/response text kept in the full-text index
+    RUN_INDEX_TEXT_MAX_CHARS: int = 20000
+    # Assembled RunDetail objects kept in memory, dropped on every write to the run.
+    # TTLs bound staleness from other writers (Streamlit app); 0 disables caching.
+    RUN_DETAIL_CACHE_MAX_ENTRIES: int = 512
+    RUN_DETAIL_CACHE_ACTIVE_TTL_SECONDS: float = 2.0
+    RUN_DETAIL_CACHE_FINISHED_TTL_SECONDS: float = 3600.0
+    # Artifacts on file: stores are read in place; remote-store reads are
+    # cached in memory up to this many bytes
+    ARTIFACT_LOCAL_FAST_PATH: bool = True
+    ARTIFACT_READ_CACHE_BYTES: int = 64 * 1024 * 1024
+    # Threads for concurrent run-detail reads and tree listing on remote stores
+    ARTIFACT_FETCH_WORKERS: int = 8
     CORS_ORIGINS: list[str] = [
         "*",
     ]
@@ -14,6 +14,7 @@ export interface ChatResponse {
     session_id?: string;
     guardrails?: any;
     context?: any[];
+    degraded_steps?: string[];
 }
 
 export async function sendChatMessage(data: ChatRequest): Promise<ChatResponse> {
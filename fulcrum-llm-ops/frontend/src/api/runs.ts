@@ -1,5 +1,5 @@
 import { apiClient } from "@/api/client";
-import type { RunDetail } from "@/lib/types";
+import type { ArtifactItem, ConfidenceExplanation, RunDetail, RunPreview, RunSection, RunTrace } from "@/lib/types";
 
 // Re-export Run type for compatibility
 export type Run = RunDetail;
@@ -8,23 +8,69 @@ export type { RunDetail };
 interface RunsResponse {
     runs: RunDetail[];
     total: number;
+    next_cursor?: string | null;
     models: string[];
     statuses: string[];
 }
 
-export async function fetchRuns(params: any): Promise<RunsResponse> {
+export interface RunsQuery {
+    q?: string;
+    model?: string;
+    status?: string;
+    min_confidence?: number;
+    sort?: "started_at" | "latency_ms" | "cost_usd" | "confidence";
+    order?: "asc" | "desc";
+    // next_cursor of the previous page
+    cursor?: string;
+    limit?: number;
+}
+
+export async function fetchRuns(params: RunsQuery): Promise<RunsResponse> {
     const { data } = await apiClient.get("/runs", { params });
     return data;
 }
 
-export async function fetchRun(runId: string): Promise<RunDetail> {
-    const { data } = await apiClient.get(`/runs/${runId}`);
+// Ranked full-text search over questions, prompts and responses
+export async function searchRuns(q: string, params: { model?: string; status?: string; limit?: number } = {}): Promise<RunDetail[]> {
+    const { data } = await apiClient.get("/runs/search", { params: { q, ...params } });
+    return data;
+}
+
+// Omit `include` for every section; the heavy ones also have lazy endpoints below
+export async function fetchRun(runId: string, include?: RunSection[]): Promise<RunDetail> {
+    const params = include ? { include: include.join(",") } : undefined;
+    const { data } = await apiClient.get(`/runs/${runId}`, { params });
     // Normalize data if needed
     if (data.started_at && !data.start_time) data.start_time = data.started_at;
     if (!data.confidence_score && data.confidence) data.confidence_score = data.confidence;
     return data;
 }
 
+export async function fetchRunArtifacts(runId: string): Promise<ArtifactItem[]> {
+    const { data } = await apiClient.get(`/runs/${runId}/artifacts`);
+    return data;
+}
+
+export async function fetchRunPreview(runId: string): Promise<RunPreview> {
+    const { data } = await apiClient.get(`/runs/${runId}/preview`);
+    return data;
+}
+
+export async function fetchRunExplanation(runId: string): Promise<ConfidenceExplanation | null> {
+    try {
+        const { data } = await apiClient.get(`/runs/${runId}/explanation`);
+        return data;
+    } catch (err: any) {
+        if (err?.response?.status === 404) return null;
+        throw err;
+    }
+}
+
+export async function fetchTrace(runId: string): Promise<RunTrace> {
+    const { data } = await apiClient.get(`/runs/${runId}/trace`);
+    return data;
+}
+
 export async function fetchArtifact(runId: string, path: string): Promise<string> {
     const { data } = await apiClient.get(`/runs/${runId}/artifact`, {
         params: { path },
@@ -33,6 +79,26 @@ export async function fetchArtifact(runId: string, path: string): Promise<string
     return data;
 }
 
+export interface ArtifactPreview {
+    content: string;
+    // Full artifact size in bytes
+    size: number;
+    truncated: boolean;
+}
+
+// First `maxBytes` of an artifact; the endpoint reports the full size so the viewer can offer the rest
+export async function fetchArtifactPreview(runId: string, path: string, maxBytes: number): Promise<ArtifactPreview> {
+    const res = await apiClient.get(`/runs/${runId}/artifact`, {
+        params: { path, max_bytes: maxBytes },
+        responseType: 'text'
+    });
+    return {
+        content: res.data,
+        size: Number(res.headers["x-artifact-size"] ?? 0),
+        truncated: res.headers["x-artifact-truncated"] === "true",
+    };
+}
+
 export async function replayRun(data: any): Promise<any> {
     const { data: res } = await apiClient.post("/replay", data);
     return res;
@@ -1,6 +1,9 @@
 import { useState, useEffect } from "react";
 import { X, Loader2, Download } from "lucide-react";
-import { fetchArtifact } from "@/api/runs";
+import { fetchArtifact, fetchArtifactPreview } from "@/api/runs";
+
+// Large prompt packets and traces open as a preview; the rest loads on request
+const PREVIEW_BYTES = 256 * 1024;
 
 interface ArtifactViewerProps {
     runId: string;
@@ -11,6 +14,7 @@ interface ArtifactViewerProps {
 
 export function ArtifactViewer({ runId, path, isOpen, onClose }: ArtifactViewerProps) {
     const [content, setContent] = useState<string | null>(null);
+    const [fullSize, setFullSize] = useState<number | null>(null);
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState<string | null>(null);
 
@@ -18,8 +22,11 @@ export function ArtifactViewer({ runId, path, isOpen, onClose }: ArtifactViewerP
         if (isOpen && runId && path) {
             setLoading(true);
             setError(null);
-            fetchArtifact(runId, path)
-                .then(setContent)
+            fetchArtifactPreview(runId, path, PREVIEW_BYTES)
+                .then(preview => {
+                    setContent(preview.content);
+                    setFullSize(preview.truncated ? preview.size : null);
+                })
                 .catch(err => {
                     setError(err.message);
                     setContent(null);
@@ -27,9 +34,21 @@ export function ArtifactViewer({ runId, path, isOpen, onClose }: ArtifactViewerP
                 .finally(() => setLoading(false));
         } else {
             setContent(null);
+            setFullSize(null);
         }
     }, [isOpen, runId, path]);
 
+    const loadFull = () => {
+        setLoading(true);
+        fetchArtifact(runId, path)
+            .then(full => {
+                setContent(full);
+                setFullSize(null);
+            })
+            .catch(err => setError(err.message))
+            .finally(() => setLoading(false));
+    };
+
     if (!isOpen) return null;
 
     return (
@@ -64,9 +83,21 @@ export function ArtifactViewer({ runId, path, isOpen, onClose }: ArtifactViewerP
                             <p className="text-sm">{error}</p>
                         </div>
                     ) : (
-                        <pre className="whitespace-pre-wrap break-words">
-                            {content}
-                        </pre>
+                        <>
+                            {fullSize !== null && (
+                                <div className="mb-3 flex items-center justify-between rounded-md border px-3 py-2 text-xs text-muted-foreground font-sans">
+                                    <span>
+                                        Showing the first {(PREVIEW_BYTES / 1024).toFixed(0)} KB of {(fullSize / 1024).toFixed(0)} KB
+                                    </span>
+                                    <button onClick={loadFull} className="font-medium text-primary hover:underline">
+                                        Load full artifact
+                                    </button>
+                                </div>
+                            )}
+                            <pre className="whitespace-pre-wrap break-words">
+                                {content}
+                            </pre>
+                        </>
                     )}
                 </div>
             </div>
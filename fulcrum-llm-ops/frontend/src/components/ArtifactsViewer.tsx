@@ -8,13 +8,34 @@ import { fetchArtifact } from "@/api/runs";
 interface ArtifactsViewerProps {
     runId: string;
     artifacts: any[];
+    tags?: Record<string, string>;
 }
 
-export function ArtifactsViewer({ runId, artifacts }: ArtifactsViewerProps) {
+// Heavy artifacts of unsampled runs are replaced by hashes on the run's tags
+export function SamplingNotice({ tags }: { tags?: Record<string, string> }) {
+    if (!tags || tags.artifact_sampling !== "hashes_only") return null;
+    const hashes = Object.entries(tags).filter(([k]) => k.startsWith("artifact_sha256."));
+    return (
+        <div className="p-3 rounded-md border border-yellow-500/20 bg-yellow-500/5 text-xs text-yellow-300 space-y-1">
+            <div>
+                Heavy artifacts were not stored for this run (not sampled at rate {tags.artifact_sample_rate}).
+                Only their hashes were kept.
+            </div>
+            {hashes.map(([k, v]) => (
+                <div key={k} className="font-mono text-muted-foreground truncate">
+                    {k.replace("artifact_sha256.", "")}: {v.slice(0, 16)}… ({tags[k.replace("sha256", "bytes")]} bytes)
+                </div>
+            ))}
+        </div>
+    );
+}
+
+export function ArtifactsViewer({ runId, artifacts, tags }: ArtifactsViewerProps) {
     const [selectedPath, setSelectedPath] = useState<string | null>(null);
 
     return (
         <div className="space-y-4">
+            <SamplingNotice tags={tags} />
             <div className="bg-card border border-white/[0.04] rounded-lg overflow-hidden">
                 <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-2 p-4">
                     {artifacts.map((art) => (
@@ -148,7 +148,7 @@ export function RunPanel({ runId, defaultOpen = true }: RunPanelProps) {
                             </TabsContent>
 
                             <TabsContent value="artifacts" className="mt-0">
-                                <ArtifactsViewer runId={run.run_id} artifacts={run.artifacts || []} />
+                                <ArtifactsViewer runId={run.run_id} artifacts={run.artifacts || []} tags={run.tags} />
                             </TabsContent>
 
                             <TabsContent value="metadata" className="mt-0">
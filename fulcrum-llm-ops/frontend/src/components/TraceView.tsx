@@ -1,38 +1,120 @@
+import { useQuery } from "@tanstack/react-query";
 import { Card, CardHeader, CardTitle } from "@/components/ui/card";
 import { CodeBlock } from "@/components/ui/code-block";
 import { Badge } from "@/components/ui/badge";
+import { fetchTrace } from "@/api/runs";
+import type { TraceSpan } from "@/lib/types";
 
 interface TraceViewProps {
     run: any;
 }
 
+const STATUS_COLORS: Record<string, string> = {
+    OK: "bg-blue-500/60",
+    ERROR: "bg-red-500/70",
+    BLOCKED: "bg-orange-500/70",
+    WARNING: "bg-yellow-500/70",
+};
+
+// Depth-first order so children render directly under their parent
+function orderSpans(spans: TraceSpan[]): Array<{ span: TraceSpan; depth: number }> {
+    const ids = new Set(spans.map((s) => s.span_id));
+    const children = new Map<string | null, TraceSpan[]>();
+    for (const s of spans) {
+        const key = s.parent_id && ids.has(s.parent_id) ? s.parent_id : null;
+        children.set(key, [...(children.get(key) || []), s]);
+    }
+    const out: Array<{ span: TraceSpan; depth: number }> = [];
+    const visit = (parent: string | null, depth: number) => {
+        const list = (children.get(parent) || []).sort((a, b) => a.start_offset_ms - b.start_offset_ms);
+        for (const s of list) {
+            out.push({ span: s, depth });
+            visit(s.span_id, depth + 1);
+        }
+    };
+    visit(null, 0);
+    return out;
+}
+
+function TraceWaterfall({ runId }: { runId: string }) {
+    const { data: trace, isLoading, isError } = useQuery({
+        queryKey: ["trace", runId],
+        queryFn: () => fetchTrace(runId),
+        enabled: !!runId,
+        retry: false,
+    });
+
+    if (isLoading) {
+        return <div className="h-16 animate-pulse bg-white/5 rounded-lg" />;
+    }
+    if (isError || !trace || trace.spans.length === 0) {
+        return null;
+    }
+
+    const total = Math.max(trace.duration_ms, ...trace.spans.map((s) => s.start_offset_ms + s.duration_ms), 1);
+
+    return (
+        <Card className="overflow-hidden">
+            <CardHeader className="bg-white/[0.02] border-b border-white/[0.04] py-3 flex flex-row items-center justify-between">
+                <CardTitle className="text-sm font-medium uppercase tracking-wider text-muted-foreground">Spans</CardTitle>
+                <Badge variant="outline" className="text-[10px] font-mono">{total.toFixed(0)} ms</Badge>
+            </CardHeader>
+            <div className="p-3 space-y-1">
+                {orderSpans(trace.spans).map(({ span, depth }) => (
+                    <div key={span.span_id} className="flex items-center gap-3 text-xs" title={JSON.stringify(span.attributes)}>
+                        <div className="w-48 shrink-0 truncate font-mono text-muted-foreground" style={{ paddingLeft: depth * 12 }}>
+                            {span.name}
+                        </div>
+                        <div className="relative flex-1 h-4 bg-white/[0.02] rounded">
+                            <div
+                                className={`absolute h-full rounded ${STATUS_COLORS[span.status] || "bg-slate-500/60"}`}
+                                style={{
+                                    left: `${(span.start_offset_ms / total) * 100}%`,
+                                    width: `${Math.max((span.duration_ms / total) * 100, 0.5)}%`,
+                                }}
+                            />
+                        </div>
+                        <div className="w-20 shrink-0 text-right font-mono text-muted-foreground">
+                            {span.duration_ms.toFixed(1)} ms
+                        </div>
+                    </div>
+                ))}
+            </div>
+        </Card>
+    );
+}
+
 export function TraceView({ run }: TraceViewProps) {
     return (
-        <div className="grid grid-cols-1 md:grid-cols-2 gap-6 h-full">
-            <Card className="flex flex-col overflow-hidden h-full">
-                <CardHeader className="bg-white/[0.02] border-b border-white/[0.04] py-3">
-                    <CardTitle className="text-sm font-medium uppercase tracking-wider text-muted-foreground">Input / Prompt</CardTitle>
-                </CardHeader>
-                <div className="flex-1 bg-[#0d0f14] relative">
-                    <CodeBlock
-                        code={run.input_preview || run.inputs || { prompt: run.prompt } || {}}
-                        className="rounded-none border-0 bg-transparent h-full max-h-[500px]"
-                    />
-                </div>
-            </Card>
-
-            <Card className="flex flex-col overflow-hidden h-full border-blue-500/20">
-                <CardHeader className="bg-blue-500/5 border-b border-blue-500/10 py-3 flex flex-row items-center justify-between">
-                    <CardTitle className="text-sm font-medium uppercase tracking-wider text-blue-400">Model Output</CardTitle>
-                    <Badge variant="outline" className="text-[10px] border-blue-500/20 text-blue-400">Final Answer</Badge>
-                </CardHeader>
-                <div className="flex-1 bg-[#0d0f14] relative">
-                    <CodeBlock
-                        code={run.output_preview || run.outputs || { output: run.output } || {}}
-                        className="rounded-none border-0 bg-transparent h-full max-h-[500px]"
-                    />
-                </div>
-            </Card>
+        <div className="space-y-6 h-full">
+            <TraceWaterfall runId={run.run_id} />
+
+            <div className="grid grid-cols-1 md:grid-cols-2 gap-6">
+                <Card className="flex flex-col overflow-hidden h-full">
+                    <CardHeader className="bg-white/[0.02] border-b border-white/[0.04] py-3">
+                        <CardTitle className="text-sm font-medium uppercase tracking-wider text-muted-foreground">Input / Prompt</CardTitle>
+                    </CardHeader>
+                    <div className="flex-1 bg-[#0d0f14] relative">
+                        <CodeBlock
+                            code={run.input_preview || run.inputs || { prompt: run.prompt } || {}}
+                            className="rounded-none border-0 bg-transparent h-full max-h-[500px]"
+                        />
+                    </div>
+                </Card>
+
+                <Card className="flex flex-col overflow-hidden h-full border-blue-500/20">
+                    <CardHeader className="bg-blue-500/5 border-b border-blue-500/10 py-3 flex flex-row items-center justify-between">
+                        <CardTitle className="text-sm font-medium uppercase tracking-wider text-blue-400">Model Output</CardTitle>
+                        <Badge variant="outline" className="text-[10px] border-blue-500/20 text-blue-400">Final Answer</Badge>
+                    </CardHeader>
+                    <div className="flex-1 bg-[#0d0f14] relative">
+                        <CodeBlock
+                            code={run.output_preview || run.outputs || { output: run.output } || {}}
+                            className="rounded-none border-0 bg-transparent h-full max-h-[500px]"
+                        />
+                    </div>
+                </Card>
+            </div>
         </div>
     );
 }
@@ -10,6 +10,9 @@ export interface RunListItem {
     confidence_label?: "low" | "medium" | "high";
     confidence_components?: Record<string, number>;
     parse_success?: number;
+    question?: string;
+    // Search results only: matched text with hits wrapped in <mark></mark>
+    snippet?: string;
     started_at?: string;
 }
 
@@ -19,11 +22,14 @@ export interface ArtifactItem {
     type: "text" | "json" | "file";
 }
 
+// Optional sections of GET /runs/{id}; omitted sections come back null
+export type RunSection = "metrics" | "artifacts" | "preview" | "explanation";
+
 export interface RunDetail extends RunListItem {
-    params: Record<string, any>;
-    metrics: Record<string, number>;
-    tags: Record<string, string>;
-    artifacts: ArtifactItem[];
+    params?: Record<string, any>;
+    metrics?: Record<string, number>;
+    tags?: Record<string, string>;
+    artifacts?: ArtifactItem[];
     input_preview?: Record<string, any>;
     output_preview?: Record<string, any>;
 
@@ -44,6 +50,11 @@ export interface RunDetail extends RunListItem {
     confidence_explanation?: ConfidenceExplanation;
 }
 
+export interface RunPreview {
+    input_preview: Record<string, any>;
+    output_preview: Record<string, any>;
+}
+
 export interface ConfidenceExplanation {
     version: string;
     score: number;
@@ -67,8 +78,27 @@ export interface ConfidenceExplanation {
     improvement_actions: string[];
 }
 
+export interface TraceSpan {
+    span_id: string;
+    parent_id?: string | null;
+    name: string;
+    status: string;
+    start_offset_ms: number;
+    duration_ms: number;
+    attributes: Record<string, any>;
+}
+
+export interface RunTrace {
+    run_id: string;
+    started_at?: number;
+    duration_ms: number;
+    spans: TraceSpan[];
+}
+
 export interface RunsResponse {
     runs: RunListItem[];
+    total: number;
+    next_cursor?: string | null;
     models: string[];
     statuses: string[];
 }
@@ -1,6 +1,6 @@
-import { useState, useMemo } from "react";
+import { useState, useMemo, useEffect } from "react";
 import { useQuery } from '@tanstack/react-query';
-import { fetchRuns } from '@/api/runs';
+import { fetchRuns, type Run } from '@/api/runs';
 import { useNavigate } from "react-router-dom";
 import { formatDistanceToNow } from 'date-fns';
 import {
@@ -16,27 +16,46 @@ import {
 } from "@/components/ui/table";
 import { Card } from "@/components/ui/card";
 
+const PAGE_SIZE = 50;
+
 export function LiveRuns() {
     const navigate = useNavigate();
     const [filter, setFilter] = useState('');
+    // Older pages loaded on demand; only the newest page is polled
+    const [olderRuns, setOlderRuns] = useState<Run[]>([]);
+    const [olderCursor, setOlderCursor] = useState<string | null | undefined>(undefined);
+    const [loadingOlder, setLoadingOlder] = useState(false);
 
     const { data, isLoading, refetch, isFetching } = useQuery({
-        queryKey: ['runs'],
-        queryFn: () => fetchRuns({ limit: 50 }),
+        queryKey: ['runs', filter],
+        queryFn: () => fetchRuns({ q: filter || undefined, limit: PAGE_SIZE }),
         refetchInterval: 5000,
     });
 
-    const runs = data?.runs || [];
+    useEffect(() => {
+        setOlderRuns([]);
+        setOlderCursor(undefined);
+    }, [filter]);
+
+    const nextCursor = olderCursor === undefined ? data?.next_cursor : olderCursor;
 
-    const filteredRuns = useMemo(() => {
-        if (!filter) return runs;
-        const q = filter.toLowerCase();
-        return runs.filter((r: any) =>
-            r.run_id.toLowerCase().includes(q) ||
-            r.inputs?.prompt?.toLowerCase().includes(q) ||
-            (r.model_name || r.model || "").toLowerCase().includes(q)
-        );
-    }, [runs, filter]);
+    const loadOlder = async () => {
+        if (!nextCursor) return;
+        setLoadingOlder(true);
+        try {
+            const page = await fetchRuns({ q: filter || undefined, cursor: nextCursor, limit: PAGE_SIZE });
+            setOlderRuns((prev) => [...prev, ...page.runs]);
+            setOlderCursor(page.next_cursor ?? null);
+        } finally {
+            setLoadingOlder(false);
+        }
+    };
+
+    const runs = useMemo(() => {
+        const newest = data?.runs || [];
+        const seen = new Set(newest.map((r) => r.run_id));
+        return [...newest, ...olderRuns.filter((r) => !seen.has(r.run_id))];
+    }, [data, olderRuns]);
 
     // Compute live metrics from real data
     const metrics = useMemo(() => {
@@ -47,8 +66,8 @@ export function LiveRuns() {
         const avgLatency = latencies.length > 0
             ? (latencies.reduce((a: number, b: number) => a + b, 0) / latencies.length / 1000).toFixed(2) + "s"
             : "-";
-        return { total: runs.length, successRate, avgLatency };
-    }, [runs]);
+        return { total: data?.total ?? runs.length, successRate, avgLatency };
+    }, [runs, data]);
 
     return (
         <div className="p-4 space-y-4 h-full overflow-y-auto custom-scrollbar bg-background">
@@ -74,7 +93,7 @@ export function LiveRuns() {
                         <Input
                             value={filter}
                             onChange={(e) => setFilter(e.target.value)}
-                            placeholder="Filter runs..."
+                            placeholder="Search runs..."
                             className="pl-8 w-[180px] h-8 text-xs"
                         />
                     </div>
@@ -144,14 +163,14 @@ export function LiveRuns() {
                                         </div>
                                     </TableCell>
                                 </TableRow>
-                            ) : filteredRuns.length === 0 ? (
+                            ) : runs.length === 0 ? (
                                 <TableRow>
                                     <TableCell colSpan={8} className="h-24 text-center text-muted-foreground text-xs">
                                         No runs found.
                                     </TableCell>
                                 </TableRow>
                             ) : (
-                                filteredRuns.map((run: any) => (
+                                runs.map((run: any) => (
                                     <TableRow
                                         key={run.run_id}
                                         onClick={() => navigate(`/runs/${run.run_id}`)}
@@ -174,7 +193,9 @@ export function LiveRuns() {
                                         </TableCell>
                                         <TableCell className="py-1">
                                             <div className="max-w-[300px] truncate text-[11px] text-muted-foreground font-mono">
-                                                {run.inputs?.prompt || run.prompt || "No input prompt captured"}
+                                                {run.snippet
+                                                    ? <Highlighted text={run.snippet} />
+                                                    : run.question || run.inputs?.prompt || run.prompt || "No input prompt captured"}
                                             </div>
                                         </TableCell>
                                         <TableCell className="text-right py-1 text-[11px] font-mono text-muted-foreground">
@@ -202,11 +223,34 @@ export function LiveRuns() {
                         </TableBody>
                     </Table>
                 </div>
+                {nextCursor && (
+                    <div className="flex items-center justify-between text-xs text-muted-foreground">
+                        <span>Showing {runs.length} of {data?.total ?? runs.length}</span>
+                        <Button onClick={loadOlder} variant="outline" size="sm" className="h-7 text-xs" disabled={loadingOlder}>
+                            {loadingOlder && <Loader2 className="h-3.5 w-3.5 animate-spin mr-1" />}
+                            Load older runs
+                        </Button>
+                    </div>
+                )}
             </div>
         </div>
     );
 }
 
+// Search snippets mark hits with <mark></mark>; render them as text, never as HTML
+function Highlighted({ text }: { text: string }) {
+    const parts = text.split(/<mark>(.*?)<\/mark>/g);
+    return (
+        <>
+            {parts.map((part, i) =>
+                i % 2 === 1
+                    ? <mark key={i} className="bg-primary/30 text-foreground rounded-sm px-0.5">{part}</mark>
+                    : <span key={i}>{part}</span>
+            )}
+        </>
+    );
+}
+
 function StatusBadge({ status }: { status: string }) {
     if (status === 'completed' || status === 'success') return <Badge variant="success">Completed</Badge>;
     if (status === 'error' || status === 'failed') return <Badge variant="error">Error</Badge>;
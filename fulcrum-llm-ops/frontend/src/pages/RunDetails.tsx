@@ -1,7 +1,7 @@
 import { useState } from "react";
 import { useNavigate, useParams, Link, useSearchParams } from "react-router-dom";
 import { useQuery } from "@tanstack/react-query";
-import { fetchRun, fetchArtifact } from "@/api/runs";
+import { fetchRun, fetchArtifact, fetchRunArtifacts, fetchRunExplanation, fetchRunPreview } from "@/api/runs";
 import { formatDistanceToNow } from "date-fns";
 import {
     ArrowLeft, Clock, Activity, AlertCircle, Play,
@@ -13,6 +13,7 @@ import { Card, CardHeader, CardTitle, CardContent } from "@/components/ui/card";
 import { Tabs, TabsList, TabsTrigger, TabsContent } from "@/components/ui/tabs";
 import { CodeBlock } from "@/components/ui/code-block";
 import { ConfidenceExplanationPanel } from "@/components/ConfidenceExplanationPanel";
+import { SamplingNotice } from "@/components/ArtifactsViewer";
 
 export function RunDetails() {
     const { runId } = useParams();
@@ -24,11 +25,27 @@ export function RunDetails() {
         setSearchParams({ tab: val }, { replace: true });
     };
 
+    // Header and metadata up front; each heavy section loads when its tab opens
     const { data: run, isLoading, error } = useQuery({
-        queryKey: ["run", runId],
-        queryFn: () => fetchRun(runId!),
+        queryKey: ["run", runId, "header"],
+        queryFn: () => fetchRun(runId!, ["metrics"]),
         enabled: !!runId,
     });
+    const { data: preview } = useQuery({
+        queryKey: ["run", runId, "preview"],
+        queryFn: () => fetchRunPreview(runId!),
+        enabled: !!runId && activeTab === "trace",
+    });
+    const { data: artifacts } = useQuery({
+        queryKey: ["run", runId, "artifacts"],
+        queryFn: () => fetchRunArtifacts(runId!),
+        enabled: !!runId && activeTab === "artifacts",
+    });
+    const { data: explanation, isLoading: explanationLoading } = useQuery({
+        queryKey: ["run", runId, "explanation"],
+        queryFn: () => fetchRunExplanation(runId!),
+        enabled: !!runId && activeTab === "confidence",
+    });
 
     if (isLoading) {
         return (
@@ -189,7 +206,7 @@ export function RunDetails() {
                                 </CardHeader>
                                 <div className="flex-1 bg-[#0d0f14] relative">
                                     <CodeBlock
-                                        code={run.input_preview || run.inputs || { prompt: run.prompt } || {}}
+                                        code={preview?.input_preview || run.inputs || { prompt: run.prompt } || {}}
                                         className="rounded-none border-0 bg-transparent h-full max-h-[500px]"
                                     />
                                 </div>
@@ -202,7 +219,7 @@ export function RunDetails() {
                                 </CardHeader>
                                 <div className="flex-1 bg-[#0d0f14] relative">
                                     <CodeBlock
-                                        code={run.output_preview || run.outputs || { output: run.output } || {}}
+                                        code={preview?.output_preview || run.outputs || { output: run.output } || {}}
                                         className="rounded-none border-0 bg-transparent h-full max-h-[500px]"
                                     />
                                 </div>
@@ -238,12 +255,14 @@ export function RunDetails() {
                     </TabsContent>
 
                     <TabsContent value="artifacts" className="mt-0">
-                        <ArtifactsViewer runId={run.run_id} artifacts={run.artifacts || []} />
+                        <ArtifactsViewer runId={run.run_id} artifacts={artifacts || []} tags={run.tags} />
                     </TabsContent>
 
                     <TabsContent value="confidence" className="mt-0">
-                        {run.confidence_explanation ? (
-                            <ConfidenceExplanationPanel explanation={run.confidence_explanation} />
+                        {explanationLoading ? (
+                            <div className="h-64 bg-white/5 rounded-xl animate-pulse" />
+                        ) : explanation ? (
+                            <ConfidenceExplanationPanel explanation={explanation} />
                         ) : (
                             <div className="flex flex-col items-center justify-center py-12 text-muted-foreground border border-white/5 rounded-xl bg-white/[0.01]">
                                 <Gauge className="h-12 w-12 mb-4 opacity-20" />
@@ -295,11 +314,12 @@ function StatusBadge({ status }: { status: string }) {
     return <Badge variant="neutral">{status}</Badge>;
 }
 
-function ArtifactsViewer({ runId, artifacts }: { runId: string, artifacts: any[] }) {
+function ArtifactsViewer({ runId, artifacts, tags }: { runId: string, artifacts: any[], tags?: Record<string, string> }) {
     const [selectedPath, setSelectedPath] = useState<string | null>(null);
 
     return (
         <div className="space-y-4">
+            <SamplingNotice tags={tags} />
             <div className="bg-card border border-white/[0.04] rounded-lg overflow-hidden">
                 <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-2 p-4">
                     {artifacts.map((art) => (
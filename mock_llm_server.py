@@ -0,0 +1,267 @@
+"""
+Offline mock LLM provider.
+
+An OpenAI-compatible stand-in for chat completions so the whole stack can be
+load-tested and benchmarked without burning real tokens.
+
+Serves:
+1. POST /v1/chat/completions                               (OpenAI / xAI / Together)
+2. POST /openai/deployments/{deployment}/chat/completions   (Azure OpenAI)
+3. GET  /v1/models
+
+Both routes support `stream: true` (SSE chunks terminated by `data: [DONE]`).
+
+Behaviour is configured through MOCK_LLM_* env vars or CLI flags:
+- Time-to-first-token is lognormal (median + sigma) with an optional heavy tail
+- Output is emitted at a fixed token throughput
+- A fraction of requests fail with 500 or 429
+
+Usage:
+    python mock_llm_server.py --port 8100 --median-ms 400 --error-rate 0.02
+    LLM_BASE_URL=http://localhost:8100/v1 streamlit run app/main.py
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class MockConfig:
+    # Time to first token: lognormal around the median
+    latency_median_ms: float = float(os.getenv("MOCK_LLM_LATENCY_MEDIAN_MS", "400"))
+    latency_sigma: float = float(os.getenv("MOCK_LLM_LATENCY_SIGMA", "0.5"))
+    # Heavy tail: with probability tail_prob the sampled latency is multiplied
+    tail_prob: float = float(os.getenv("MOCK_LLM_TAIL_PROB", "0.02"))
+    tail_multiplier: float = float(os.getenv("MOCK_LLM_TAIL_MULTIPLIER", "8"))
+    # Output speed
+    tokens_per_sec: float = float(os.getenv("MOCK_LLM_TOKENS_PER_SEC", "80"))
+    # Failure injection
+    error_rate: float = float(os.getenv("MOCK_LLM_ERROR_RATE", "0.0"))
+    rate_limit_rate: float = float(os.getenv("MOCK_LLM_RATE_LIMIT_RATE", "0.0"))
+    seed: Optional[int] = int(os.getenv("MOCK_LLM_SEED")) if os.getenv("MOCK_LLM_SEED") else None
+
+    def sample_ttft_s(self, rng: random.Random) -> float:
+        mu = math.log(max(self.latency_median_ms, 1.0))
+        ms = rng.lognormvariate(mu, self.latency_sigma)
+        if rng.random() < self.tail_prob:
+            ms *= self.tail_multiplier
+        return ms / 1000.0
+
+
+config = MockConfig()
+_rng = random.Random(config.seed)
+
+app = FastAPI(title="Mock LLM Provider")
+
+
+# ---------------------------------------------------------------------------
+# Canned responses
+# ---------------------------------------------------------------------------
+_REGIONS = ["Northeast", "Southeast", "Midwest", "West"]
+
+
+def _forecast_answer(question: str) -> str:
+    """A sales-predictor style answer ending in forecast JSON."""
+    forecast = [
+        {"region": r, "period": "2026", "revenue_usd": _rng.randint(800, 2400) * 1000}
+        for r in _REGIONS
+    ]
+    return (
+        "**Executive Summary**\n"
+        f"- Outlook for: {question[:120] or 'the requested period'}\n"
+        "- Enterprise pipeline remains the primary growth driver.\n"
+        "- Weighted pipeline supports modest growth over the prior year.\n\n"
+        "**Key Assumptions**\n"
+        "- Historical close rates hold for open opportunities.\n"
+        "- No major pricing changes in the forecast window.\n\n"
+        "**Risks & Sensitivities**\n"
+        "- Competitive pressure in the SMB segment.\n"
+        "- Macro slowdown could delay large deals.\n\n"
+        "```json\n"
+        f"{json.dumps(forecast, indent=2)}\n"
+        "```"
+    )
+
+
+def _judge_answer(prompt: str) -> str:
+    """Valid JSON for the ai-confidence policy / grounding judges."""
+    if "compliance screener" in prompt:
+        return json.dumps({"pass": True, "violations": [], "rationale": "No sensitive data found."})
+    return json.dumps({
+        "score": round(_rng.uniform(0.6, 0.95), 2),
+        "unsupported_claims": [],
+        "missing_citations": False,
+        "rationale": "Answer is consistent with the provided context.",
+    })
+
+
+def _build_answer(messages: List[Dict[str, Any]]) -> str:
+    system = " ".join(m.get("content") or "" for m in messages if m.get("role") == "system")
+    user = " ".join(m.get("content") or "" for m in messages if m.get("role") == "user")
+    if "ONLY valid JSON" in system or "Return ONLY valid JSON" in user:
+        return _judge_answer(user)
+    match = re.search(r"USER QUESTION:\s*(.*)", user, re.DOTALL)
+    question = match.group(1).strip() if match else user
+    return _forecast_answer(question)
+
+
+def _tokenize(text: str) -> List[str]:
+    # Roughly word-level tokens that keep whitespace so chunks re-join exactly
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+def _approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+# ---------------------------------------------------------------------------
+# Completion handling
+# ---------------------------------------------------------------------------
+def _error_response() -> Optional[JSONResponse]:
+    roll = _rng.random()
+    if roll < config.rate_limit_rate:
+        return JSONResponse(
+            status_code=429,
+            headers={"Retry-After": "1"},
+            content={"error": {"message": "Rate limit exceeded (mock)", "type": "rate_limit_error"}},
+        )
+    if roll < config.rate_limit_rate + config.error_rate:
+        return JSONResponse(
+            status_code=500,
+            content={"error": {"message": "Internal server error (mock)", "type": "server_error"}},
+        )
+    return None
+
+
+async def _complete(body: Dict[str, Any], model: str):
+    error = _error_response()
+    if error is not None:
+        return error
+
+    messages = body.get("messages") or []
+    answer = _build_answer(messages)
+    tokens = _tokenize(answer)
+    prompt_tokens = sum(_approx_tokens(m.get("content") or "") for m in messages)
+    completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+    ttft = config.sample_ttft_s(_rng)
+    per_token = 1.0 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0.0
+
+    if body.get("stream"):
+        async def event_stream():
+            await asyncio.sleep(ttft)
+            for i, tok in enumerate(tokens):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "delta": ({"role": "assistant", "content": tok} if i == 0 else {"content": tok}),
+                        "finish_reason": None,
+                    }],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                if per_token:
+                    await asyncio.sleep(per_token)
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    await asyncio.sleep(ttft + per_token * len(tokens))
+    return JSONResponse({
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": answer},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        },
+    })
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    return await _complete(body, body.get("model", "mock-llm"))
+
+
+@app.post("/openai/deployments/{deployment}/chat/completions")
+async def azure_chat_completions(deployment: str, request: Request):
+    body = await request.json()
+    return await _complete(body, deployment)
+
+
+@app.get("/v1/models")
+def list_models():
+    return {"object": "list", "data": [{"id": "mock-llm", "object": "model", "owned_by": "mock"}]}
+
+
+@app.get("/config")
+def get_config():
+    return asdict(config)
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("MOCK_LLM_PORT", "8100")))
+    parser.add_argument("--median-ms", type=float, default=config.latency_median_ms)
+    parser.add_argument("--sigma", type=float, default=config.latency_sigma)
+    parser.add_argument("--tail-prob", type=float, default=config.tail_prob)
+    parser.add_argument("--tail-multiplier", type=float, default=config.tail_multiplier)
+    parser.add_argument("--tokens-per-sec", type=float, default=config.tokens_per_sec)
+    parser.add_argument("--error-rate", type=float, default=config.error_rate)
+    parser.add_argument("--rate-limit-rate", type=float, default=config.rate_limit_rate)
+    parser.add_argument("--seed", type=int, default=config.seed)
+    args = parser.parse_args()
+
+    config.latency_median_ms = args.median_ms
+    config.latency_sigma = args.sigma
+    config.tail_prob = args.tail_prob
+    config.tail_multiplier = args.tail_multiplier
+    config.tokens_per_sec = args.tokens_per_sec
+    config.error_rate = args.error_rate
+    config.rate_limit_rate = args.rate_limit_rate
+    config.seed = args.seed
+    _rng.seed(args.seed)
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
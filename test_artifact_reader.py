@@ -0,0 +1,250 @@
+"""
+Tests for the backend's artifact reader (in-place local reads, bounded remote cache).
+Runs offline: a fake MLflow client stands in for a file store and a remote store.
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+from pathlib import Path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fulcrum-llm-ops", "backend"))
+
+from app.services.artifact_reader import ArtifactReader, parse_range
+from app.services.artifact_reader import ArtifactStore
+
+RESPONSE = "Q3 revenue is forecast to grow 4%.\n" * 100
+
+
+class FakeClient:
+    """Runs live under <root>/<run_id>/artifacts; `remote` hides the file: URI."""
+
+    def __init__(self, root, remote=False, delay_s=0.0):
+        self.root = root
+        self.remote = remote
+        self.delay_s = delay_s
+        self.downloads = []
+
+    def add_artifact(self, run_id, path, content):
+        full = os.path.join(self.root, run_id, "artifacts", path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def get_run(self, run_id):
+        local = Path(self.root, run_id, "artifacts").as_uri()
+        uri = f"s3://bucket/{run_id}/artifacts" if self.remote else local
+        return SimpleNamespace(info=SimpleNamespace(artifact_uri=uri))
+
+    def list_artifacts(self, run_id, path=None):
+        time.sleep(self.delay_s)
+        base = os.path.join(self.root, run_id, "artifacts")
+        directory = os.path.join(base, path) if path else base
+        return [
+            SimpleNamespace(path=f"{path}/{name}" if path else name, is_dir=os.path.isdir(os.path.join(directory, name)))
+            for name in sorted(os.listdir(directory))
+        ]
+
+    def download_artifacts(self, run_id, path, dst_path):
+        time.sleep(self.delay_s)
+        self.downloads.append(path)
+        src = os.path.join(self.root, run_id, "artifacts", path)
+        if not os.path.exists(src):
+            raise OSError(f"{path} not found")
+        dst = os.path.join(dst_path, path)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.copy(src, dst)
+        return dst
+
+
+def test_local_reads_in_place():
+    """file: store: no download, CAS refs resolved, traversal outside the run refused."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cas = ArtifactStore(os.path.join(tmp, "cas"))
+        client = FakeClient(os.path.join(tmp, "mlruns"))
+        cas.encode(RESPONSE)  # the second sighting is stored as a chunk
+        client.add_artifact("run1", "llm_response.txt", cas.encode(RESPONSE))
+        client.add_artifact("run1", "nested/sources.json", '{"docs": []}')
+        client.add_artifact("run2", "secret.txt", "other run")
+        reader = ArtifactReader(client, cas)
+
+        ok = (
+            reader.read("run1", "llm_response.txt") == RESPONSE
+            and reader.read("run1", "nested/sources.json") == '{"docs": []}'
+            and reader.read("run1", "missing.txt") is None
+            and reader.read("run1", "../../run2/artifacts/secret.txt") is None
+            and client.downloads == []
+            and reader.stats["local_reads"] == 2
+        )
+    if ok:
+        print("✓ Local artifacts read in place (0 downloads), traversal refused")
+        return True
+    print(f"✗ downloads={client.downloads} stats={reader.stats}")
+    return False
+
+
+def test_remote_cache_is_byte_bounded():
+    """Remote store: repeat reads hit the cache, total bytes stay under the cap, no temp litter."""
+    before = set(os.listdir(tempfile.gettempdir()))
+    with tempfile.TemporaryDirectory() as tmp:
+        client = FakeClient(os.path.join(tmp, "mlruns"), remote=True)
+        for i in range(10):
+            client.add_artifact("run1", f"a{i}.txt", str(i) * 1000)
+        reader = ArtifactReader(client, ArtifactStore(None), cache_bytes=4000)
+
+        first = [reader.read("run1", f"a{i}.txt") for i in range(10)]
+        downloads_after_first = len(client.downloads)
+        reader.read("run1", "a9.txt")  # still cached
+        cached_hit = len(client.downloads) == downloads_after_first
+        reader.read("run1", "a0.txt")  # evicted long ago
+        evicted = len(client.downloads) == downloads_after_first + 1
+        reader.invalidate_run("run1")
+        reader.read("run1", "a9.txt")
+        invalidated = len(client.downloads) == downloads_after_first + 2
+        bounded = reader._cached_bytes <= 4000
+    litter = [n for n in set(os.listdir(tempfile.gettempdir())) - before if n.startswith("fulcrum-artifact-")]
+
+    ok = first[3] == "3" * 1000 and cached_hit and evicted and invalidated and bounded and not litter
+    if ok:
+        print(f"✓ Remote reads cached under {reader.cache_bytes} bytes; evicted, invalidated, no temp dirs left")
+        return True
+    print(f"✗ hit={cached_hit} evicted={evicted} invalidated={invalidated} bounded={bounded} litter={litter}")
+    return False
+
+
+def test_remote_fetches_overlap():
+    """Remote store: five reads plus the tree listing cost about one round trip, not the sum."""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = FakeClient(os.path.join(tmp, "mlruns"), remote=True, delay_s=0.1)
+        names = ["confidence_components.json", "confidence_explanation.json", "llm_response.txt",
+                 "parsed_forecast.json", "prompt_packet.txt"]
+        for name in names:
+            client.add_artifact("run1", name, "{}")
+        client.add_artifact("run1", "sources/docs/a.json", "{}")
+        client.add_artifact("run1", "sources/b.txt", "b")
+        reader = ArtifactReader(client, ArtifactStore(None))
+
+        start = time.perf_counter()
+        fetched = reader.fetch_many("run1", {
+            **{name: (lambda n=name: reader.read("run1", n)) for name in names},
+            "missing": lambda: reader.read("run1", "user_question.txt"),
+            "tree": lambda: reader.list_files("run1"),
+        })
+        elapsed = time.perf_counter() - start
+        local_tree = ArtifactReader(FakeClient(client.root), ArtifactStore(None)).list_files("run1")
+
+    expected_tree = sorted(names + ["sources/b.txt", "sources/docs/a.json"])
+    # Sequentially: 6 downloads + 3 directory listings = 0.9s; the tree is 3 levels deep
+    ok = (
+        all(fetched[name] == "{}" for name in names)
+        and fetched["missing"] is None
+        and fetched["tree"] == expected_tree
+        and sorted(local_tree) == expected_tree
+        and elapsed < 0.45
+    )
+    if ok:
+        print(f"✓ 6 reads + 3-level listing in {elapsed * 1000:.0f}ms (sequential ≈ 900ms)")
+        return True
+    print(f"✗ elapsed={elapsed:.2f}s tree={fetched['tree']} local={local_tree}")
+    return False
+
+
+def test_parse_range():
+    """Single byte ranges per RFC 9110; multi-range and junk fall back to the full body."""
+    ok = (
+        parse_range("bytes=0-99", 1000) == (0, 99)
+        and parse_range("bytes=900-", 1000) == (900, 999)
+        and parse_range("bytes=-100", 1000) == (900, 999)
+        and parse_range("bytes=990-5000", 1000) == (990, 999)
+        and parse_range("bytes=-5000", 1000) == (0, 999)
+        and parse_range(None, 1000) is None
+        and parse_range("bytes=0-1,5-9", 1000) is None
+        and parse_range("items=0-1", 1000) is None
+    )
+    unsatisfiable = 0
+    for header in ("bytes=1000-", "bytes=5-2", "bytes=-0"):
+        try:
+            parse_range(header, 1000)
+        except ValueError:
+            unsatisfiable += 1
+    if ok and unsatisfiable == 3:
+        print("✓ Ranges parsed: explicit, open-ended, suffix, clamped; 3 unsatisfiable rejected")
+        return True
+    print(f"✗ ok={ok} unsatisfiable={unsatisfiable}/3")
+    return False
+
+
+def test_streaming_bodies():
+    """Plain, CAS (compressed) and remote artifacts stream in bounded chunks, with ranges."""
+    # ~5 MB in paragraphs of 1000 lines, so a range starts part-way through a chunk
+    big = "".join(f"line {i:07d}\n" + ("\n" if i % 1000 == 999 else "") for i in range(400_000))
+    data = big.encode()
+    with tempfile.TemporaryDirectory() as tmp:
+        cas = ArtifactStore(os.path.join(tmp, "cas"))
+        client = FakeClient(os.path.join(tmp, "mlruns"))
+        client.add_artifact("run1", "trace.txt", big)
+        cas.encode(big)
+        client.add_artifact("run1", "prompt_packet.txt", cas.encode(big))
+        reader = ArtifactReader(client, cas)
+
+        plain = reader.open("run1", "trace.txt")
+        chunks = list(plain.iter_bytes())
+        cas_body = reader.open("run1", "prompt_packet.txt")
+        middle = b"".join(cas_body.iter_bytes(2_000_000, 2_000_099))
+        same_cas_etag = reader.open("run1", "prompt_packet.txt").etag == cas_body.etag
+        same_etag = reader.open("run1", "trace.txt").etag == plain.etag
+
+        remote_client = FakeClient(client.root, remote=True)
+        remote = ArtifactReader(remote_client, cas).open("run1", "trace.txt")
+        temp_dirs = [n for n in os.listdir(tempfile.gettempdir()) if n.startswith("fulcrum-artifact-")]
+        tail = b"".join(remote.iter_bytes(len(data) - 13))
+        left = [n for n in os.listdir(tempfile.gettempdir()) if n.startswith("fulcrum-artifact-")]
+        missing = reader.open("run1", "nope.txt")
+
+    ok = (
+        b"".join(chunks) == data
+        and max(len(c) for c in chunks) <= 64 * 1024
+        and cas_body.size == len(data) and same_cas_etag
+        and middle == data[2_000_000:2_000_100]
+        and same_etag
+        and tail == data[-13:] and len(temp_dirs) > len(left)
+        and missing is None
+    )
+    if ok:
+        print(f"✓ {len(data) // 1024} KiB streamed in {len(chunks)} chunks of ≤64 KiB; CAS range and remote temp cleanup OK")
+        return True
+    print(f"✗ chunks={len(chunks)} middle_ok={middle == data[2_000_000:2_000_100]} tail={tail!r} temp={temp_dirs} left={left}")
+    return False
+
+
+def run_all_tests():
+    print("=" * 60)
+    print("ARTIFACT READER TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("Local in place", test_local_reads_in_place),
+        ("Remote cache", test_remote_cache_is_byte_bounded),
+        ("Concurrent fetches", test_remote_fetches_overlap),
+        ("Range parsing", test_parse_range),
+        ("Streaming", test_streaming_bodies),
+    ]
+
+    results = []
+    for name, test_func in tests:
+        print(f"\n[{name}]")
+        try:
+            results.append((name, test_func()))
+        except Exception as e:
+            print(f"✗ Test failed with exception: {e}")
+            results.append((name, False))
+
+    passed_count = sum(1 for _, passed in results if passed)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
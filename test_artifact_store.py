@@ -0,0 +1,240 @@
+"""
+Tests for the content-addressed artifact store.
+Runs offline against a temporary directory.
+"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.artifact_store import REF_MAGIC, REF_MAGIC_V1, ArtifactStore, default_cas_dir, is_ref, parse_ref
+
+PACKET = "SYSTEM INSTRUCTIONS\n" + ("Use only the KPI summary below.\n" * 200) + "USER QUESTION: Q3 outlook?"
+
+KPI = "### INTERNAL KPI SUMMARY\n" + "".join(f"- **Region {i} Revenue (2025)**: ${i * 1_250_000:,.0f}\n" for i in range(12))
+DOCS = [{"source": f"market_report_{i}.md", "content": f"Report {i}: " + "demand in the segment is stable. " * 25}
+        for i in range(4)]
+
+
+def _prompt_packet(question, date):
+    """Same layout as prompt_builder.build_prompt_packet, with the date passed in."""
+    context_text = "".join(f"\n[Doc {i + 1}: {c['source']}]\n{c['content']}\n" for i, c in enumerate(DOCS))
+    return f"""You are the "Sales Predictor", an expert assistant for the executive team.
+Current Date: {date}
+
+TASK:
+Answer the user's question about sales forecasts, strategy, or risks.
+Use the provided INTERNAL KPI SUMMARY and RETRIEVED CONTEXT snippets to form your answer.
+
+REQUIREMENTS:
+1. Start with an **Executive Summary** (3-6 bullet points).
+2. List **Key Assumptions** made in your analysis.
+3. List **Risks & Sensitivities**.
+4. If the user asks for a numerical forecast, end your response with a JSON block.
+
+DATA CONTEXT:
+{KPI}
+
+RETRIEVED DOCUMENT SNIPPETS:
+{context_text}
+
+USER QUESTION:
+{question}"""
+
+
+def _count_blobs(root):
+    return sum(len(files) for _, _, files in os.walk(root))
+
+
+def _blob_bytes(refs):
+    """Uncompressed bytes of each distinct blob referenced by `refs`."""
+    chunks = {}
+    for encoded in refs:
+        for part in parse_ref(encoded)["parts"] if is_ref(encoded) else []:
+            if isinstance(part, dict):
+                chunks[part["sha256"]] = part["size"]
+    return sum(chunks.values())
+
+
+def test_roundtrip():
+    """A repeated packet is written as a reference that resolves to the original."""
+    with tempfile.TemporaryDirectory() as d:
+        store = ArtifactStore(d)
+        first = store.encode(PACKET)
+        encoded = store.encode(PACKET)
+        if first == PACKET and is_ref(encoded) and store.resolve(encoded) == PACKET:
+            print(f"✓ Round trip OK ({len(PACKET)} chars -> {len(encoded)} char reference)")
+            return True
+        print("✗ Round trip mismatch")
+        return False
+
+
+def test_dedup():
+    """Identical content is stored once."""
+    with tempfile.TemporaryDirectory() as d:
+        store = ArtifactStore(d)
+        refs = [store.encode(PACKET) for _ in range(5)]
+        blobs = _count_blobs(d)
+        if len(set(refs[1:])) == 1 and blobs == 1:
+            print("✓ Five writes, one blob")
+            return True
+        print(f"✗ refs={len(set(refs[1:]))} blobs={blobs}")
+        return False
+
+
+def test_shared_sections_stored_once():
+    """Packets differing only in question and date share their instruction, KPI and document blobs."""
+    with tempfile.TemporaryDirectory() as d:
+        store = ArtifactStore(d)
+        questions = [f"What is the Q{i % 4 + 1} outlook for region {i}?" for i in range(20)]
+        packets = [_prompt_packet(q, f"2026-03-{i % 28 + 1:02d}") for i, q in enumerate(questions)]
+        refs = [store.encode(p) for p in packets[:2]]
+        blobs_after_two = _count_blobs(d)
+        refs += [store.encode(p) for p in packets[2:]]
+
+        shared = len(packets[0].encode("utf-8")) - len(packets[0].split("Current Date:")[0].encode("utf-8"))
+        stored = _blob_bytes(refs)
+        per_run = [sum(len(p.encode("utf-8")) for p in parse_ref(r)["parts"] if isinstance(p, str)) for r in refs[1:]]
+        ok = (
+            all(store.resolve(r) == p for r, p in zip(refs, packets))
+            and all(is_ref(r) for r in refs[1:])
+            and _count_blobs(d) == blobs_after_two
+            and stored < shared
+            and max(len(r) for r in refs[1:]) * 3 < len(packets[0])
+            and all(q in r for q, r in zip(questions[1:], refs[1:]))
+        )
+        if ok:
+            print(f"✓ 20 packets: {stored} shared bytes in {_count_blobs(d)} blobs, ≤{max(per_run)} bytes inline per run "
+                  f"({max(len(r) for r in refs[1:])} byte reference for a {len(packets[0])} byte packet)")
+            return True
+        print(f"✗ stored={stored} shared={shared} per_run={per_run} blobs={_count_blobs(d)}")
+        return False
+
+
+def test_compression():
+    """Stored blob is much smaller than the input."""
+    with tempfile.TemporaryDirectory() as d:
+        store = ArtifactStore(d)
+        store.encode(PACKET)
+        store.encode(PACKET)
+        stored = sum(os.path.getsize(os.path.join(r, f)) for r, _, fs in os.walk(d) for f in fs)
+        if 0 < stored and stored * 5 < len(PACKET.encode("utf-8")):
+            print(f"✓ Compressed {len(PACKET)} -> {stored} bytes ({store.codec})")
+            return True
+        print(f"✗ Stored {stored} bytes for {len(PACKET)} chars")
+        return False
+
+
+def test_small_and_legacy_passthrough():
+    """Small or never-repeated text is written inline; plain and v1 content resolves."""
+    with tempfile.TemporaryDirectory() as d:
+        store = ArtifactStore(d, min_bytes=1024)
+        small = store.encode("short answer")
+        unique = "".join(f"Answer paragraph {i}: " + "growth holds. " * 30 + "\n\n" for i in range(5))
+        once = store.encode(unique)
+        legacy = store.resolve("plain artifact from an old run")
+        untouched = small == "short answer" and once == unique and _count_blobs(d) == 0
+
+        v1 = store.put(PACKET.encode("utf-8"))
+        v1_ok = store.resolve(REF_MAGIC_V1 + json.dumps(v1)) == PACKET
+        if untouched and legacy == "plain artifact from an old run" and v1_ok:
+            print("✓ Small, unique and legacy content untouched; v1 references resolve")
+            return True
+        print(f"✗ small={small!r} unique_inline={once == unique} legacy={legacy!r} v1={v1_ok}")
+        return False
+
+
+def test_open_ref_seek():
+    """A reference streams its parts in order and seeks into the middle of a chunk."""
+    with tempfile.TemporaryDirectory() as d:
+        store = ArtifactStore(d)
+        packet = _prompt_packet("Which region grows fastest?", "2026-03-01")
+        store.encode(packet)
+        ref = parse_ref(store.encode(packet))
+        data = packet.encode("utf-8")
+        whole_reader = store.open_ref(ref)
+        whole = b"".join(iter(lambda: whole_reader.read(4096), b""))
+        whole_reader.close()
+        offset = data.index(b"Report 2")
+        reader = store.open_ref(ref)
+        reader.seek(offset)
+        tail = b"".join(iter(lambda: reader.read(100), b""))
+        reader.close()
+        if whole == data and tail == data[offset:]:
+            print(f"✓ Streamed {len(ref['parts'])} parts; seek to {offset} OK")
+            return True
+        print(f"✗ whole_ok={whole == data} tail_ok={tail == data[offset:]}")
+        return False
+
+
+def test_traversal_ref_refused():
+    """A client-written reference cannot point a chunk outside the store."""
+    with tempfile.TemporaryDirectory() as d:
+        store = ArtifactStore(os.path.join(d, "cas"))
+        with open(os.path.join(d, "secret.gz"), "wb") as f:
+            f.write(gzip.compress(b"host file"))
+        crafted = [
+            REF_MAGIC + json.dumps({"size": 9, "parts": [{"sha256": "../../../secret", "codec": "gzip", "size": 9}]}),
+            REF_MAGIC + json.dumps({"size": 9, "parts": [{"sha256": "a" * 64, "codec": "../x", "size": 9}]}),
+            REF_MAGIC_V1 + json.dumps({"sha256": "../../../secret", "codec": "gzip", "size": 9}),
+        ]
+        refused = 0
+        for content in crafted:
+            for attempt in (store.resolve, parse_ref):
+                try:
+                    attempt(content)
+                except ValueError:
+                    refused += 1
+        try:
+            store.get("../../../secret", "gzip")
+        except ValueError:
+            refused += 1
+        if refused == 2 * len(crafted) + 1:
+            print("✓ Traversal references refused")
+            return True
+        print(f"✗ Only {refused}/{2 * len(crafted) + 1} crafted reads refused")
+        return False
+
+
+def test_default_dir():
+    """Blob dir sits next to a file: tracking store, none for remote stores."""
+    ok = default_cas_dir("file:/data/mlruns") == "/data/mlruns-cas" and default_cas_dir("http://mlflow:5000") is None
+    print("✓ Default directory derived" if ok else "✗ Unexpected default directory")
+    return ok
+
+
+def run_all_tests():
+    print("=" * 60)
+    print("ARTIFACT STORE TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("Round Trip", test_roundtrip),
+        ("Dedup", test_dedup),
+        ("Shared Sections", test_shared_sections_stored_once),
+        ("Compression", test_compression),
+        ("Passthrough", test_small_and_legacy_passthrough),
+        ("Open Ref", test_open_ref_seek),
+        ("Traversal", test_traversal_ref_refused),
+        ("Default Dir", test_default_dir),
+    ]
+
+    results = []
+    for name, test_func in tests:
+        print(f"\n[{name}]")
+        try:
+            results.append((name, test_func()))
+        except Exception as e:
+            print(f"✗ Test failed with exception: {e}")
+            results.append((name, False))
+
+    passed_count = sum(1 for _, passed in results if passed)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,227 @@
+"""
+Tests for the DAG pipeline executor.
+Runs offline with sleep-based steps standing in for retrieval / guardrails / LLM.
+"""
+
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import tempfile
+
+from app.pipeline import DagPipeline, FunctionStep, PipelineContext, StepResult, StepCache, IO, CPU
+from app.deadline import Deadline
+
+
+def _sleep_step(name, seconds, depends_on=(), kind=IO, output=None):
+    def fn(ctx, inputs):
+        time.sleep(seconds)
+        return output if output is not None else name
+    return FunctionStep(name, fn, depends_on=depends_on, kind=kind)
+
+
+def test_independent_steps_overlap():
+    """Three 0.2s independent steps finish in well under 0.6s."""
+    pipe = DagPipeline("overlap", [
+        _sleep_step("policy", 0.2),
+        _sleep_step("retrieval", 0.2, kind=CPU),
+        _sleep_step("kpis", 0.2, kind=CPU),
+        _sleep_step("join", 0.0, depends_on=("policy", "retrieval", "kpis")),
+    ])
+    ctx = PipelineContext()
+    start = time.perf_counter()
+    result = pipe.run({"question": "q"}, ctx)
+    elapsed = time.perf_counter() - start
+    offsets = [r["start_offset_seconds"] for r in ctx.metadata["step_runs"] if r["step_name"] != "join"]
+    if result.success and elapsed < 0.45 and max(offsets) < 0.1:
+        print(f"✓ Overlapped in {elapsed:.2f}s (sequential would be 0.6s)")
+        return True
+    print(f"✗ elapsed={elapsed:.2f}s offsets={offsets}")
+    return False
+
+
+def test_dependency_outputs_and_critical_path():
+    """Dependents receive upstream outputs; critical path follows the slowest branch."""
+    def join(ctx, inputs):
+        return f"{inputs['fast']}+{inputs['slow']}"
+
+    pipe = DagPipeline("critical", [
+        _sleep_step("fast", 0.01),
+        _sleep_step("slow", 0.15),
+        FunctionStep("join", join, depends_on=("fast", "slow")),
+    ])
+    ctx = PipelineContext()
+    result = pipe.run(None, ctx)
+    path = ctx.metadata["critical_path"]
+    if result.output == "fast+slow" and path == ["slow", "join"]:
+        print(f"✓ Output joined, critical path {path} ({ctx.metadata['critical_path_seconds']:.2f}s)")
+        return True
+    print(f"✗ output={result.output} path={path}")
+    return False
+
+
+def test_failure_skips_dependents():
+    """A failed step skips everything downstream and is returned as the result."""
+    calls = []
+
+    def blocked(ctx, inputs):
+        return StepResult(output=None, success=False, errors=["policy violation"])
+
+    def generate(ctx, inputs):
+        calls.append(1)
+        return "answer"
+
+    pipe = DagPipeline("failure", [
+        FunctionStep("policy", blocked, kind=IO),
+        _sleep_step("retrieval", 0.01),
+        FunctionStep("generate", generate, depends_on=("policy", "retrieval"), kind=IO),
+    ])
+    ctx = PipelineContext()
+    result = pipe.run(None, ctx)
+    skipped = [r["step_name"] for r in ctx.metadata["step_runs"] if r.get("skipped")]
+    if not result.success and result.errors == ["policy violation"] and not calls and skipped == ["generate"]:
+        print("✓ Failure propagated, dependent skipped")
+        return True
+    print(f"✗ success={result.success} calls={calls} skipped={skipped}")
+    return False
+
+
+def test_cycle_rejected():
+    """Cycles are rejected when the pipeline is built."""
+    try:
+        DagPipeline("cycle", [
+            FunctionStep("a", lambda c, i: 1, depends_on=("b",)),
+            FunctionStep("b", lambda c, i: 1, depends_on=("a",)),
+        ])
+    except ValueError as e:
+        print(f"✓ Rejected: {e}")
+        return True
+    print("✗ Cycle accepted")
+    return False
+
+
+def test_step_memoization():
+    """Keyed steps hit the cache on repeat input; a fresh cache reloads from disk."""
+    calls = []
+
+    def retrieve(ctx, inputs):
+        calls.append(inputs["input"]["question"])
+        return f"docs for {inputs['input']['question']}"
+
+    def build(cache):
+        return DagPipeline("memo", [
+            FunctionStep("retrieval", retrieve, key_fn=lambda c, i: i["input"]["question"]),
+            FunctionStep("prompt", lambda c, i: f"{i['input']['template']}: {i['retrieval']}", depends_on=("retrieval",)),
+        ], cache=cache)
+
+    def cache_status(ctx):
+        return {r["step_name"]: r["metadata"].get("cache") for r in ctx.metadata["step_runs"]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pipe = build(StepCache(max_entries=8, disk_dir=tmp))
+        first, second = PipelineContext(), PipelineContext()
+        pipe.run({"question": "q", "template": "v1"}, first)
+        result = pipe.run({"question": "q", "template": "v2"}, second)
+
+        reloaded = PipelineContext()
+        build(StepCache(max_entries=8, disk_dir=tmp)).run({"question": "q", "template": "v3"}, reloaded)
+
+    statuses = [cache_status(first), cache_status(second), cache_status(reloaded)]
+    if (calls == ["q"] and result.output == "v2: docs for q"
+            and statuses == [{"retrieval": "miss", "prompt": None}, {"retrieval": "hit", "prompt": None}, {"retrieval": "hit", "prompt": None}]):
+        print("✓ Retrieval ran once across a prompt tweak and a cold in-memory cache")
+        return True
+    print(f"✗ calls={calls} statuses={statuses}")
+    return False
+
+
+def test_disk_cache_evicts_least_recently_used():
+    """A disk entry that keeps getting hits survives; puts never list the cache directory."""
+    def result(name):
+        return StepResult(output=name)
+
+    scans = []
+    real_scandir = os.scandir
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = StepCache(max_entries=1, disk_dir=tmp, max_disk_entries=3)
+        os.scandir = lambda *a: scans.append(1) or real_scandir(*a)
+        try:
+            for name in ("a", "b", "c"):
+                cache.put(name, result(name))
+            time.sleep(0.01)
+            hot = cache.get("a")  # oldest file, but just used (a disk hit: memory holds only "c")
+            cache.put("d", result("d"))
+        finally:
+            os.scandir = real_scandir
+        on_disk = sorted(n[:-4] for n in os.listdir(tmp) if n.endswith(".pkl"))
+        # A restart sees the same order through the touched mtimes
+        restarted = StepCache(max_entries=1, disk_dir=tmp, max_disk_entries=3)
+        restarted.put("e", result("e"))
+        after_restart = sorted(n[:-4] for n in os.listdir(tmp) if n.endswith(".pkl"))
+
+    if hot is not None and on_disk == ["a", "c", "d"] and after_restart == ["a", "d", "e"] and not scans:
+        print("✓ Hot entry kept over older-used ones, before and after a restart; no directory scans on put")
+        return True
+    print(f"✗ on_disk={on_disk} after_restart={after_restart} scans={len(scans)}")
+    return False
+
+
+def test_deadline_cuts_optional_steps():
+    """An optional step past its budget is cut to its fallback; a required one fails the run."""
+    def answer(ctx, inputs):
+        return f"answer with {len(inputs['retrieval'])} docs"
+
+    pipe = DagPipeline("deadline", [
+        FunctionStep("retrieval", lambda c, i: time.sleep(0.5) or ["doc"], kind=IO, timeout=0.1, optional=True, fallback=[]),
+        FunctionStep("generate", answer, depends_on=("retrieval",), kind=IO),
+    ])
+    ctx = PipelineContext(deadline=Deadline(1.0))
+    degraded = pipe.run(None, ctx)
+    # asyncio.run waits for the abandoned thread on exit; the pipeline itself does not
+    elapsed = ctx.metadata["pipeline_duration_seconds"]
+
+    strict = DagPipeline("deadline-strict", [_sleep_step("generate", 0.5)])
+    strict_ctx = PipelineContext(deadline=Deadline(0.1))
+    failed = strict.run(None, strict_ctx)
+
+    if (degraded.output == "answer with 0 docs" and elapsed < 0.3
+            and ctx.metadata["cut_steps"] == ["retrieval"] and ctx.deadline.cut_steps == ["retrieval"]
+            and not failed.success and failed.metadata.get("deadline_exceeded")):
+        print(f"✓ Retrieval cut after {elapsed:.2f}s, answer degraded; required step failed: {failed.errors[0]}")
+        return True
+    print(f"✗ output={degraded.output} elapsed={elapsed:.2f}s cuts={ctx.metadata.get('cut_steps')} failed={failed}")
+    return False
+
+
+def run_all_tests():
+    print("=" * 60)
+    print("DAG PIPELINE TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("Overlap", test_independent_steps_overlap),
+        ("Critical Path", test_dependency_outputs_and_critical_path),
+        ("Failure Skips", test_failure_skips_dependents),
+        ("Cycle", test_cycle_rejected),
+        ("Memoization", test_step_memoization),
+        ("Disk LRU", test_disk_cache_evicts_least_recently_used),
+        ("Deadline", test_deadline_cuts_optional_steps),
+    ]
+
+    results = []
+    for name, test_func in tests:
+        print(f"\n[{name}]")
+        try:
+            results.append((name, test_func()))
+        except Exception as e:
+            print(f"✗ Test failed with exception: {e}")
+            results.append((name, False))
+
+    passed_count = sum(1 for _, passed in results if passed)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
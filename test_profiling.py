@@ -0,0 +1,106 @@
+"""
+Tests for request profiling: what the worker-thread sampler captures.
+Runs offline; no MLflow run is written.
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fulcrum-llm-ops", "backend"))
+
+from app.services.profiling import ProfileSession, ThreadSampler
+
+
+def _busy_in_worker(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(200))
+    return total
+
+
+def _sleep_in_worker(seconds):
+    time.sleep(seconds)  # blocking I/O stand-in (an LLM call)
+
+
+def test_sampler_covers_worker_threads():
+    """asyncio.to_thread and pool threads are sampled; the loop thread and idle workers are not."""
+    idle_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="idle-pool")
+    idle_pool.submit(lambda: None).result()  # leaves a worker parked on its queue
+
+    async def handler():
+        sampler = ThreadSampler(0.002, threading.get_ident())
+        sampler.start()
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="dag-chat") as pool:
+            await asyncio.gather(
+                asyncio.to_thread(_busy_in_worker, 0.2),
+                asyncio.get_running_loop().run_in_executor(pool, _sleep_in_worker, 0.2),
+            )
+        sampler.stop()
+        return sampler
+
+    sampler = asyncio.run(handler())
+    idle_pool.shutdown()
+    report = sampler.report("/chat")
+    frames = {frame for (_, stack) in sampler.stacks for frame in stack}
+    ok = (
+        any(f.endswith(" _busy_in_worker") for f in frames)
+        and any(f.endswith(" _sleep_in_worker") for f in frames)
+        and not any(f.endswith(" handler") for f in frames)
+        and not any(name.startswith("idle-pool") for name in sampler.by_thread)
+        and "dag-chat" in report
+    )
+    if ok:
+        print(f"✓ {sum(sampler.by_thread.values())} worker samples over {sampler.ticks} ticks; loop and idle threads skipped")
+        return True
+    print(f"✗ threads={dict(sampler.by_thread)}\n{report[:2000]}")
+    return False
+
+
+def test_session_artifacts():
+    """A profiled request yields the main profile, thread samples and allocations."""
+    session = ProfileSession("header", "/chat")
+    session.start()
+    worker = threading.Thread(target=_busy_in_worker, args=(0.1,), name="asyncio_0")
+    worker.start()
+    worker.join()
+    artifacts = session.stop()
+
+    expected = {"profile/profile.txt", "profile/threads.txt", "profile/allocations.txt"}
+    ok = expected <= set(artifacts) and "_busy_in_worker" in artifacts["profile/threads.txt"]
+    if ok:
+        print(f"✓ Artifacts: {sorted(artifacts)}")
+        return True
+    print(f"✗ artifacts={sorted(artifacts)}")
+    return False
+
+
+def run_all_tests():
+    print("=" * 60)
+    print("PROFILING TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("Worker Threads", test_sampler_covers_worker_threads),
+        ("Session Artifacts", test_session_artifacts),
+    ]
+
+    results = []
+    for name, test_func in tests:
+        print(f"\n[{name}]")
+        try:
+            results.append((name, test_func()))
+        except Exception as e:
+            print(f"✗ Test failed with exception: {e}")
+            results.append((name, False))
+
+    passed_count = sum(1 for _, passed in results if passed)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,332 @@
+"""
+Tests for the backend's SQLite run index.
+Runs offline: a fake MLflow client serves generated runs.
+"""
+
+import sys
+import os
+import time
+import random
+import tempfile
+from types import SimpleNamespace
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fulcrum-llm-ops", "backend"))
+
+from app.services.run_index import RunIndex, cutoff_ms, decode_cursor, encode_cursor, sort_value
+
+NOW_MS = int(time.time() * 1000)
+MODELS = ["grok-4-fast", "gpt-4o-mini", "claude-haiku"]
+
+
+def _run(i, status="FINISHED", age_hours=None, **metrics):
+    age_hours = i % (24 * 30) if age_hours is None else age_hours
+    return SimpleNamespace(
+        info=SimpleNamespace(
+            run_id=f"{i:032x}",
+            status=status,
+            start_time=NOW_MS - int(age_hours * 3600 * 1000),
+            lifecycle_stage="active",
+            experiment_id="1",
+        ),
+        data=SimpleNamespace(
+            params={
+                "model_name": MODELS[i % len(MODELS)],
+                "session_id": f"s{i % 50}",
+                "user_question": f"What is the Q{i % 4 + 1} forecast for region {i % 7}?",
+            },
+            metrics={
+                "latency_ms": metrics.get("latency_ms", 100.0 + i % 900),
+                "cost_usd": metrics.get("cost_usd", 0.001),
+                "confidence": metrics.get("confidence", (i % 101) / 100.0),
+                "parse_success": 1.0,
+            },
+            tags={"confidence_label": "medium"},
+        ),
+    )
+
+
+class _Page(list):
+    token = None
+
+
+class FakeClient:
+    """search_runs with page tokens, like MlflowClient."""
+
+    def __init__(self, runs):
+        self.runs = runs
+
+    def search_runs(self, experiment_ids, max_results=1000, order_by=None, page_token=None, filter_string=""):
+        start = int(page_token or 0)
+        page = _Page(self.runs[start:start + max_results])
+        if start + max_results < len(self.runs):
+            page.token = str(start + max_results)
+        return page
+
+    def get_run(self, run_id):
+        return next(r for r in self.runs if r.info.run_id == run_id)
+
+
+def test_rebuild_and_filters():
+    """Rebuild pages through MLflow, drops deleted runs, and filters match the MLflow path."""
+    runs = [_run(i) for i in range(2500)]
+    runs.append(_run(9999, status="RUNNING", age_hours=0))
+    with tempfile.TemporaryDirectory() as tmp:
+        index = RunIndex(os.path.join(tmp, "runs.sqlite"))
+        index.upsert_run(_run(123456))  # deleted from MLflow since the last start
+        time.sleep(0.01)  # rows written during the rebuild are kept
+        index.rebuild(FakeClient(runs), "1")
+
+        running = index.query(status="running")
+        by_question = index.query(query="q3 FORECAST for region 2")
+        confident = index.query(model="gpt-4o-mini", min_confidence=0.95)
+        ok = (
+            index.ready
+            and index.count() == 2501
+            and [r["run_id"] for r in running] == [f"{9999:032x}"]
+            and by_question and all("Q3" in r["question"] and "region 2" in r["question"] for r in by_question)
+            and confident and all(r["model"] == "gpt-4o-mini" and r["confidence"] >= 0.95 for r in confident)
+            and index.distinct("status") == ["running", "success"]
+        )
+    if ok:
+        print(f"✓ Rebuilt 2501 runs; {len(by_question)} match the text search, {len(confident)} the model+confidence filter")
+        return True
+    print(f"✗ count={index.count()} running={running[:1]} by_question={len(by_question)} confident={len(confident)}")
+    return False
+
+
+def test_aggregates():
+    """Summary, cost by model and the confidence histogram agree with the old Python computation."""
+    runs = [_run(i, age_hours=i % 48) for i in range(1000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        index = RunIndex(os.path.join(tmp, "runs.sqlite"))
+        index.rebuild(FakeClient(runs), "1")
+        since = cutoff_ms(1)
+        stats = index.summary(since)
+        costs = index.cost_by_model(since)
+        bins = index.confidence_histogram(since)
+
+    recent = [r for r in runs if r.info.start_time >= since]
+    latencies = sorted(r.data.metrics["latency_ms"] for r in recent)
+    confidences = [r.data.metrics["confidence"] for r in recent]
+    expected_bins = [0] * 10
+    for c in confidences:
+        expected_bins[min(int(c * 10), 9)] += 1
+
+    ok = (
+        stats["run_count"] == len(recent)
+        and stats["p50_latency_ms"] == latencies[int(0.5 * len(latencies))]
+        and stats["p95_latency_ms"] == latencies[min(int(0.95 * len(latencies)), len(latencies) - 1)]
+        and sum(c["run_count"] for c in costs) == len(recent)
+        and bins == expected_bins
+    )
+    if ok:
+        print(f"✓ {stats['run_count']} runs in range, p50={stats['p50_latency_ms']:.0f}ms p95={stats['p95_latency_ms']:.0f}ms")
+        return True
+    print(f"✗ stats={stats} bins={bins} expected={expected_bins}")
+    return False
+
+
+def _walk(index, sort, order, limit, **filters):
+    """Follow cursors to the last page, the way GET /runs clients do."""
+    seen, cursor = [], None
+    while True:
+        after = decode_cursor(cursor, sort, order) if cursor else None
+        rows = index.page(sort=sort, order=order, after=after, limit=limit + 1, **filters)
+        seen.extend(r["run_id"] for r in rows[:limit])
+        if len(rows) <= limit:
+            return seen
+        last = rows[limit - 1]
+        cursor = encode_cursor(sort, order, sort_value(sort, last), last["run_id"])
+
+
+def test_keyset_pagination():
+    """Paging visits every run exactly once, with tied start times and missing metrics."""
+    runs = [_run(i, age_hours=i // 10) for i in range(1000)]  # 10 runs share each start time
+    for run in runs[::7]:
+        del run.data.metrics["latency_ms"]
+    with tempfile.TemporaryDirectory() as tmp:
+        index = RunIndex(os.path.join(tmp, "runs.sqlite"))
+        index.rebuild(FakeClient(runs), "1")
+        newest = _walk(index, "started_at", "desc", 37)
+        by_latency = _walk(index, "latency_ms", "asc", 50)
+        haiku = _walk(index, "confidence", "desc", 25, model="claude-haiku")
+        total = index.count(model="claude-haiku")
+
+    expected_newest = [r.info.run_id for r in sorted(runs, key=lambda r: (r.info.start_time, r.info.run_id), reverse=True)]
+    latencies = [next(r for r in runs if r.info.run_id == rid).data.metrics.get("latency_ms", -1) for rid in by_latency]
+    ok = (
+        newest == expected_newest
+        and len(set(by_latency)) == 1000
+        and latencies == sorted(latencies)
+        and len(set(haiku)) == len(haiku) == total
+    )
+    if ok:
+        print(f"✓ Cursor walks: 1000 newest-first in pages of 37, 1000 by latency, {total} filtered")
+        return True
+    print(f"✗ newest_ok={newest == expected_newest} latency={len(set(by_latency))} filtered={len(haiku)}/{total}")
+    return False
+
+
+def test_full_text_search():
+    """Text is backfilled after a rebuild; a rare word is found with a snippet across 100k runs."""
+    runs = [_run(i) for i in range(300)]
+    responses = {r.info.run_id: f"Forecast for region {i % 7}: revenue grows {i % 13}% next quarter." for i, r in enumerate(runs)}
+    responses[runs[42].info.run_id] += " Risk: BadCo may churn after the price change."
+
+    def load_text(run):
+        return {"question": run.data.params["user_question"], "response": responses[run.info.run_id]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = RunIndex(os.path.join(tmp, "runs.sqlite"), text_loader=load_text)
+        if not index.fts:
+            print("✓ SQLite built without FTS5; search falls back to LIKE (skipped)")
+            return True
+        client = FakeClient(runs)
+        index.rebuild(client, "1")
+        index.backfill_text(client)
+        hits = index.search("badco")
+        listed = index.query(query="BadCo churn")
+
+        # Scale: 100k runs of filler text, one mention
+        rng = random.Random(3)
+        words = "revenue margin forecast region quarter growth churn pipeline customer renewal".split()
+        for i in range(100_000):
+            index.upsert_text(f"x{i:031d}", {"response": " ".join(rng.choice(words) for _ in range(40))})
+        index.upsert_text(f"x{77777:031d}", {"response": "the deal with BadCo slipped to next quarter"})
+        start = time.perf_counter()
+        for _ in range(20):
+            matches = index.snippets("badco", [f"x{77777:031d}"])
+            index.search("badco", limit=20)
+        elapsed_ms = (time.perf_counter() - start) / 20 * 1000
+
+    ok = (
+        [h["run_id"] for h in hits] == [runs[42].info.run_id]
+        and "<mark>BadCo</mark>" in hits[0]["snippet"]
+        and [r["run_id"] for r in listed] == [runs[42].info.run_id]
+        and "<mark>BadCo</mark>" in matches.get(f"x{77777:031d}", "")
+        and elapsed_ms < 50
+    )
+    if ok:
+        print(f"✓ Found BadCo: \"{hits[0]['snippet']}\"; {elapsed_ms:.1f}ms over 100k texts")
+        return True
+    print(f"✗ hits={hits} listed={len(listed)} matches={matches} elapsed={elapsed_ms:.1f}ms")
+    return False
+
+
+def test_list_latency_stays_flat():
+    """A filtered list query over 100k runs stays in the low milliseconds."""
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = RunIndex(os.path.join(tmp, "runs.sqlite"))
+        index.upsert_many(
+            {
+                "run_id": f"{i:032x}",
+                "status": "success" if i % 10 else "failed",
+                "model": MODELS[i % len(MODELS)],
+                "latency_ms": rng.uniform(100, 5000),
+                "confidence": rng.random(),
+                "started_at": NOW_MS - i * 60_000,
+                "session_id": f"s{i % 1000}",
+                "updated_at": NOW_MS,
+            }
+            for i in range(100_000)
+        )
+
+        deep = index.page(limit=100)
+        for _ in range(500):  # 50k runs in
+            last = deep[-1]
+            deep = index.page(after=(last["started_at"], last["run_id"]), limit=100)
+
+        timings = {}
+        start = time.perf_counter()
+        for _ in range(20):
+            index.page(after=(last["started_at"], last["run_id"]), status="failed", limit=100)
+        timings["page 500"] = (time.perf_counter() - start) / 20 * 1000
+
+        # Deep page by a metric sort, through its (key, run_id) index
+        deep = index.page(sort="latency_ms", order="desc", limit=100)
+        for _ in range(500):
+            last = deep[-1]
+            deep = index.page(sort="latency_ms", order="desc", after=(last["latency_ms"], last["run_id"]), limit=100)
+        start = time.perf_counter()
+        for _ in range(20):
+            index.page(sort="latency_ms", order="desc", after=(last["latency_ms"], last["run_id"]), limit=100)
+        timings["latency page 500"] = (time.perf_counter() - start) / 20 * 1000
+        for name, kwargs in {
+            "latest": {"limit": 100},
+            "status+model": {"status": "failed", "model": "claude-haiku", "limit": 100},
+            "session": {"session_id": "s42", "limit": 100},
+        }.items():
+            start = time.perf_counter()
+            for _ in range(20):
+                rows = index.query(**kwargs)
+            timings[name] = (time.perf_counter() - start) / 20 * 1000
+            assert rows, name
+        start = time.perf_counter()
+        index.summary(cutoff_ms(7))
+        timings["summary 7d"] = (time.perf_counter() - start) * 1000
+
+    report = ", ".join(f"{k} {v:.1f}ms" for k, v in timings.items())
+    if all(v < 50 for k, v in timings.items() if k != "summary 7d") and timings["summary 7d"] < 500:
+        print(f"✓ 100k runs: {report}")
+        return True
+    print(f"✗ 100k runs too slow: {report}")
+    return False
+
+
+def test_client_run_id_lookup():
+    """Ingest dedup: client_run_id tags are indexed by the rebuild and by write-time upserts."""
+    runs = [_run(i) for i in range(2000)]
+    for i, run in enumerate(runs):
+        run.data.tags["client_run_id"] = f"c{i:031x}"
+    with tempfile.TemporaryDirectory() as tmp:
+        index = RunIndex(os.path.join(tmp, "runs.sqlite"))
+        index.rebuild(FakeClient(runs), "1")
+        fresh = _run(5000)
+        fresh.data.tags["client_run_id"] = "it's-new"
+        index.upsert_run(fresh)
+        start = time.perf_counter()
+        found = index.run_for_client_id(f"c{1234:031x}")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        ok = (
+            found == runs[1234].info.run_id
+            and index.run_for_client_id("it's-new") == fresh.info.run_id
+            and index.run_for_client_id("unknown") is None
+            and elapsed_ms < 5
+        )
+    if ok:
+        print(f"✓ client_run_id resolved in {elapsed_ms:.2f}ms; quotes in ids are harmless")
+        return True
+    print(f"✗ found={found} elapsed={elapsed_ms:.2f}ms")
+    return False
+
+
+def run_all_tests():
+    print("=" * 60)
+    print("RUN INDEX TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("Rebuild & filters", test_rebuild_and_filters),
+        ("Aggregates", test_aggregates),
+        ("Keyset pagination", test_keyset_pagination),
+        ("Full-text search", test_full_text_search),
+        ("Client run ids", test_client_run_id_lookup),
+        ("100k runs", test_list_latency_stays_flat),
+    ]
+
+    results = []
+    for name, test_func in tests:
+        print(f"\n[{name}]")
+        try:
+            results.append((name, test_func()))
+        except Exception as e:
+            print(f"✗ Test failed with exception: {e}")
+            results.append((name, False))
+
+    passed_count = sum(1 for _, passed in results if passed)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -0,0 +1,160 @@
+"""
+Tests for background telemetry shipping with a disk spool.
+Runs offline: a fake `send` stands in for POST /runs/ingest.
+"""
+
+import sys
+import os
+import time
+import tempfile
+import threading
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("FULCRUM_TELEMETRY_RETRY_SECONDS", "0.2")
+
+from app.telemetry_shipper import TelemetryShipper
+
+
+class FakeBackend:
+    def __init__(self, up=True, delay=0.0):
+        self.up = up
+        self.delay = delay
+        self.received = []
+        self.lock = threading.Lock()
+
+    def send(self, records):
+        time.sleep(self.delay)
+        if not self.up:
+            raise ConnectionError("connection refused")
+        with self.lock:
+            self.received.extend(r["id"] for r in records)
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_submit_never_blocks():
+    """A slow backend does not slow down submit(); everything arrives in the end."""
+    backend = FakeBackend(delay=0.2)
+    with tempfile.TemporaryDirectory() as tmp:
+        shipper = TelemetryShipper(backend.send, os.path.join(tmp, "spool.jsonl"), queue_size=4)
+        start = time.perf_counter()
+        for i in range(20):
+            shipper.submit({"id": i})
+        elapsed = time.perf_counter() - start
+        arrived = _wait_for(lambda: sorted(backend.received) == list(range(20)))
+
+    if elapsed < 0.05 and arrived:
+        print(f"✓ 20 submits in {elapsed * 1000:.1f}ms; overflow spooled and replayed")
+        return True
+    print(f"✗ elapsed={elapsed:.3f}s received={sorted(backend.received)}")
+    return False
+
+
+def test_spool_replayed_when_backend_returns():
+    """Records sent while the backend is down are spooled, then replayed in bulk."""
+    backend = FakeBackend(up=False)
+    with tempfile.TemporaryDirectory() as tmp:
+        spool = os.path.join(tmp, "spool.jsonl")
+        shipper = TelemetryShipper(backend.send, spool)
+        for i in range(5):
+            shipper.submit({"id": i})
+        spooled = _wait_for(lambda: shipper.spool.pending() and shipper.depth == 0)
+
+        backend.up = True
+        replayed = _wait_for(lambda: sorted(backend.received) == list(range(5)))
+        drained = _wait_for(lambda: not shipper.spool.pending())
+
+    if spooled and replayed and drained:
+        print("✓ Spooled while down, replayed once the backend came back")
+        return True
+    print(f"✗ spooled={spooled} replayed={replayed} drained={drained} received={backend.received}")
+    return False
+
+
+def test_spill_at_exit():
+    """spill() moves queued records to the spool instead of sending them."""
+    backend = FakeBackend(delay=0.5)
+    with tempfile.TemporaryDirectory() as tmp:
+        shipper = TelemetryShipper(backend.send, os.path.join(tmp, "spool.jsonl"))
+        for i in range(3):
+            shipper.submit({"id": i})
+        time.sleep(0.05)  # sender picks up the first batch and stalls in send()
+        shipper.submit({"id": 3})
+        shipper.spill()
+        spooled = [r["id"] for r in shipper.spool.take()]
+
+    if spooled == [3]:
+        print("✓ Queued record spilled to disk at exit")
+        return True
+    print(f"✗ spooled={spooled}")
+    return False
+
+
+class RejectedBatch(Exception):
+    """Shaped like requests.HTTPError: the backend's answer is on `.response`."""
+
+    def __init__(self, status_code):
+        super().__init__(f"{status_code} Client Error")
+        self.response = SimpleNamespace(status_code=status_code, text="tags.region: Input should be a valid string")
+
+
+def test_invalid_record_dead_lettered():
+    """A 422 isolates the bad record to the dead-letter file; the rest ships and the spool drains."""
+    received = []
+
+    def send(records):
+        if any(r.get("bad") for r in records):
+            raise RejectedBatch(422)
+        received.extend(r["id"] for r in records)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shipper = TelemetryShipper(send, os.path.join(tmp, "spool.jsonl"))
+        shipper.spool.append([{"id": i, "bad": i == 3} for i in range(8)])
+        shipper.submit({"id": 8})
+        shipped = _wait_for(lambda: sorted(received) == [0, 1, 2, 4, 5, 6, 7, 8])
+        drained = _wait_for(lambda: not shipper.spool.pending())
+        rejected = [r["id"] for r in shipper.rejected.take()]
+
+    if shipped and drained and rejected == [3]:
+        print("✓ Rejected record dead-lettered; the other 8 shipped and the spool drained")
+        return True
+    print(f"✗ received={sorted(received)} drained={drained} rejected={rejected}")
+    return False
+
+
+def run_all_tests():
+    print("=" * 60)
+    print("TELEMETRY SHIPPER TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("Non-blocking Submit", test_submit_never_blocks),
+        ("Spool Replay", test_spool_replayed_when_backend_returns),
+        ("Spill at Exit", test_spill_at_exit),
+        ("Rejected Record", test_invalid_record_dead_lettered),
+    ]
+
+    results = []
+    for name, test_func in tests:
+        print(f"\n[{name}]")
+        try:
+            results.append((name, test_func()))
+        except Exception as e:
+            print(f"✗ Test failed with exception: {e}")
+            results.append((name, False))
+
+    passed_count = sum(1 for _, passed in results if passed)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(run_all_tests())
@@ -17,7 +17,7 @@ API_KEY = "dev-key-123"
 def verify_confidence():
     print("🧠 Verifying Confidence Score V0...")
     
-    client = FulcrumClient(api_url=API_URL, api_key=API_KEY)
+    client = FulcrumClient(api_url=API_URL, api_key=API_KEY, background=False)
     
     # Test 1: Perfect Run
     print("\n[1/3] Testing 'High Confidence' Run...")
@@ -64,7 +64,7 @@ def verify_confidence():
     print("\n[3/3] Testing Recompute on Artifact Upload...")
     # Add retrieval to the poor run
     print("   Uploading retrieved_sources.json to the low confidence run...")
-    client = FulcrumClient(api_url=API_URL, api_key=API_KEY)
+    client = FulcrumClient(api_url=API_URL, api_key=API_KEY, background=False)
     # Manual API call to upload artifact
     requests.post(f"{API_URL}/runs/{run.run_id}/artifact", json={
         "name": "retrieved_sources.json",
@@ -23,7 +23,8 @@ def verify():
         return
 
     # 2. Use Client
-    client = FulcrumClient(api_url=API_URL, api_key="dev-key-123")
+    # Synchronous, so run.run_id is known for the checks below
+    client = FulcrumClient(api_url=API_URL, api_key="dev-key-123", background=False)
     session_id = str(uuid.uuid4())
     
     print(f"   Starting run with session_id={session_id}...")